@@ -0,0 +1,109 @@
+"""
+Analytics API routes (finance dashboards).
+"""
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_read_db
+from app.middleware.query_profiler import query_budget
+from app.schemas.analytics import SpendReport, OutcomeReport, LLMUsageReport, LLMRequestUsage, LLMCallResponse
+from app.services.analytics import GROUP_BY_OPTIONS, spend_summary, outcome_summary
+from app.services.llm_usage import STAGES, usage_by_day, costliest_requests, request_llm_calls
+
+router = APIRouter()
+
+GROUP_BY_PATTERN = f"^({'|'.join(GROUP_BY_OPTIONS)})$"
+STAGE_PATTERN = f"^({'|'.join(STAGES)})$"
+
+# Default range of the LLM usage reports
+LLM_USAGE_DEFAULT_DAYS = 30
+
+
+@router.get(
+    "/analytics/spend",
+    response_model=SpendReport,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(query_budget(1))]
+)
+async def get_spend(
+    group_by: str = Query("category", pattern=GROUP_BY_PATTERN, description="category, month or department"),
+    year: Optional[int] = Query(None, ge=2000, le=9999, description="Defaults to the current year"),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    department: Optional[str] = Query(None),
+    category: Optional[str] = Query(None, description="Category name"),
+    db: Session = Depends(get_read_db)
+):
+    """Get approved spend (USD) grouped by category, month or department."""
+    year = year or datetime.utcnow().year
+    items = spend_summary(db, group_by, year, month=month, department=department, category=category)
+    return {"group_by": group_by, "year": year, "items": items}
+
+
+@router.get(
+    "/analytics/outcomes",
+    response_model=OutcomeReport,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(query_budget(1))]
+)
+async def get_outcomes(
+    group_by: str = Query("month", pattern=GROUP_BY_PATTERN, description="category, month or department"),
+    year: Optional[int] = Query(None, ge=2000, le=9999, description="Defaults to the current year"),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    department: Optional[str] = Query(None),
+    category: Optional[str] = Query(None, description="Category name"),
+    db: Session = Depends(get_read_db)
+):
+    """Get request counts and approval/rejection rates grouped by category, month or department."""
+    year = year or datetime.utcnow().year
+    items = outcome_summary(db, group_by, year, month=month, department=department, category=category)
+    return {"group_by": group_by, "year": year, "items": items}
+
+
+@router.get(
+    "/analytics/llm-usage",
+    response_model=LLMUsageReport,
+    dependencies=[Depends(query_budget(1))]
+)
+async def get_llm_usage(
+    start: Optional[date] = Query(None, description="First day; defaults to 30 days before end"),
+    end: Optional[date] = Query(None, description="Last day; defaults to today (UTC)"),
+    model: Optional[str] = Query(None),
+    stage: Optional[str] = Query(None, pattern=STAGE_PATTERN, description="ocr or category_match"),
+    db: Session = Depends(get_read_db)
+):
+    """Get LLM calls, tokens and latencies per day, model and stage."""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=LLM_USAGE_DEFAULT_DAYS - 1)
+    items = usage_by_day(db, start, end, model=model, stage=stage)
+    return {"start": start, "end": end, "items": items}
+
+
+@router.get(
+    "/analytics/llm-usage/requests",
+    response_model=List[LLMRequestUsage],
+    dependencies=[Depends(query_budget(1))]
+)
+async def get_costliest_requests(
+    start: Optional[date] = Query(None, description="First day; defaults to 30 days before end"),
+    end: Optional[date] = Query(None, description="Last day; defaults to today (UTC)"),
+    order_by: str = Query("tokens", pattern="^(tokens|latency)$"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Get the requests that used the most tokens (or LLM time)."""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=LLM_USAGE_DEFAULT_DAYS - 1)
+    return costliest_requests(db, start, end, order_by=order_by, limit=limit)
+
+
+@router.get(
+    "/analytics/llm-usage/requests/{request_id}",
+    response_model=List[LLMCallResponse],
+    dependencies=[Depends(query_budget(1))]
+)
+async def get_request_llm_calls(request_id: UUID, db: Session = Depends(get_read_db)):
+    """Get every LLM call made for a reimbursement request."""
+    return request_llm_calls(db, request_id)
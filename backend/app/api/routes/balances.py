@@ -4,39 +4,56 @@ Balances API routes.
 from typing import List, Optional
 from uuid import UUID
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from datetime import datetime
 
-from app.database import get_db
+from app.database import get_read_db
+from app.config import settings
 from app.models.employee import Employee
 from app.models.employee_benefit_balance import EmployeeBenefitBalance
 from app.models.benefit_category import BenefitCategory
 from app.schemas.balance import BalanceResponse
+from app.services.http_cache import (
+    make_etag,
+    etag_matches,
+    set_cache_headers,
+    not_modified,
+    employee_balance_version
+)
 
 router = APIRouter()
 
 
 @router.get("/employees/{employee_id}/balances", response_model=List[BalanceResponse])
 async def get_employee_balances(
+    request: Request,
+    response: Response,
     employee_id: UUID,
     year: Optional[int] = Query(None, description="Year (defaults to current year)"),
     month: Optional[int] = Query(None, description="Month (defaults to current month)"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get employee benefit balances for all categories."""
-    # Check if employee exists
-    employee = db.query(Employee).filter(Employee.id == employee_id).first()
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee not found")
-    
     # Use current year/month if not provided
     if year is None or month is None:
         now = datetime.utcnow()
         year = year or now.year
         month = month or now.month
     
+    # Check if employee exists (a deleted employee must not revalidate as 304)
+    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    # Answer revalidations from the version marker before running the full query
+    etag = make_etag("balances", employee_id, year, month, employee_balance_version(db, employee_id, year))
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.CACHE_CONTROL_BALANCES)
+    
+    set_cache_headers(response, etag, settings.CACHE_CONTROL_BALANCES)
+    
     # Get all categories
     categories = db.query(BenefitCategory).all()
     
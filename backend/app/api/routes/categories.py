@@ -1,30 +1,65 @@
 """
 Categories API routes.
 """
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, selectinload
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.config import settings
 from app.models.benefit_category import BenefitCategory
 from app.models.category_keyword import CategoryKeyword
 from app.schemas.category import (
     CategoryCreate,
     CategoryUpdate,
     CategoryResponse,
+    LimitProposal,
+    LimitSimulation,
     KeywordCreate,
     KeywordResponse
 )
+from app.schemas.pagination import Page
+from app.services.pagination import keyset_paginate, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from app.services.http_cache import (
+    make_etag,
+    etag_matches,
+    set_cache_headers,
+    not_modified,
+    category_set_version
+)
+from app.middleware.query_profiler import query_budget
 
 router = APIRouter()
 
 
-@router.get("/categories", response_model=List[CategoryResponse])
-async def list_categories(db: Session = Depends(get_db)):
-    """Get list of all categories with keywords."""
-    categories = db.query(BenefitCategory).all()
-    return categories
+@router.get(
+    "/categories",
+    response_model=Page[CategoryResponse],
+    dependencies=[Depends(query_budget(3))]
+)
+async def list_categories(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    db: Session = Depends(get_read_db)
+):
+    """Get a page of categories with keywords, ordered by name."""
+    etag = make_etag("categories", category_set_version(db), limit, cursor)
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.CACHE_CONTROL_CATEGORIES)
+    set_cache_headers(response, etag, settings.CACHE_CONTROL_CATEGORIES)
+    
+    # Keywords for the whole page are loaded in one batched SELECT ... IN query
+    categories, next_cursor = keyset_paginate(
+        db.query(BenefitCategory).options(selectinload(BenefitCategory.keywords)),
+        [BenefitCategory.name, BenefitCategory.id],
+        cursor,
+        limit
+    )
+    return {"items": categories, "next_cursor": next_cursor}
 
 
 @router.post("/categories", response_model=CategoryResponse)
@@ -62,6 +97,29 @@ async def update_category(
     return category
 
 
+@router.post("/categories/{category_id}/simulate-limits", response_model=LimitSimulation)
+async def simulate_category_limits(
+    category_id: UUID,
+    proposal: LimitProposal,
+    year: Optional[int] = Query(None, ge=2000, le=9999, description="Year to replay (defaults to current year)"),
+    db: Session = Depends(get_read_db)
+):
+    """Replay a year of requests under proposed limits before updating a category."""
+    # Imported on first use: NumPy is only needed for simulations
+    from app.services.limit_simulator import simulate_limits
+    
+    category = db.query(BenefitCategory).filter(BenefitCategory.id == category_id).first()
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    
+    return await simulate_limits(
+        db,
+        category,
+        year or datetime.utcnow().year,
+        **proposal.model_dump(exclude_unset=True)
+    )
+
+
 @router.delete("/categories/{category_id}")
 async def delete_category(category_id: UUID, db: Session = Depends(get_db)):
     """Delete a benefit category."""
@@ -75,7 +133,7 @@ async def delete_category(category_id: UUID, db: Session = Depends(get_db)):
 
 
 @router.get("/categories/{category_id}/keywords", response_model=List[KeywordResponse])
-async def list_keywords(category_id: UUID, db: Session = Depends(get_db)):
+async def list_keywords(category_id: UUID, db: Session = Depends(get_read_db)):
     """Get keywords for a category."""
     category = db.query(BenefitCategory).filter(BenefitCategory.id == category_id).first()
     if not category:
@@ -1,20 +1,35 @@
 """
 Employees API routes.
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_read_db
 from app.models.employee import Employee
 from app.schemas.employee import EmployeeResponse
+from app.schemas.pagination import Page
+from app.services.pagination import keyset_paginate, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from app.middleware.query_profiler import query_budget
 
 router = APIRouter()
 
 
-@router.get("/employees", response_model=List[EmployeeResponse])
-async def list_employees(db: Session = Depends(get_db)):
-    """Get list of all employees."""
-    employees = db.query(Employee).all()
-    return employees
-
+@router.get(
+    "/employees",
+    response_model=Page[EmployeeResponse],
+    dependencies=[Depends(query_budget(1))]
+)
+async def list_employees(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    db: Session = Depends(get_read_db)
+):
+    """Get a page of employees ordered by name."""
+    employees, next_cursor = keyset_paginate(
+        db.query(Employee),
+        [Employee.name, Employee.id],
+        cursor,
+        limit
+    )
+    return {"items": employees, "next_cursor": next_cursor}
@@ -0,0 +1,64 @@
+"""
+Export API routes (payroll).
+"""
+from datetime import datetime
+from functools import partial
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.database import read_session_factory
+from app.models.reimbursement_request import RequestStatus
+from app.services.exports import (
+    EXPORT_FORMATS,
+    MEDIA_TYPES,
+    stream_export,
+    reimbursements_query,
+    balances_query,
+)
+
+router = APIRouter()
+
+FORMAT_PATTERN = f"^({'|'.join(EXPORT_FORMATS)})$"
+
+
+@router.get("/exports/reimbursements")
+async def export_reimbursements(
+    request: Request,
+    format: str = Query("csv", pattern=FORMAT_PATTERN, description="csv or parquet"),
+    submitted_from: Optional[datetime] = Query(None, description="Inclusive lower bound (UTC)"),
+    submitted_to: Optional[datetime] = Query(None, description="Exclusive upper bound (UTC)"),
+    status: Optional[RequestStatus] = Query(None),
+    employee_id: Optional[UUID] = Query(None)
+):
+    """Stream reimbursement requests with employee, category and invoice data."""
+    build_query = partial(
+        reimbursements_query,
+        submitted_from=submitted_from,
+        submitted_to=submitted_to,
+        status=status,
+        employee_id=employee_id
+    )
+    return _export_response(request, build_query, format, "reimbursements")
+
+
+@router.get("/exports/balances")
+async def export_balances(
+    request: Request,
+    format: str = Query("csv", pattern=FORMAT_PATTERN, description="csv or parquet"),
+    year: Optional[int] = Query(None, ge=2000, le=9999),
+    month: Optional[int] = Query(None, ge=1, le=12)
+):
+    """Stream monthly balance usage per employee and category."""
+    return _export_response(request, partial(balances_query, year=year, month=month), format, "balances")
+
+
+def _export_response(request: Request, build_query, export_format: str, name: str) -> StreamingResponse:
+    # The stream opens its own session: it outlives the request's dependencies
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+    return StreamingResponse(
+        stream_export(read_session_factory(request), build_query, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
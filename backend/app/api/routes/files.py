@@ -0,0 +1,26 @@
+"""
+Stored invoice files API routes (local storage backend).
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.services.storage import EXTENSIONS, LocalStorage, get_storage
+
+router = APIRouter()
+
+CONTENT_TYPES = {extension: content_type for content_type, extension in EXTENSIONS.items()}
+
+
+@router.get("/files/{key:path}")
+async def get_file(key: str):
+    """Serve an invoice file stored by the local backend."""
+    storage = get_storage()
+    path = storage.path(key) if isinstance(storage, LocalStorage) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    # Content-addressed: the bytes behind a key never change
+    return FileResponse(
+        path,
+        media_type=CONTENT_TYPES.get(path.suffix.lstrip("."), "application/octet-stream"),
+        headers={"Cache-Control": "private, max-age=31536000, immutable"}
+    )
@@ -0,0 +1,48 @@
+"""
+Bulk import API routes.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Path, Query, UploadFile
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.schemas.imports import ImportReport
+from app.services.bulk_import import IMPORT_ENTITIES, IMPORT_FORMATS, import_records
+
+router = APIRouter()
+
+
+@router.post("/imports/{entity}", response_model=ImportReport)
+def bulk_import(
+    entity: str = Path(..., pattern=f"^({'|'.join(IMPORT_ENTITIES)})$", description="employees, categories or keywords"),
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(
+        None,
+        pattern=f"^({'|'.join(IMPORT_FORMATS)})$",
+        description="csv or jsonl; detected from the file name when omitted"
+    ),
+    db: Session = Depends(get_db)
+):
+    """
+    Insert or update employees, categories or keywords from a CSV/JSONL file.
+    
+    Columns: employees `employee_id,name`; categories `name,max_transaction_amount,
+    annual_limit,monthly_limit`; keywords `category,keyword` (category name).
+    """
+    # A plain (sync) handler: FastAPI runs it in the threadpool, so a long COPY
+    # does not block the event loop
+    import_format = format or _detect_format(file.filename)
+    try:
+        return import_records(db, entity, file.file, import_format)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _detect_format(filename: Optional[str]) -> str:
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension == "csv":
+        return "csv"
+    raise HTTPException(status_code=400, detail="Cannot detect the file format; pass format=csv or format=jsonl")
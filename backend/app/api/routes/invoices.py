@@ -0,0 +1,48 @@
+"""
+Invoices API routes.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, cast
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.orm import Session
+
+from app.database import get_read_db
+from app.models.invoice import Invoice
+from app.schemas.invoice import InvoiceSearchResult
+from app.schemas.pagination import Page
+from app.services.pagination import keyset_paginate, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from app.middleware.query_profiler import query_budget
+
+router = APIRouter()
+
+
+@router.get(
+    "/invoices/search",
+    response_model=Page[InvoiceSearchResult],
+    dependencies=[Depends(query_budget(1))]
+)
+async def search_invoices(
+    q: str = Query(..., min_length=1, description="Search terms (web search syntax: quotes, OR, -)"),
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    db: Session = Depends(get_read_db)
+):
+    """Search invoices by vendor, invoice number, item descriptions and OCR text."""
+    tsquery = func.websearch_to_tsquery("simple", q)
+    # Cast to double precision so the rank round-trips exactly through the cursor
+    rank = cast(func.ts_rank_cd(Invoice.search_vector, tsquery), DOUBLE_PRECISION).label("rank")
+    
+    query = db.query(
+        Invoice.id,
+        Invoice.request_id,
+        Invoice.vendor_name,
+        Invoice.invoice_number,
+        Invoice.purchase_date,
+        Invoice.total_amount,
+        Invoice.currency,
+        rank
+    ).filter(Invoice.search_vector.op("@@")(tsquery))
+    
+    rows, next_cursor = keyset_paginate(query, [rank, Invoice.id], cursor, limit, descending=True)
+    return {"items": rows, "next_cursor": next_cursor}
@@ -0,0 +1,15 @@
+"""
+Operational metrics API routes.
+"""
+import os
+from fastapi import APIRouter
+
+from app.services.openai_scheduler import scheduler_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics/openai")
+async def get_openai_metrics():
+    """Get OpenAI queue depth, wait times and budget usage of the worker answering."""
+    return {"pid": os.getpid(), "models": scheduler_metrics()}
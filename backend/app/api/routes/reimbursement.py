@@ -1,37 +1,80 @@
 """
 Reimbursement API routes.
 """
+import asyncio
+import hashlib
+import logging
 from decimal import Decimal
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
 
-from app.database import get_db
+from app.database import SessionLocal, get_db, get_read_db
 from app.config import settings
 from app.models.employee import Employee
 from app.models.reimbursement_request import ReimbursementRequest, RequestStatus
 from app.models.invoice import Invoice
-from app.models.employee_benefit_balance import EmployeeBenefitBalance
-from app.models.benefit_category import BenefitCategory
-from app.schemas.request import ReimbursementResponse
-from app.services.cloudinary_service import upload_file_from_bytes
+from app.schemas.request import ReimbursementResponse, ReimbursementSummary, InvoiceData
+from app.responses import FastJSONResponse
+from app.schemas.pagination import Page
+from app.services.pagination import keyset_paginate, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from app.middleware.query_profiler import query_budget
+from app.services.storage import StoredFile, get_storage, sniff_content_type
 from app.services.ocr_service import extract_invoice_data
-from app.services.category_matcher import match_category
-from app.services.validator import validate_reimbursement
+from app.services.category_matcher import load_category_context, match_category
+from app.services.currency_service import get_exchange_rate_to_usd
+from app.services.llm_usage import llm_request
+from app.services.validator import validate_and_debit
+from app.services.reimbursement_reader import load_reimbursement_response
+from app.services.field_selection import FieldSelection, parse_fields, apply_fields
+from app.services.progress_events import publish_progress, stream_progress
+from app.services.request_ids import REQUEST_ID_WINDOW, new_request_id, request_id_filter, request_id_time
+from app.services.idempotency import (
+    claim_idempotency_key,
+    idempotency_key_heartbeat,
+    mark_idempotency_key_completed,
+    store_idempotency_response,
+    release_idempotency_key,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+FIELDS_DESCRIPTION = (
+    "Comma-separated response fields to return, e.g. `id,status,amount,category_name`; "
+    "use `invoice` for the whole invoice or `invoice.<field>` for parts of it. "
+    "Omit for the full response"
+)
+
 
 @router.post("/reimbursement/submit", response_model=ReimbursementResponse)
 async def submit_reimbursement(
     employee_id: UUID = Form(...),
     file: UploadFile = File(...),
+    request_id: Optional[UUID] = Form(
+        None,
+        description=(
+            "Client-generated id (UUIDv7, so lookups by id stay in its month's partition), "
+            "so progress can be followed at /reimbursement/{id}/events while submitting"
+        )
+    ),
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        max_length=255,
+        description="Client-generated key; retries with the same key return the original result"
+    ),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """Submit a reimbursement request with invoice file."""
+    selection = parse_fields(fields, ReimbursementResponse, {"invoice": InvoiceData})
+    
     # Validate file type
     if not file.content_type or file.content_type not in settings.ALLOWED_FILE_TYPES:
         raise HTTPException(status_code=400, detail="File type not allowed. Please upload JPG, PNG, or PDF")
@@ -47,29 +90,105 @@ async def submit_reimbursement(
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
+    if request_id is None:
+        request_id = new_request_id()
+    else:
+        # Lookups bound a v7 id's submission time by its own; see app/services/request_ids.py
+        created_at = request_id_time(request_id)
+        if created_at is not None and abs(datetime.utcnow() - created_at) > REQUEST_ID_WINDOW:
+            raise HTTPException(status_code=422, detail="request_id is a UUIDv7 whose time is not current")
+    
+    if not idempotency_key:
+        response = await _process_submission(db, request_id, employee_id, file_content, fields=selection)
+        return _render(response, selection)
+    
+    # Retries must carry the same invoice; a different file under the same key is a client bug
+    fingerprint = hashlib.sha256(file_content).hexdigest()
+    replayed = await claim_idempotency_key(employee_id, idempotency_key, fingerprint)
+    if replayed is not None:
+        return FastJSONResponse(apply_fields(replayed, selection), headers={"Idempotent-Replayed": "true"})
+    
     try:
-        # Upload file to Cloudinary (pass file_content as bytes)
-        cloudinary_url, cloudinary_public_id = await upload_file_from_bytes(file_content, file.filename or "invoice")
+        async with idempotency_key_heartbeat(employee_id, idempotency_key):
+            response = await _process_submission(db, request_id, employee_id, file_content, idempotency_key)
+    except BaseException:
+        # Nothing was committed for this key, so a retry may run the request again
+        release_idempotency_key(employee_id, idempotency_key)
+        raise
+    
+    # The stored response is always complete; each retry applies its own field selection
+    body = response.model_dump(mode="json")
+    store_idempotency_response(db, employee_id, idempotency_key, body)
+    return FastJSONResponse(apply_fields(body, selection))
+
+
+def _render(response: ReimbursementResponse, selection: Optional[FieldSelection]) -> FastJSONResponse:
+    """Serialize a response, reduced to the selected fields if any."""
+    if selection is None:
+        return FastJSONResponse(response)
+    return FastJSONResponse(response.model_dump(mode="json", include=selection))
+
+
+async def _process_submission(
+    db: Session,
+    request_id: UUID,
+    employee_id: UUID,
+    file_content: bytes,
+    idempotency_key: Optional[str] = None,
+    fields: Optional[FieldSelection] = None
+) -> ReimbursementResponse:
+    """
+    Store, OCR, match, validate and commit a submission; returns its response.
+    
+    Independent stages run concurrently, so the latency is that of the critical
+    path (OCR, then matching):
+    
+        store file ──┐                       (url mode: OCR waits for the stored URL)
+        OCR ─────────┼──> match category ──┐
+        categories ──┘    FX rate prefetch ┴──> validate, debit, commit
+    
+    If a stage fails, the stages running alongside it are cancelled.
+    """
+    # The row is only inserted after storage and OCR, and the primary key
+    # (id, submission_timestamp) would not reject a second one anyway, so
+    # submissions of the same id are serialized until commit or rollback:
+    # the later one waits here and then sees the committed row
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:id))"), {"id": str(request_id)})
+    if db.query(ReimbursementRequest.id).filter(
+        *request_id_filter(ReimbursementRequest.id, ReimbursementRequest.submission_timestamp, request_id)
+    ).first():
+        raise HTTPException(status_code=409, detail="Reimbursement request id already exists")
+    
+    try:
+        # Category snapshot for matching, read while the file is stored and OCR runs
+        loading_categories = asyncio.to_thread(_load_categories)
+        if settings.OCR_IMAGE_MODE == "inline":
+            # OCR reads the raw bytes, so it does not wait for the upload
+            stored, invoice_data, category_context = await _concurrently(
+                _store_invoice(request_id, file_content),
+                _extract_invoice(request_id, None, file_content),
+                loading_categories
+            )
+        else:
+            # OCR fetches the stored file by URL
+            async def store_and_extract():
+                stored = await _store_invoice(request_id, file_content)
+                return stored, await _extract_invoice(request_id, stored.url, file_content)
+            (stored, invoice_data), category_context = await _concurrently(store_and_extract(), loading_categories)
         
         # Create reimbursement request
         request = ReimbursementRequest(
+            id=request_id,
             employee_id=employee_id,
             status=RequestStatus.PROCESSING,
-            amount=Decimal("0.00"),  # Will be updated after OCR
-            currency="USD",  # Will be updated after OCR
-            cloudinary_url=cloudinary_url,
-            cloudinary_public_id=cloudinary_public_id
+            amount=Decimal(str(invoice_data.get("total_amount", 0))),
+            currency=invoice_data.get("currency", "USD"),
+            cloudinary_url=stored.url,
+            cloudinary_public_id=stored.key
         )
         db.add(request)
         db.flush()
         
-        # Extract invoice data using OCR
-        invoice_data = await extract_invoice_data(cloudinary_url)
-        
-        # Update request with extracted amount and currency
-        request.amount = Decimal(str(invoice_data.get("total_amount", 0)))
-        request.currency = invoice_data.get("currency", "USD")
-        
         # Save invoice data
         purchase_date = None
         if invoice_data.get("purchase_date"):
@@ -81,6 +200,7 @@ async def submit_reimbursement(
         
         invoice = Invoice(
             request_id=request.id,
+            submitted_at=request.submission_timestamp,
             vendor_name=invoice_data.get("vendor_name"),
             purchase_date=purchase_date,
             items=invoice_data.get("items", []),
@@ -91,11 +211,10 @@ async def submit_reimbursement(
         )
         db.add(invoice)
         
-        # Match category
-        match_result = await match_category(
-            db=db,
-            invoice_text=invoice_data.get("extracted_text", ""),
-            items=invoice_data.get("items", [])
+        # Match category while the exchange rate for validation is fetched
+        match_result, _ = await _concurrently(
+            _match_invoice(request_id, category_context, invoice_data),
+            _prefetch_exchange_rate(request.currency)
         )
         
         category_id = None
@@ -105,46 +224,23 @@ async def submit_reimbursement(
             category_id = UUID(match_result["category_id"])
             request.category_id = category_id
             
-            # Validate reimbursement
-            validation_result = await validate_reimbursement(
+            # Validate against the locked balance and debit it atomically if valid
+            validation_result = await validate_and_debit(
                 db=db,
                 employee_id=employee_id,
                 category_id=category_id,
                 amount=request.amount,
                 currency=request.currency
             )
+            publish_progress(
+                request_id,
+                "validated",
+                valid=validation_result["valid"],
+                reason=validation_result.get("reason")
+            )
             
             if validation_result["valid"]:
                 status = RequestStatus.APPROVED
-                # Update balance
-                now = datetime.utcnow()
-                balance = db.query(EmployeeBenefitBalance).filter(
-                    and_(
-                        EmployeeBenefitBalance.employee_id == employee_id,
-                        EmployeeBenefitBalance.category_id == category_id,
-                        EmployeeBenefitBalance.year == now.year,
-                        EmployeeBenefitBalance.month == now.month
-                    )
-                ).first()
-                
-                if not balance:
-                    balance = EmployeeBenefitBalance(
-                        employee_id=employee_id,
-                        category_id=category_id,
-                        year=now.year,
-                        month=now.month,
-                        annual_used=Decimal("0.00"),
-                        monthly_used=Decimal("0.00")
-                    )
-                    db.add(balance)
-                
-                # Convert amount to USD before updating balance (all balances stored in USD)
-                from app.services.currency_service import convert_to_usd
-                amount_usd = await convert_to_usd(request.amount, request.currency)
-                
-                # Only update monthly_used - annual limit is checked by summing all months
-                # Store in USD for consistent comparison
-                balance.monthly_used += amount_usd
             else:
                 status = RequestStatus.REJECTED
                 request.rejection_reason = validation_result["reason"]
@@ -156,73 +252,28 @@ async def submit_reimbursement(
                 request.category_id = category_id
         
         request.status = status
+        if idempotency_key:
+            # Same transaction as the request, so a committed submission always owns its key
+            mark_idempotency_key_completed(db, employee_id, idempotency_key, request.id)
         db.commit()
-        db.refresh(request)
-        
-        # Build response
-        remaining_balance = None
-        if request.category_id and status == RequestStatus.APPROVED:
-            now = datetime.utcnow()
-            balance = db.query(EmployeeBenefitBalance).filter(
-                and_(
-                    EmployeeBenefitBalance.employee_id == employee_id,
-                    EmployeeBenefitBalance.category_id == request.category_id,
-                    EmployeeBenefitBalance.year == now.year,
-                    EmployeeBenefitBalance.month == now.month
-                )
-            ).first()
-            if balance:
-                category = db.query(BenefitCategory).filter(
-                    BenefitCategory.id == request.category_id
-                ).first()
-                if category:
-                    # Calculate annual_used by summing all months in the year
-                    annual_balances = db.query(EmployeeBenefitBalance).filter(
-                        and_(
-                            EmployeeBenefitBalance.employee_id == employee_id,
-                            EmployeeBenefitBalance.category_id == request.category_id,
-                            EmployeeBenefitBalance.year == now.year
-                        )
-                    ).all()
-                    total_annual_used = sum(b.monthly_used for b in annual_balances)
-                    
-                    remaining_balance = min(
-                        category.monthly_limit - balance.monthly_used,
-                        category.annual_limit - total_annual_used
-                    )
+        publish_progress(
+            request_id,
+            "completed",
+            status=status.value,
+            rejection_reason=request.rejection_reason
+        )
         
-        return {
-            "id": request.id,
-            "employee_id": request.employee_id,
-            "employee_name": employee.name,
-            "employee_employee_id": employee.employee_id,
-            "category_id": request.category_id,
-            "category_name": request.category.name if request.category else None,
-            "status": request.status,
-            "amount": request.amount,
-            "currency": request.currency,
-            "cloudinary_url": request.cloudinary_url,
-            "submission_timestamp": request.submission_timestamp,
-            "rejection_reason": request.rejection_reason,
-            "invoice": {
-                "vendor_name": invoice.vendor_name,
-                "purchase_date": invoice.purchase_date,
-                "items": invoice.items,
-                "total_amount": invoice.total_amount,
-                "currency": invoice.currency,
-                "invoice_number": invoice.invoice_number,
-                "extracted_text": invoice.extracted_text
-            } if invoice else None,
-            "remaining_balance": remaining_balance,  # Always in USD
-            "remaining_balance_currency": "USD"  # Explicitly indicate USD
-        }
+        # Build response from a single joined read
+        return load_reimbursement_response(db, request.id, fields)
         
-    except HTTPException:
+    except HTTPException as e:
         # Re-raise HTTP exceptions (they already have proper status codes)
         db.rollback()
+        publish_progress(request_id, "failed", detail=e.detail)
         raise
     except Exception as e:
         db.rollback()
+        publish_progress(request_id, "failed", detail=f"Failed to process reimbursement: {str(e)}")
         # Log the full error for debugging
         import traceback
         error_details = traceback.format_exc()
@@ -234,66 +285,159 @@ async def submit_reimbursement(
         )
 
 
-@router.get("/reimbursement/{request_id}", response_model=ReimbursementResponse)
-async def get_reimbursement(request_id: UUID, db: Session = Depends(get_db)):
-    """Get reimbursement request details."""
-    request = db.query(ReimbursementRequest).filter(ReimbursementRequest.id == request_id).first()
-    if not request:
-        raise HTTPException(status_code=404, detail="Reimbursement request not found")
+async def _concurrently(*stages):
+    """
+    Run pipeline stages concurrently and return their results in order.
     
-    invoice = db.query(Invoice).filter(Invoice.request_id == request_id).first()
+    The first stage to fail cancels the others, and its exception is raised as
+    is rather than in an ExceptionGroup, so HTTPExceptions keep their status.
+    """
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(stage) for stage in stages]
+    except BaseExceptionGroup as failed:
+        raise failed.exceptions[0]
+    return [task.result() for task in tasks]
+
+
+def _load_categories() -> List[Dict[str, Any]]:
+    """Category snapshot for matching, read on its own session so it can run in a worker thread."""
+    with SessionLocal() as session:
+        return load_category_context(session)
+
+
+async def _store_invoice(request_id: UUID, file_content: bytes) -> StoredFile:
+    stored = await get_storage().save(file_content)
+    publish_progress(request_id, "uploaded", file_url=stored.url)
+    return stored
+
+
+async def _extract_invoice(request_id: UUID, file_url: Optional[str], file_content: bytes) -> Dict[str, Any]:
+    # LLM calls are accounted to the request
+    with llm_request(request_id):
+        invoice_data = await extract_invoice_data(file_url, file_content, sniff_content_type(file_content))
+    publish_progress(
+        request_id,
+        "ocr_completed",
+        vendor_name=invoice_data.get("vendor_name"),
+        purchase_date=invoice_data.get("purchase_date"),
+        total_amount=str(Decimal(str(invoice_data.get("total_amount", 0)))),
+        currency=invoice_data.get("currency", "USD")
+    )
+    return invoice_data
+
+
+async def _match_invoice(
+    request_id: UUID,
+    category_context: List[Dict[str, Any]],
+    invoice_data: Dict[str, Any]
+) -> Dict[str, Any]:
+    with llm_request(request_id):
+        match_result = await match_category(
+            category_context=category_context,
+            invoice_text=invoice_data.get("extracted_text", ""),
+            items=invoice_data.get("items", [])
+        )
+    publish_progress(
+        request_id,
+        "category_matched",
+        category_id=match_result.get("category_id"),
+        matched_keywords=match_result.get("matched_keywords", []),
+        confidence=match_result.get("confidence", 0)
+    )
+    return match_result
+
+
+async def _prefetch_exchange_rate(currency: str) -> None:
+    """Warm the rate cache for validation; failures are left for validation to report."""
+    try:
+        await get_exchange_rate_to_usd(currency)
+    except Exception as e:
+        logger.debug("Exchange rate prefetch for %s failed: %s", currency, e)
+
+
+@router.get(
+    "/reimbursements",
+    response_model=Page[ReimbursementSummary],
+    dependencies=[Depends(query_budget(1))]
+)
+async def list_reimbursements(
+    employee_id: Optional[UUID] = Query(None),
+    status: Optional[RequestStatus] = Query(None),
+    category_id: Optional[UUID] = Query(None),
+    submitted_from: Optional[datetime] = Query(None, description="Inclusive lower bound (UTC)"),
+    submitted_to: Optional[datetime] = Query(None, description="Exclusive upper bound (UTC)"),
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated summary fields to return"),
+    db: Session = Depends(get_read_db)
+):
+    """List reimbursement requests, newest first, with optional filters."""
+    selection = parse_fields(fields, ReimbursementSummary)
     
-    # Calculate remaining balance if approved
-    remaining_balance = None
-    if request.status == RequestStatus.APPROVED and request.category_id:
-        now = datetime.utcnow()
-        balance = db.query(EmployeeBenefitBalance).filter(
-            and_(
-                EmployeeBenefitBalance.employee_id == request.employee_id,
-                EmployeeBenefitBalance.category_id == request.category_id,
-                EmployeeBenefitBalance.year == now.year,
-                EmployeeBenefitBalance.month == now.month
-            )
-        ).first()
-        if balance and request.category:
-            # Calculate annual_used by summing all months in the year
-            annual_balances = db.query(EmployeeBenefitBalance).filter(
-                and_(
-                    EmployeeBenefitBalance.employee_id == request.employee_id,
-                    EmployeeBenefitBalance.category_id == request.category_id,
-                    EmployeeBenefitBalance.year == now.year
-                )
-            ).all()
-            total_annual_used = sum(b.monthly_used for b in annual_balances)
-            
-            remaining_balance = min(
-                request.category.monthly_limit - balance.monthly_used,
-                request.category.annual_limit - total_annual_used
-            )
+    # Select only the summary columns so the composite indexes can cover the query;
+    # id and submission_timestamp are always read because they form the cursor
+    query = db.query(*[
+        getattr(ReimbursementRequest, name)
+        for name in ReimbursementSummary.model_fields
+        if selection is None or name in selection or name in ("id", "submission_timestamp")
+    ])
+    if employee_id:
+        query = query.filter(ReimbursementRequest.employee_id == employee_id)
+    if status:
+        query = query.filter(ReimbursementRequest.status == status)
+    if category_id:
+        query = query.filter(ReimbursementRequest.category_id == category_id)
+    if submitted_from:
+        query = query.filter(ReimbursementRequest.submission_timestamp >= submitted_from)
+    if submitted_to:
+        query = query.filter(ReimbursementRequest.submission_timestamp < submitted_to)
     
-    return {
-        "id": request.id,
-        "employee_id": request.employee_id,
-        "employee_name": request.employee.name,
-        "employee_employee_id": request.employee.employee_id,
-        "category_id": request.category_id,
-        "category_name": request.category.name if request.category else None,
-        "status": request.status,
-        "amount": request.amount,
-        "currency": request.currency,
-        "cloudinary_url": request.cloudinary_url,
-        "submission_timestamp": request.submission_timestamp,
-        "rejection_reason": request.rejection_reason,
-        "invoice": {
-            "vendor_name": invoice.vendor_name,
-            "purchase_date": invoice.purchase_date,
-            "items": invoice.items,
-            "total_amount": invoice.total_amount,
-            "currency": invoice.currency,
-            "invoice_number": invoice.invoice_number,
-            "extracted_text": invoice.extracted_text
-        } if invoice else None,
-        "remaining_balance": remaining_balance,  # Always in USD
-        "remaining_balance_currency": "USD"  # Explicitly indicate USD
-    }
+    rows, next_cursor = keyset_paginate(
+        query,
+        [ReimbursementRequest.submission_timestamp, ReimbursementRequest.id],
+        cursor,
+        limit,
+        descending=True
+    )
+    if selection is not None:
+        items = [apply_fields(row._asdict(), selection) for row in rows]
+        return FastJSONResponse({"items": items, "next_cursor": next_cursor})
+    return {"items": rows, "next_cursor": next_cursor}
+
 
+@router.get("/reimbursement/{request_id}/events")
+async def reimbursement_events(request_id: UUID, request: Request):
+    """
+    Stream processing progress of a reimbursement request as Server-Sent Events.
+    
+    Open before submitting (with the same client-generated `request_id`) to
+    receive every stage; connecting later still yields the final status.
+    """
+    return StreamingResponse(
+        stream_progress(request_id, request),
+        media_type="text/event-stream",
+        # Disable proxy buffering so events are delivered as they happen
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get(
+    "/reimbursement/{request_id}",
+    response_model=ReimbursementResponse,
+    # One joined query; a second only when the request is not live (archive lookup)
+    dependencies=[Depends(query_budget(2))]
+)
+async def get_reimbursement(
+    request_id: UUID,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
+    """Get reimbursement request details."""
+    selection = parse_fields(fields, ReimbursementResponse, {"invoice": InvoiceData})
+    response = load_reimbursement_response(db, request_id, selection)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Reimbursement request not found")
+    
+    # Already validated; returning a response skips FastAPI's second pass
+    return _render(response, selection)
@@ -0,0 +1,57 @@
+"""
+Re-match job API routes.
+"""
+import logging
+from uuid import UUID
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.rematch_job import RematchJob, RematchJobStatus
+from app.schemas.rematch import RematchJobResponse
+from app.services.rematch import create_rematch_job, rematch_running, run_rematch_job
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/rematch-jobs", response_model=RematchJobResponse, status_code=202)
+async def start_rematch_job(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Re-match all requests pending review (e.g. after adding keywords) in the background."""
+    if rematch_running():
+        raise HTTPException(status_code=409, detail="A re-match job is already running")
+    job = create_rematch_job(db)
+    background_tasks.add_task(_run_in_background, job.id)
+    return job
+
+
+@router.get("/rematch-jobs/{job_id}", response_model=RematchJobResponse)
+async def get_rematch_job(job_id: UUID, db: Session = Depends(get_db)):
+    """Get a re-match job's progress."""
+    job = db.get(RematchJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Re-match job not found")
+    return job
+
+
+@router.post("/rematch-jobs/{job_id}/resume", response_model=RematchJobResponse, status_code=202)
+async def resume_rematch_job(job_id: UUID, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Continue a failed or interrupted re-match job from its last committed batch."""
+    job = db.get(RematchJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Re-match job not found")
+    if job.status == RematchJobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail="Re-match job already completed")
+    if rematch_running():
+        raise HTTPException(status_code=409, detail="A re-match job is already running")
+    background_tasks.add_task(_run_in_background, job.id)
+    return job
+
+
+async def _run_in_background(job_id: UUID) -> None:
+    try:
+        await run_rematch_job(job_id)
+    except ValueError as e:
+        # Lost a race with another start/resume; the job can be resumed later
+        logger.warning("Re-match job %s not started: %s", job_id, e)
@@ -1,12 +1,19 @@
 """
 Database connection and session management.
 """
+import logging
+import time
+from typing import Optional
+
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
@@ -17,6 +24,34 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional read replica for read-only endpoints (see get_read_db)
+replica_engine = create_engine(
+    settings.REPLICA_DATABASE_URL,
+    pool_pre_ping=True,
+    echo=settings.ENVIRONMENT == "development"
+) if settings.REPLICA_DATABASE_URL else None
+
+ReplicaSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=replica_engine
+) if replica_engine is not None else None
+
+# Set after successful writes; while fresh, the client's reads stay on the primary
+READ_AFTER_WRITE_COOKIE = "last_write_at"
+
+# Seconds the replica is behind the primary. Zero when it has replayed all received WAL
+# (an idle primary produces no new transactions, so replay timestamps alone would grow)
+# and when the server is not in recovery at all (e.g. a second standalone instance in tests).
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+# Last measured lag (None if the replica was unreachable) and when it was measured
+_replica_lag = {"value": None, "checked_at": float("-inf")}
+
 # Base class for models
 Base = declarative_base()
 
@@ -32,3 +67,78 @@ def get_db():
     finally:
         db.close()
 
+
+
+def replica_lag() -> Optional[float]:
+    """
+    Return the replica's replication lag in seconds, or None if it is unreachable.
+
+    The measurement is cached for REPLICA_LAG_CHECK_INTERVAL so the check costs
+    at most one query per interval per worker. A raw DBAPI connection is used
+    so the probe is not attributed to the request by the query profiler.
+    """
+    now = time.monotonic()
+    if now - _replica_lag["checked_at"] < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return _replica_lag["value"]
+    
+    lag = None
+    try:
+        connection = replica_engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(REPLICA_LAG_SQL)
+            lag = float(cursor.fetchone()[0])
+            cursor.close()
+        finally:
+            connection.close()
+    except Exception as e:
+        logger.warning("Replica lag check failed, reading from primary: %s", e)
+    
+    _replica_lag["value"] = lag
+    _replica_lag["checked_at"] = now
+    return lag
+
+
+def should_read_from_replica(request: Request) -> bool:
+    """Decide whether a read-only request can be served by the replica."""
+    if replica_engine is None:
+        return False
+    
+    # Read-your-writes: a client that just wrote must see its own changes
+    last_write = request.cookies.get(READ_AFTER_WRITE_COOKIE)
+    if last_write:
+        try:
+            if time.time() - float(last_write) < settings.READ_AFTER_WRITE_WINDOW_SECONDS:
+                return False
+        except ValueError:
+            pass
+    
+    lag = replica_lag()
+    return lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+
+def read_session_factory(request: Request) -> sessionmaker:
+    """
+    Choose the session factory for a read-only request (replica or primary).
+    
+    For handlers that open their own session, e.g. streaming responses that
+    outlive the request's dependencies.
+    """
+    use_replica = should_read_from_replica(request)
+    # Reported in the X-Read-Source response header by ReadAfterWriteMiddleware
+    request.state.read_source = "replica" if use_replica else "primary"
+    return ReplicaSessionLocal if use_replica else SessionLocal
+
+
+def get_read_db(request: Request):
+    """
+    Dependency for read-only routes.
+    Yields a replica session when a replica is configured, fresh enough and the
+    client has not written recently; otherwise a primary session. Never use it
+    for routes that write.
+    """
+    db = read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,29 +1,61 @@
 """
 FastAPI application entry point.
 """
+import asyncio
 import os
-import mimetypes
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, Response
-from starlette.responses import Response as StarletteResponse
+from fastapi.responses import Response
 
 from app.config import settings
-from app.database import engine, Base
-from app.api.routes import reimbursement, employees, categories, balances
+from app.database import engine, replica_engine, Base
+from app.api.routes import reimbursement, employees, categories, balances, invoices, exports, imports, analytics, rematch, metrics, files
+from app.middleware.query_profiler import enable_query_profiling
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.read_after_write import ReadAfterWriteMiddleware
+from app.static_assets import StaticAsset, StaticAssetIndex
+from app.responses import FastJSONResponse
+from app.services.progress_events import progress_listener
+from app.services.partitions import ensure_partitions, maintain_partitions
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown hooks."""
+    # Create database tables (only in development - use migrations in production)
+    # Done at startup rather than import so importing the app never touches the database
+    if settings.ENVIRONMENT == "development":
+        Base.metadata.create_all(bind=engine)
+    # Make sure the coming months have partitions (cheap no-op when they exist)
+    try:
+        with engine.begin() as conn:
+            ensure_partitions(conn, months_ahead=settings.PARTITION_MONTHS_AHEAD)
+    except Exception as e:
+        logger.warning("Could not ensure partitions at startup: %s", e)
+    # ...and keep them created ahead while the worker runs
+    partition_maintenance = asyncio.create_task(maintain_partitions(
+        settings.PARTITION_MONTHS_AHEAD, settings.PARTITION_CHECK_INTERVAL_SECONDS
+    ))
+    yield
+    partition_maintenance.cancel()
+    # Release this worker's LISTEN connection for progress streams
+    progress_listener.close()
 
-# Create database tables (only in development - use migrations in production)
-# In production, tables should be created via Alembic migrations
-if settings.ENVIRONMENT == "development":
-    Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Benefit Reimbursement Automation API",
     description="API for automated benefit reimbursement processing",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -33,54 +65,49 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Query-Count", "X-Query-Time-Ms", "X-Query-N-Plus-One", "X-Read-Source"],
 )
 
-# IMPORTANT: Mount static files BEFORE API routes to ensure proper MIME types
-# StaticFiles mount has priority over regular routes
+# Compress large API responses (e.g. invoices with long extracted_text)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+# Keep clients that just wrote on the primary while read-only routes use the replica
+if replica_engine is not None:
+    app.add_middleware(ReadAfterWriteMiddleware, window_seconds=settings.READ_AFTER_WRITE_WINDOW_SECONDS)
+
+# Opt-in SQL query profiling (query counts, DB time and N+1 detection per request)
+if settings.QUERY_PROFILER_ENABLED:
+    enable_query_profiling(app, *[e for e in (engine, replica_engine) if e is not None])
+
+# Serve built frontend assets from an in-memory index built at startup
+# (MIME types, ETags and gzip/brotli variants are computed once, not per request)
 if settings.ENVIRONMENT == "production":
     static_dir = Path(os.path.dirname(__file__)).parent / "static"
     assets_dir = static_dir / "assets"
     
     if static_dir.exists() and assets_dir.exists():
-        # Custom handler for assets with explicit MIME types
+        asset_index = StaticAssetIndex(assets_dir)
+        
         @app.get("/assets/{file_path:path}")
-        async def serve_asset(file_path: str):
-            """Serve static assets with proper MIME types."""
-            file_full_path = assets_dir / file_path
-            
-            # Security: prevent directory traversal
-            try:
-                file_full_path.resolve().relative_to(assets_dir.resolve())
-            except ValueError:
-                return Response(content="Not found", status_code=404)
-            
-            if not file_full_path.exists() or not file_full_path.is_file():
+        async def serve_asset(file_path: str, request: Request):
+            """Serve static assets from the in-memory index."""
+            asset = asset_index.get(file_path)
+            if asset is None:
                 return Response(content="Not found", status_code=404)
-            
-            # Determine MIME type
-            mime_type, _ = mimetypes.guess_type(str(file_full_path))
-            if not mime_type:
-                # Fallback for common file types
-                if file_path.endswith('.css'):
-                    mime_type = 'text/css'
-                elif file_path.endswith('.js'):
-                    mime_type = 'application/javascript'
-                elif file_path.endswith('.json'):
-                    mime_type = 'application/json'
-                else:
-                    mime_type = 'application/octet-stream'
-            
-            return FileResponse(
-                str(file_full_path),
-                media_type=mime_type,
-                headers={"Cache-Control": "public, max-age=31536000"}
-            )
+            return asset.response(request)
 
 # Include API routes
 app.include_router(reimbursement.router, prefix=settings.API_V1_PREFIX, tags=["reimbursement"])
 app.include_router(employees.router, prefix=settings.API_V1_PREFIX, tags=["employees"])
 app.include_router(categories.router, prefix=settings.API_V1_PREFIX, tags=["categories"])
 app.include_router(balances.router, prefix=settings.API_V1_PREFIX, tags=["balances"])
+app.include_router(invoices.router, prefix=settings.API_V1_PREFIX, tags=["invoices"])
+app.include_router(exports.router, prefix=settings.API_V1_PREFIX, tags=["exports"])
+app.include_router(imports.router, prefix=settings.API_V1_PREFIX, tags=["imports"])
+app.include_router(analytics.router, prefix=settings.API_V1_PREFIX, tags=["analytics"])
+app.include_router(rematch.router, prefix=settings.API_V1_PREFIX, tags=["rematch"])
+app.include_router(metrics.router, prefix=settings.API_V1_PREFIX, tags=["metrics"])
+app.include_router(files.router, prefix=settings.API_V1_PREFIX, tags=["files"])
 
 
 @app.get("/health")
@@ -90,24 +117,16 @@ async def health_check():
 
 
 # Serve index.html for SPA routing (must be registered LAST to catch all non-API routes)
-# This route will NOT intercept /assets/* requests because mount has higher priority
 if settings.ENVIRONMENT == "production":
-    static_dir = os.path.join(os.path.dirname(__file__), "..", "static")
+    index_path = Path(os.path.dirname(__file__)).parent / "static" / "index.html"
     
-    if os.path.exists(static_dir):
+    if index_path.exists():
+        # Cached in memory; no-cache makes browsers revalidate against the ETag
+        index_asset = StaticAsset(index_path, cache_control="no-cache")
+        
         @app.get("/{full_path:path}")
-        async def serve_frontend(full_path: str):
+        async def serve_frontend(full_path: str, request: Request):
             """Serve React app for all non-API routes."""
-            # Additional safety check (though mount should handle /assets already)
             if full_path.startswith("api") or full_path.startswith("assets"):
                 return Response(content="Not found", status_code=404)
-            
-            # Serve index.html for SPA routing
-            index_path = os.path.join(static_dir, "index.html")
-            if os.path.exists(index_path):
-                return FileResponse(
-                    index_path,
-                    media_type="text/html",
-                    headers={"Cache-Control": "no-cache"}
-                )
-            return Response(content="Not found", status_code=404)
+            return index_asset.response(request)
@@ -0,0 +1,157 @@
+"""
+Response compression middleware.
+
+Compresses complete (non-streaming) API responses above a size threshold
+with brotli or gzip, depending on the client's Accept-Encoding. Streaming
+responses and responses that already carry a Content-Encoding (such as
+precompressed static assets) pass through untouched.
+
+A compressed body is a different representation from the identity one, so
+its ETag gets the coding as a suffix (`"v1"` -> `"v1-br"`); otherwise caches
+could serve one in place of the other under a strong validator.
+`etag_matches` accepts either form.
+"""
+import gzip
+from typing import Iterable, Optional
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+
+# Codings the middleware produces, in order of preference
+ENCODINGS = ("br", "gzip")
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def choose_encoding(accept_encoding: Optional[str], available: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """
+    Pick the best content coding the client accepts.
+
+    Args:
+        accept_encoding: Value of the Accept-Encoding request header
+        available: Codings the server can produce, in order of preference
+
+    Returns:
+        The chosen coding, or None to send the identity representation
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in available:
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def is_compressible(content_type: str) -> bool:
+    """Check whether a media type benefits from compression."""
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of the representation compressed with `encoding` (a W/ prefix is kept)."""
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def strip_encoding_suffix(etag: str) -> str:
+    """ETag of the identity representation, given that of any encoded one."""
+    for encoding in ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    """Compress `body` with the given content coding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing large, complete API responses."""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                if message["status"] == 304 and "etag" in headers:
+                    # Revalidated against the encoded tag: answer with that tag, as the 200 had
+                    etag = encoded_etag(headers["etag"], encoding)
+                    if etag in request_headers.get("if-none-match", ""):
+                        start_headers = MutableHeaders(raw=list(message.get("headers", [])))
+                        start_headers["ETag"] = etag
+                        message = {**message, "headers": start_headers.raw}
+                if "content-encoding" in headers or not is_compressible(headers.get("content-type", "")):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the start message until we know whether the body is complete
+                    start_message = message
+                return
+
+            if message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                if message.get("more_body", False) or len(body) < self.minimum_size:
+                    # Streaming or small responses are sent as-is
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(raw=list(start_message.get("headers", [])))
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(compressed))
+                if "etag" in headers:
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                headers.add_vary_header("Accept-Encoding")
+                await send({**start_message, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": compressed})
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,173 @@
+"""
+SQL query profiler middleware.
+
+Counts queries and database time per HTTP request using SQLAlchemy cursor
+events, flags statements repeated often enough to look like N+1 access,
+and reports the totals in logs and debug response headers.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PARAM_RE = re.compile(r"%\([^)]*\)s|\?|\$\d+")
+_NUMBER_RE = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_LIST_RE = re.compile(r"\(\s*\?(\s*,\s*\?)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a route issues more queries than its budget."""
+
+
+class QueryStats:
+    """Query statistics collected for a single HTTP request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+        self.budget: Optional[int] = None
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        """Return statement shapes executed at least `threshold` times."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalize a SQL statement so executions differing only in parameters match.
+
+    Bind placeholders and literals are replaced with `?` and expanded
+    IN-lists are collapsed, so `WHERE id IN (?, ?, ?)` and
+    `WHERE id IN (?, ?)` share one shape.
+    """
+    shape = _STRING_RE.sub("?", statement)
+    shape = _PARAM_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _PARAM_LIST_RE.sub("(?...)", shape)
+    return _WHITESPACE_RE.sub(" ", shape).strip()
+
+
+def install_query_profiler(engine: Engine) -> None:
+    """Attach cursor event listeners that feed the current request's stats."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start_time"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+
+def query_budget(max_queries: int):
+    """
+    Dependency factory declaring the maximum number of queries a route may issue.
+
+    Usage:
+        @router.get("/items", dependencies=[Depends(query_budget(3))])
+    """
+    def _declare_budget():
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.budget = max_queries
+
+    return _declare_budget
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Return the stats for the request being handled, if profiling is on."""
+    return _current_stats.get()
+
+
+class QueryProfilerMiddleware:
+    """
+    ASGI middleware that profiles SQL queries per request.
+
+    Adds `X-Query-Count`, `X-Query-Time-Ms` and, when repeated statements
+    are detected, `X-Query-N-Plus-One` headers. In strict mode a route that
+    exceeds its declared query budget fails with QueryBudgetExceeded, which
+    makes the test client raise.
+    """
+
+    def __init__(self, app, n_plus_one_threshold: int = 5, strict: bool = False):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.strict = strict
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        path = scope.get("path", "")
+        method = scope.get("method", "")
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                self._check_budget(method, path, stats)
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(stats.count).encode()))
+                headers.append((b"x-query-time-ms", f"{stats.total_time * 1000:.2f}".encode()))
+                repeated = stats.repeated_shapes(self.n_plus_one_threshold)
+                if repeated:
+                    headers.append((b"x-query-n-plus-one", str(len(repeated)).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            self._report(method, path, stats)
+
+    def _check_budget(self, method: str, path: str, stats: QueryStats) -> None:
+        if stats.budget is None or stats.count <= stats.budget:
+            return
+        message = f"{method} {path} issued {stats.count} queries, budget is {stats.budget}"
+        if self.strict:
+            raise QueryBudgetExceeded(message)
+        logger.warning("Query budget exceeded: %s", message)
+
+    def _report(self, method: str, path: str, stats: QueryStats) -> None:
+        logger.info(
+            "%s %s: %d queries in %.2f ms",
+            method, path, stats.count, stats.total_time * 1000
+        )
+        for shape, n in stats.repeated_shapes(self.n_plus_one_threshold):
+            logger.warning("Possible N+1 on %s %s: %d x %s", method, path, n, shape)
+
+
+def enable_query_profiling(app, *engines: Engine) -> None:
+    """Install the profiler on `engines` and wrap `app` with the middleware."""
+    for engine in engines:
+        install_query_profiler(engine)
+    app.add_middleware(
+        QueryProfilerMiddleware,
+        n_plus_one_threshold=settings.QUERY_PROFILER_N_PLUS_ONE_THRESHOLD,
+        strict=settings.QUERY_PROFILER_STRICT,
+    )
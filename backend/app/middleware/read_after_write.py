@@ -0,0 +1,47 @@
+"""
+Read-after-write tracking for replica routing.
+
+Successful writes (POST/PUT/PATCH/DELETE) set a short-lived cookie with the
+write time; `get_read_db` keeps that client's reads on the primary while it
+is fresh, so users always see their own changes even if the replica lags.
+The middleware also reports which database served a read in `X-Read-Source`.
+"""
+import time
+
+from app.database import READ_AFTER_WRITE_COOKIE
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadAfterWriteMiddleware:
+    """ASGI middleware marking clients that recently wrote."""
+
+    def __init__(self, app, window_seconds: int = 10):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        is_write = scope.get("method") not in SAFE_METHODS
+        # Shared with request.state, where get_read_db records the source it chose
+        state = scope.setdefault("state", {})
+
+        async def send_with_marker(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if is_write and message["status"] < 400:
+                    cookie = (
+                        f"{READ_AFTER_WRITE_COOKIE}={time.time():.3f}; Max-Age={self.window_seconds}; "
+                        "Path=/; HttpOnly; SameSite=Lax"
+                    )
+                    headers.append((b"set-cookie", cookie.encode()))
+                read_source = state.get("read_source")
+                if read_source:
+                    headers.append((b"x-read-source", read_source.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_marker)
@@ -7,6 +7,10 @@ from app.models.category_keyword import CategoryKeyword
 from app.models.employee_benefit_balance import EmployeeBenefitBalance
 from app.models.reimbursement_request import ReimbursementRequest
 from app.models.invoice import Invoice
+from app.models.idempotency_key import IdempotencyKey
+from app.models.archive import ArchivedReimbursementRequest, ArchivedInvoice
+from app.models.rematch_job import RematchJob
+from app.models.llm_call import LLMCall
 
 __all__ = [
     "Employee",
@@ -15,5 +19,10 @@ __all__ = [
     "EmployeeBenefitBalance",
     "ReimbursementRequest",
     "Invoice",
+    "IdempotencyKey",
+    "ArchivedReimbursementRequest",
+    "ArchivedInvoice",
+    "RematchJob",
+    "LLMCall",
 ]
 
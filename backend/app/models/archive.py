@@ -0,0 +1,84 @@
+"""
+Archive models for reimbursement requests and invoices past retention.
+
+Whole monthly partitions are moved here by `manage.py archive-partitions`.
+The archive tables are not partitioned and carry no search vector. Archived
+OCR text is zlib-compressed by the application: Postgres only compresses
+values in rows over ~2 kB, which most invoice texts are not.
+"""
+import zlib
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, String, Date, Numeric, DateTime, ForeignKey, Text, Index, LargeBinary, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import deferred
+
+from app.database import Base
+from app.models.reimbursement_request import RequestStatus
+
+
+def compress_text(value: Optional[str]) -> Optional[bytes]:
+    """Compress text for archival storage."""
+    return zlib.compress(value.encode("utf-8"), 9) if value is not None else None
+
+
+def decompress_text(value: Optional[bytes]) -> Optional[str]:
+    """Restore text compressed with compress_text()."""
+    return zlib.decompress(value).decode("utf-8") if value is not None else None
+
+
+class ArchivedReimbursementRequest(Base):
+    """Reimbursement request moved out of the live partitions."""
+    
+    __tablename__ = "reimbursement_requests_archive"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    category_id = Column(UUID(as_uuid=True), ForeignKey("benefit_categories.id", ondelete="SET NULL"), nullable=True)
+    status = Column(SQLEnum(RequestStatus), nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
+    currency = Column(String(10), nullable=False)
+    cloudinary_url = Column(String(500), nullable=False)
+    cloudinary_public_id = Column(String(255), nullable=False)
+    submission_timestamp = Column(DateTime, nullable=False)
+    rejection_reason = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_reimbursement_requests_archive_employee_submitted", "employee_id", "submission_timestamp"),
+    )
+    
+    def __repr__(self):
+        return f"<ArchivedReimbursementRequest(id={self.id}, employee_id={self.employee_id}, status={self.status})>"
+
+
+class ArchivedInvoice(Base):
+    """Invoice moved out of the live partitions together with its request."""
+    
+    __tablename__ = "invoices_archive"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    request_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("reimbursement_requests_archive.id", ondelete="CASCADE"),
+        unique=True,
+        nullable=False
+    )
+    submitted_at = Column(DateTime, nullable=False)
+    vendor_name = Column(String(255), nullable=True)
+    purchase_date = Column(Date, nullable=True)
+    items = deferred(Column(JSONB, nullable=True))
+    total_amount = Column(Numeric(10, 2), nullable=False)
+    currency = Column(String(10), nullable=False)
+    invoice_number = Column(String(100), nullable=True)
+    extracted_text_compressed = deferred(Column(LargeBinary, nullable=True))  # zlib, see compress_text()
+    created_at = Column(DateTime, nullable=False)
+    
+    @property
+    def extracted_text(self) -> Optional[str]:
+        return decompress_text(self.extracted_text_compressed)
+    
+    def __repr__(self):
+        return f"<ArchivedInvoice(id={self.id}, request_id={self.request_id}, vendor_name={self.vendor_name})>"
@@ -3,7 +3,7 @@ Category keyword model.
 """
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -23,6 +23,11 @@ class CategoryKeyword(Base):
     # Relationships
     category = relationship("BenefitCategory", back_populates="keywords")
     
+    __table_args__ = (
+        # Target of ON CONFLICT in bulk keyword imports
+        Index("uq_category_keywords_category_keyword", "category_id", "keyword", unique=True),
+    )
+    
     def __repr__(self):
         return f"<CategoryKeyword(id={self.id}, category_id={self.category_id}, keyword={self.keyword})>"
 
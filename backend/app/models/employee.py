@@ -3,7 +3,7 @@ Employee model.
 """
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -18,6 +18,7 @@ class Employee(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
     employee_id = Column(String(100), unique=True, nullable=False, index=True)
+    department = Column(String(100), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
@@ -25,6 +26,11 @@ class Employee(Base):
     balances = relationship("EmployeeBenefitBalance", back_populates="employee", cascade="all, delete-orphan")
     reimbursement_requests = relationship("ReimbursementRequest", back_populates="employee", cascade="all, delete-orphan")
     
+    # Composite index backing keyset pagination ordered by (name, id)
+    __table_args__ = (
+        Index("ix_employees_name_id", "name", "id"),
+    )
+    
     def __repr__(self):
         return f"<Employee(id={self.id}, name={self.name}, employee_id={self.employee_id})>"
 
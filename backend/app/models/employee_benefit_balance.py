@@ -21,8 +21,11 @@ class EmployeeBenefitBalance(Base):
     category_id = Column(UUID(as_uuid=True), ForeignKey("benefit_categories.id", ondelete="CASCADE"), nullable=False, index=True)
     year = Column(Integer, nullable=False)
     month = Column(Integer, nullable=False)
+    # Year-to-date usage through this month, frozen when the period is closed
+    # (`manage.py close-period`); 0 while the period is open
     annual_used = Column(Numeric(10, 2), default=Decimal("0.00"), nullable=False)
     monthly_used = Column(Numeric(10, 2), default=Decimal("0.00"), nullable=False)
+    closed_at = Column(DateTime, nullable=True)  # Set by period close
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
@@ -0,0 +1,38 @@
+"""
+Idempotency key model.
+"""
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+import enum
+
+from app.database import Base
+
+
+class IdempotencyStatus(str, enum.Enum):
+    """Idempotency key status enumeration."""
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
+
+class IdempotencyKey(Base):
+    """Idempotency key recording the outcome of a reimbursement submission."""
+    
+    __tablename__ = "idempotency_keys"
+    
+    employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    status = Column(SQLEnum(IdempotencyStatus), default=IdempotencyStatus.IN_PROGRESS, nullable=False)
+    request_fingerprint = Column(String(64), nullable=False)  # SHA-256 of the uploaded file
+    request_id = Column(UUID(as_uuid=True), nullable=True)  # Set in the same transaction as the submission
+    response_body = Column(JSONB, nullable=True)  # Final response, replayed to retries
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+    
+    def __repr__(self):
+        return f"<IdempotencyKey(employee_id={self.employee_id}, key={self.key}, status={self.status})>"
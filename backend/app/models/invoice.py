@@ -4,32 +4,68 @@ Invoice model for extracted invoice data.
 import uuid
 from datetime import datetime, date
 from decimal import Decimal
-from sqlalchemy import Column, String, Date, Numeric, DateTime, ForeignKey, Text, JSON
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, String, Date, Numeric, DateTime, Text, JSON, Computed, Index,
+    ForeignKeyConstraint, PrimaryKeyConstraint
+)
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 
 from app.database import Base
 
+# Full-text document for invoice search. Vendor and invoice number rank highest,
+# then item descriptions, then the raw OCR text. The 'simple' configuration is
+# used because invoices arrive in several languages and contain codes that
+# stemming would mangle.
+INVOICE_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(vendor_name, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(invoice_number, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, "
+    "coalesce(jsonb_path_query_array(items, '$[*].description')::text, '')), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(extracted_text, '')), 'C')"
+)
+
 
 class Invoice(Base):
     """Invoice model storing extracted data from invoice images."""
     
     __tablename__ = "invoices"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    request_id = Column(UUID(as_uuid=True), ForeignKey("reimbursement_requests.id", ondelete="CASCADE"), unique=True, nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), nullable=False, default=uuid.uuid4)
+    request_id = Column(UUID(as_uuid=True), nullable=False)
+    # Copy of the request's submission_timestamp: the partition key, and part of the foreign key
+    submitted_at = Column(DateTime, nullable=False)
     vendor_name = Column(String(255), nullable=True)
     purchase_date = Column(Date, nullable=True)
-    items = Column(JSONB, nullable=True)  # Array of item objects
+    # Large columns are loaded only when asked for (undefer() / attribute access)
+    items = deferred(Column(JSONB, nullable=True))  # Array of item objects
     total_amount = Column(Numeric(10, 2), nullable=False)
     currency = Column(String(10), nullable=False, default="USD")
     invoice_number = Column(String(100), nullable=True)
-    extracted_text = Column(Text, nullable=True)  # Full OCR text
+    extracted_text = deferred(Column(Text, nullable=True))  # Full OCR text
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    search_vector = deferred(Column(TSVECTOR, Computed(INVOICE_SEARCH_VECTOR_SQL, persisted=True)))
     
     # Relationships
     request = relationship("ReimbursementRequest", back_populates="invoice")
     
+    # Partitioned by month like reimbursement_requests, so a request and its
+    # invoice always live in (and are archived from) the same month
+    __mapper_args__ = {"primary_key": [id]}
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "submitted_at", name="invoices_pkey"),
+        ForeignKeyConstraint(
+            ["request_id", "submitted_at"],
+            ["reimbursement_requests.id", "reimbursement_requests.submission_timestamp"],
+            ondelete="CASCADE",
+            name="invoices_request_id_fkey"
+        ),
+        Index("ix_invoices_request_id", "request_id", "submitted_at", unique=True),
+        Index("ix_invoices_search_vector", "search_vector", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (submitted_at)"},
+    )
+    
     def __repr__(self):
         return f"<Invoice(id={self.id}, request_id={self.request_id}, vendor_name={self.vendor_name})>"
 
@@ -0,0 +1,40 @@
+"""
+LLM call accounting model.
+"""
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, Date, DateTime, Text, Index, cast
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class LLMCall(Base):
+    """One OpenAI call with its token usage and timings."""
+    
+    __tablename__ = "llm_calls"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Reimbursement request the call was made for (no foreign key: requests are
+    # partitioned and archived, call records are kept independently)
+    request_id = Column(UUID(as_uuid=True), nullable=True)
+    stage = Column(String(30), nullable=False)  # ocr, category_match
+    model = Column(String(50), nullable=False)
+    priority = Column(String(20), nullable=False)  # interactive, background
+    prompt_tokens = Column(Integer, nullable=True)  # Not set for failed calls
+    completion_tokens = Column(Integer, nullable=True)
+    total_tokens = Column(Integer, nullable=True)
+    latency_ms = Column(Integer, nullable=True)  # API time of the final attempt
+    queue_ms = Column(Integer, nullable=False, default=0)  # Time waiting for rate limit budget
+    retries = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_llm_calls_request_id", "request_id"),
+        # Usage is reported per day (see the llm_usage_daily view)
+        Index("ix_llm_calls_day", cast(created_at, Date)),
+    )
+    
+    def __repr__(self):
+        return f"<LLMCall(id={self.id}, stage={self.stage}, model={self.model}, total_tokens={self.total_tokens})>"
@@ -4,7 +4,7 @@ Reimbursement request model.
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import Column, String, Numeric, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, String, Numeric, DateTime, ForeignKey, Text, Index, PrimaryKeyConstraint, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -25,10 +25,10 @@ class ReimbursementRequest(Base):
     
     __tablename__ = "reimbursement_requests"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.id", ondelete="CASCADE"), nullable=False, index=True)
-    category_id = Column(UUID(as_uuid=True), ForeignKey("benefit_categories.id", ondelete="SET NULL"), nullable=True, index=True)
-    status = Column(SQLEnum(RequestStatus), default=RequestStatus.PROCESSING, nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), nullable=False, default=uuid.uuid4)
+    employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    category_id = Column(UUID(as_uuid=True), ForeignKey("benefit_categories.id", ondelete="SET NULL"), nullable=True)
+    status = Column(SQLEnum(RequestStatus), default=RequestStatus.PROCESSING, nullable=False)
     amount = Column(Numeric(10, 2), nullable=False)
     currency = Column(String(10), nullable=False, default="USD")
     cloudinary_url = Column(String(500), nullable=False)
@@ -43,6 +43,39 @@ class ReimbursementRequest(Base):
     category = relationship("BenefitCategory", back_populates="reimbursement_requests")
     invoice = relationship("Invoice", back_populates="request", uselist=False, cascade="all, delete-orphan")
     
+    # Range-partitioned by month on submission_timestamp (see app/services/partitions.py).
+    # Postgres requires the partition key in the primary key, so the table key is
+    # (id, submission_timestamp) while the ORM still identifies rows by id alone.
+    __mapper_args__ = {"primary_key": [id]}
+    
+    # Composite indexes matching the listing access patterns: filter by one key,
+    # newest first, keyset on (submission_timestamp, id). The INCLUDE columns cover
+    # the summary columns so listings can be answered by index-only scans.
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "submission_timestamp", name="reimbursement_requests_pkey"),
+        Index(
+            "ix_reimbursement_requests_status_submitted",
+            "status", "submission_timestamp", "id",
+            postgresql_include=["employee_id", "category_id", "amount", "currency"]
+        ),
+        Index(
+            "ix_reimbursement_requests_employee_submitted",
+            "employee_id", "submission_timestamp", "id",
+            postgresql_include=["category_id", "status", "amount", "currency"]
+        ),
+        Index(
+            "ix_reimbursement_requests_category_submitted",
+            "category_id", "submission_timestamp", "id",
+            postgresql_include=["employee_id", "status", "amount", "currency"]
+        ),
+        Index(
+            "ix_reimbursement_requests_submitted",
+            "submission_timestamp", "id",
+            postgresql_include=["employee_id", "category_id", "status", "amount", "currency"]
+        ),
+        {"postgresql_partition_by": "RANGE (submission_timestamp)"},
+    )
+    
     def __repr__(self):
         return f"<ReimbursementRequest(id={self.id}, employee_id={self.employee_id}, status={self.status})>"
 
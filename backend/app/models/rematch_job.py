@@ -0,0 +1,47 @@
+"""
+Re-match job model.
+"""
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, Integer, DateTime, Text, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+import enum
+
+from app.database import Base
+
+
+class RematchJobStatus(str, enum.Enum):
+    """Re-match job status enumeration."""
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class RematchJob(Base):
+    """Bulk re-match of pending-review requests, with its progress and resume cursor."""
+    
+    __tablename__ = "rematch_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status = Column(SQLEnum(RematchJobStatus), default=RematchJobStatus.RUNNING, nullable=False)
+    # Requests submitted up to this time are re-matched; later ones are left to the submit path
+    cutoff = Column(DateTime, nullable=False)
+    # Keyset position of the last request processed, committed with each batch
+    cursor_submitted_at = Column(DateTime, nullable=True)
+    cursor_id = Column(UUID(as_uuid=True), nullable=True)
+    total = Column(Integer, nullable=False, default=0)  # Pending requests when the job was created
+    processed = Column(Integer, nullable=False, default=0)
+    approved = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    still_pending = Column(Integer, nullable=False, default=0)  # Confidence still below the threshold
+    skipped = Column(Integer, nullable=False, default=0)  # Resolved by someone else meanwhile
+    errors = Column(Integer, nullable=False, default=0)  # Matching failed; left pending
+    # Requests whose matching failed, retried when the job is resumed (errors counts them)
+    failed_request_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=False, default=list, server_default="{}")
+    error = Column(Text, nullable=True)  # Why the job failed
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<RematchJob(id={self.id}, status={self.status}, processed={self.processed}/{self.total})>"
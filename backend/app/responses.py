@@ -0,0 +1,32 @@
+"""
+Fast JSON response class.
+
+Encodes with orjson, which handles UUID, datetime, date and enums natively.
+Decimal is written as a string, matching Pydantic's JSON output, so clients
+see the same payloads as with the stdlib encoder. Pydantic models passed
+directly are serialized by pydantic-core without another validation pass.
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (or pydantic-core for models)."""
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            # Already validated: serialize straight from the model
+            return content.model_dump_json().encode()
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,101 @@
+"""
+Analytics Pydantic schemas.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+from uuid import UUID
+from pydantic import BaseModel
+
+
+class SpendItem(BaseModel):
+    """Schema for approved spend of one group; only its key fields are set."""
+    year: Optional[int] = None
+    month: Optional[int] = None
+    category_id: Optional[UUID] = None
+    category_name: Optional[str] = None
+    department: Optional[str] = None  # None: employees without a department
+    total_spent: Decimal  # USD
+
+
+class SpendReport(BaseModel):
+    """Schema for a spend breakdown."""
+    group_by: str
+    year: int
+    items: List[SpendItem]
+
+
+class OutcomeItem(BaseModel):
+    """Schema for request outcomes of one group; only its key fields are set."""
+    year: Optional[int] = None
+    month: Optional[int] = None
+    category_name: Optional[str] = None  # None: requests without a category
+    department: Optional[str] = None  # None: employees without a department
+    total: int
+    approved: int
+    rejected: int
+    pending_review: int
+    processing: int
+    approval_rate: Optional[Decimal] = None  # Share of approved + rejected requests
+    rejection_rate: Optional[Decimal] = None
+
+
+class OutcomeReport(BaseModel):
+    """Schema for an approval/rejection breakdown."""
+    group_by: str
+    year: int
+    items: List[OutcomeItem]
+
+
+class LLMUsageItem(BaseModel):
+    """Schema for one day of LLM calls of a model and stage."""
+    day: date
+    model: str
+    stage: str
+    calls: int
+    failed_calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    avg_latency_ms: Optional[int] = None  # Successful calls only
+    p50_latency_ms: Optional[int] = None
+    p95_latency_ms: Optional[int] = None
+    avg_queue_ms: int
+    retries: int
+
+
+class LLMUsageReport(BaseModel):
+    """Schema for daily LLM usage over a range of days."""
+    start: date
+    end: date
+    items: List[LLMUsageItem]
+
+
+class LLMRequestUsage(BaseModel):
+    """Schema for the LLM usage of one reimbursement request."""
+    request_id: UUID
+    calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    latency_ms: int  # Sum over the request's calls
+    retries: int
+
+
+class LLMCallResponse(BaseModel):
+    """Schema for one recorded LLM call."""
+    id: UUID
+    stage: str
+    model: str
+    priority: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+    latency_ms: Optional[int] = None
+    queue_ms: int
+    retries: int
+    error: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
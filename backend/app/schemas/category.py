@@ -4,7 +4,7 @@ Category Pydantic schemas.
 from uuid import UUID
 from decimal import Decimal
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class KeywordResponse(BaseModel):
@@ -37,6 +37,36 @@ class CategoryUpdate(BaseModel):
     monthly_limit: Optional[Decimal] = None
 
 
+class LimitProposal(BaseModel):
+    """Schema for proposed category limits; omitted limits stay unchanged."""
+    max_transaction_amount: Optional[Decimal] = Field(None, ge=0)
+    annual_limit: Optional[Decimal] = Field(None, ge=0)
+    monthly_limit: Optional[Decimal] = Field(None, ge=0)
+
+
+class SimulatedOutcomes(BaseModel):
+    """Schema for replayed outcomes under one set of limits."""
+    approved: int
+    approved_amount: Decimal  # USD
+    rejected_transaction_limit: int
+    rejected_monthly_limit: int
+    rejected_annual_limit: int
+
+
+class LimitSimulation(BaseModel):
+    """Schema for a what-if simulation of category limits."""
+    category_id: UUID
+    year: int
+    requests: int  # Approved and rejected requests replayed
+    current: SimulatedOutcomes
+    proposed: SimulatedOutcomes
+    approval_delta: int
+    approved_amount_delta: Decimal
+    newly_approved: int
+    newly_rejected: int
+    elapsed_ms: float
+
+
 class CategoryResponse(CategoryBase):
     """Schema for category response."""
     id: UUID
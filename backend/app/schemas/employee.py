@@ -1,6 +1,7 @@
 """
 Employee Pydantic schemas.
 """
+from typing import Optional
 from uuid import UUID
 from pydantic import BaseModel
 
@@ -9,6 +10,7 @@ class EmployeeBase(BaseModel):
     """Base employee schema."""
     name: str
     employee_id: str
+    department: Optional[str] = None
 
 
 class EmployeeCreate(EmployeeBase):
@@ -0,0 +1,28 @@
+"""
+Bulk import Pydantic schemas.
+"""
+from typing import List
+from pydantic import BaseModel
+
+
+class KeywordImport(BaseModel):
+    """Schema for one imported keyword row."""
+    category: str  # Category name
+    keyword: str
+
+
+class ImportRowError(BaseModel):
+    """Schema for a rejected import row."""
+    line: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    """Schema for the outcome of a bulk import."""
+    entity: str
+    inserted: int
+    updated: int
+    unchanged: int
+    duplicates: int  # Rows superseded by a later row with the same key
+    rejected: int
+    errors: List[ImportRowError] = []  # First rejected rows, capped
@@ -0,0 +1,23 @@
+"""
+Invoice Pydantic schemas.
+"""
+from uuid import UUID
+from decimal import Decimal
+from datetime import date
+from typing import Optional
+from pydantic import BaseModel
+
+
+class InvoiceSearchResult(BaseModel):
+    """Schema for an invoice full-text search hit."""
+    id: UUID
+    request_id: UUID
+    vendor_name: Optional[str] = None
+    invoice_number: Optional[str] = None
+    purchase_date: Optional[date] = None
+    total_amount: Decimal
+    currency: str
+    rank: float
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,13 @@
+"""
+Pagination Pydantic schemas.
+"""
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """Schema for a keyset-paginated list response."""
+    items: List[T]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
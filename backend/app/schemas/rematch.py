@@ -0,0 +1,31 @@
+"""
+Re-match job Pydantic schemas.
+"""
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+from pydantic import BaseModel
+
+from app.models.rematch_job import RematchJobStatus
+
+
+class RematchJobResponse(BaseModel):
+    """Schema for a re-match job and its progress."""
+    id: UUID
+    status: RematchJobStatus
+    cutoff: datetime
+    total: int
+    processed: int
+    approved: int
+    rejected: int
+    still_pending: int
+    skipped: int
+    errors: int
+    failed_request_ids: List[UUID] = []
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -53,3 +53,17 @@ class ReimbursementResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+class ReimbursementSummary(BaseModel):
+    """Schema for a reimbursement request in list responses."""
+    id: UUID
+    employee_id: UUID
+    category_id: Optional[UUID] = None
+    status: RequestStatus
+    amount: Decimal
+    currency: str
+    submission_timestamp: datetime
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,165 @@
+"""
+Spend analytics for finance dashboards.
+
+Aggregates are precomputed into two materialized views, so a dashboard query
+reads a few hundred summary rows however much history there is:
+
+- `analytics_monthly_spend`: approved spend in USD (from the balances) per
+  month, category and department
+- `analytics_request_outcomes`: request counts per month, category,
+  department and status
+
+The views are refreshed with `REFRESH MATERIALIZED VIEW CONCURRENTLY` by
+`manage.py refresh-analytics` on a schedule; a concurrent refresh only writes
+the summary rows that changed and never blocks dashboard reads. Figures are
+therefore as fresh as the last refresh. Employees without a department and
+requests without a category are grouped under None.
+
+`analytics_request_outcomes` counts the live partitions only: months moved to
+the archive tables (older than ARCHIVE_RETENTION_MONTHS) drop out of it on
+the next refresh. Spend comes from the balances and is not affected.
+"""
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import column, func, select, table, text
+from sqlalchemy.orm import Session
+
+from app.models.reimbursement_request import RequestStatus
+
+ANALYTICS_VIEWS = ("analytics_monthly_spend", "analytics_request_outcomes")
+
+GROUP_BY_OPTIONS = ("category", "month", "department")
+
+monthly_spend = table(
+    "analytics_monthly_spend",
+    column("year"),
+    column("month"),
+    column("category_id"),
+    column("category_name"),
+    column("department"),
+    column("total_spent"),
+    column("employees_with_spend"),
+)
+
+request_outcomes = table(
+    "analytics_request_outcomes",
+    column("year"),
+    column("month"),
+    column("category_name"),
+    column("department"),
+    column("status"),
+    column("request_count"),
+)
+
+
+def spend_summary(
+    db: Session,
+    group_by: str,
+    year: int,
+    month: Optional[int] = None,
+    department: Optional[str] = None,
+    category: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Approved spend (USD) of a year grouped by category, month or department.
+
+    Args:
+        db: Database session
+        group_by: "category", "month" or "department"
+        year: Year to report
+        month: Restrict to one month
+        department: Restrict to one department
+        category: Restrict to one category (by name)
+
+    Returns:
+        One item per group with its key fields and `total_spent`, largest first
+        (chronological for months)
+    """
+    view = monthly_spend
+    keys = _group_columns(view, group_by)
+    total = func.sum(view.c.total_spent).label("total_spent")
+    query = _filtered(select(*keys, total), view, year, month, department, category).group_by(*keys)
+    query = query.order_by(*keys) if group_by == "month" else query.order_by(total.desc(), *keys)
+    return [dict(row._mapping) for row in db.execute(query)]
+
+
+def outcome_summary(
+    db: Session,
+    group_by: str,
+    year: int,
+    month: Optional[int] = None,
+    department: Optional[str] = None,
+    category: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Request counts per status and approval/rejection rates, grouped like spend_summary.
+
+    Rates are shares of the decided requests (approved or rejected), so they
+    add up to 1; requests pending review or still processing are counted but
+    left out of the rates. A rate is None when nothing was decided.
+    """
+    view = request_outcomes
+    keys = _group_columns(view, group_by)
+    counts = [
+        func.coalesce(func.sum(view.c.request_count).filter(view.c.status == status.value), 0).label(status.value)
+        for status in RequestStatus
+    ]
+    query = _filtered(select(*keys, *counts), view, year, month, department, category).group_by(*keys)
+    query = query.order_by(*keys)
+
+    items = []
+    for row in db.execute(query):
+        item = dict(row._mapping)
+        approved = item[RequestStatus.APPROVED.value]
+        rejected = item[RequestStatus.REJECTED.value]
+        decided = approved + rejected
+        item["total"] = decided + item[RequestStatus.PENDING_REVIEW.value] + item[RequestStatus.PROCESSING.value]
+        item["approval_rate"] = _rate(approved, decided)
+        item["rejection_rate"] = _rate(rejected, decided)
+        items.append(item)
+    return items
+
+
+def refresh_analytics(db: Session) -> Dict[str, float]:
+    """
+    Refresh the analytics views concurrently, one transaction per view.
+
+    Returns:
+        Seconds taken per view
+    """
+    timings = {}
+    for view in ANALYTICS_VIEWS:
+        started = time.perf_counter()
+        db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+        db.commit()
+        timings[view] = time.perf_counter() - started
+    return timings
+
+
+def _group_columns(view, group_by: str) -> list:
+    if group_by == "month":
+        return [view.c.year, view.c.month]
+    if group_by == "department":
+        return [view.c.department]
+    if "category_id" in view.c:
+        return [view.c.category_id, view.c.category_name]
+    return [view.c.category_name]
+
+
+def _filtered(query, view, year: int, month: Optional[int], department: Optional[str], category: Optional[str]):
+    query = query.where(view.c.year == year)
+    if month:
+        query = query.where(view.c.month == month)
+    if department:
+        query = query.where(view.c.department == department)
+    if category:
+        query = query.where(view.c.category_name == category)
+    return query
+
+
+def _rate(count: int, total: int) -> Optional[Decimal]:
+    if not total:
+        return None
+    return (Decimal(count) / Decimal(total)).quantize(Decimal("0.0001"))
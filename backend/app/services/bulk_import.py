@@ -0,0 +1,271 @@
+"""
+Bulk import of employees, categories and keywords.
+
+Rows from a CSV or JSONL file are validated one by one with the API schemas,
+written to a temporary table with COPY and then applied with a single
+INSERT ... ON CONFLICT statement per import, so the cost is a few round
+trips regardless of the number of rows. Within a file the last row for a
+key wins; rows that fail validation (or name an unknown category) are
+reported with their line numbers and skipped.
+"""
+import csv
+import io
+import json
+import tempfile
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Numeric, String, text
+from sqlalchemy.orm import Session
+
+from app.models.benefit_category import BenefitCategory
+from app.models.category_keyword import CategoryKeyword
+from app.models.employee import Employee
+from app.schemas.category import CategoryCreate
+from app.schemas.employee import EmployeeCreate
+from app.schemas.imports import KeywordImport
+
+IMPORT_ENTITIES = ("employees", "categories", "keywords")
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# Rejected rows listed in the report; the count is always complete
+MAX_REPORTED_ERRORS = 100
+
+# Staged rows are kept in memory up to this size, then spooled to disk
+COPY_SPOOL_SIZE = 16 * 1024 * 1024
+
+# Each upsert returns (inserted, updated, distinct source rows). `xmax = 0`
+# identifies freshly inserted rows; the WHERE clauses skip rows that would not
+# change, so they are neither rewritten nor counted as updated. An employee row
+# without a department keeps the one already stored.
+UPSERT_EMPLOYEES_SQL = """
+WITH source AS (
+    SELECT DISTINCT ON (employee_id) employee_id, name, department
+    FROM import_rows ORDER BY employee_id, line DESC
+), upserted AS (
+    INSERT INTO employees (id, employee_id, name, department, created_at, updated_at)
+    SELECT gen_random_uuid(), employee_id, name, department, :now, :now FROM source
+    ON CONFLICT (employee_id) DO UPDATE
+        SET name = EXCLUDED.name,
+            department = COALESCE(EXCLUDED.department, employees.department),
+            updated_at = EXCLUDED.updated_at
+        WHERE (employees.name, employees.department)
+            IS DISTINCT FROM (EXCLUDED.name, COALESCE(EXCLUDED.department, employees.department))
+    RETURNING xmax = 0 AS inserted
+)
+SELECT
+    (SELECT count(*) FROM upserted WHERE inserted),
+    (SELECT count(*) FROM upserted WHERE NOT inserted),
+    (SELECT count(*) FROM source)
+"""
+
+UPSERT_CATEGORIES_SQL = """
+WITH source AS (
+    SELECT DISTINCT ON (name) name, max_transaction_amount, annual_limit, monthly_limit
+    FROM import_rows ORDER BY name, line DESC
+), upserted AS (
+    INSERT INTO benefit_categories (id, name, max_transaction_amount, annual_limit, monthly_limit, created_at, updated_at)
+    SELECT gen_random_uuid(), name, max_transaction_amount, annual_limit, monthly_limit, :now, :now FROM source
+    ON CONFLICT (name) DO UPDATE
+        SET max_transaction_amount = EXCLUDED.max_transaction_amount,
+            annual_limit = EXCLUDED.annual_limit,
+            monthly_limit = EXCLUDED.monthly_limit,
+            updated_at = EXCLUDED.updated_at
+        WHERE (benefit_categories.max_transaction_amount, benefit_categories.annual_limit, benefit_categories.monthly_limit)
+            IS DISTINCT FROM (EXCLUDED.max_transaction_amount, EXCLUDED.annual_limit, EXCLUDED.monthly_limit)
+    RETURNING xmax = 0 AS inserted
+)
+SELECT
+    (SELECT count(*) FROM upserted WHERE inserted),
+    (SELECT count(*) FROM upserted WHERE NOT inserted),
+    (SELECT count(*) FROM source)
+"""
+
+# Keywords have nothing to update: they are inserted or already present
+UPSERT_KEYWORDS_SQL = """
+WITH source AS (
+    SELECT DISTINCT c.id AS category_id, r.keyword
+    FROM import_rows r JOIN benefit_categories c ON c.name = r.category
+), inserted AS (
+    INSERT INTO category_keywords (id, category_id, keyword, created_at)
+    SELECT gen_random_uuid(), category_id, keyword, :now FROM source
+    ON CONFLICT (category_id, keyword) DO NOTHING
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM inserted), 0, (SELECT count(*) FROM source)
+"""
+
+UNKNOWN_CATEGORY_SQL = """
+SELECT r.line, r.category FROM import_rows r
+WHERE NOT EXISTS (SELECT 1 FROM benefit_categories c WHERE c.name = r.category)
+ORDER BY r.line
+"""
+
+# Per entity: row schema, staged fields with the column types they are checked
+# against, the staging table definition and the upsert
+_SPECS = {
+    "employees": {
+        "schema": EmployeeCreate,
+        "columns": {
+            "employee_id": Employee.__table__.c.employee_id.type,
+            "name": Employee.__table__.c.name.type,
+            "department": Employee.__table__.c.department.type,
+        },
+        "staging": "employee_id text, name text, department text",
+        "upsert": UPSERT_EMPLOYEES_SQL,
+    },
+    "categories": {
+        "schema": CategoryCreate,
+        "columns": {
+            "name": BenefitCategory.__table__.c.name.type,
+            "max_transaction_amount": BenefitCategory.__table__.c.max_transaction_amount.type,
+            "annual_limit": BenefitCategory.__table__.c.annual_limit.type,
+            "monthly_limit": BenefitCategory.__table__.c.monthly_limit.type,
+        },
+        "staging": "name text, max_transaction_amount numeric, annual_limit numeric, monthly_limit numeric",
+        "upsert": UPSERT_CATEGORIES_SQL,
+    },
+    "keywords": {
+        "schema": KeywordImport,
+        "columns": {
+            "category": BenefitCategory.__table__.c.name.type,
+            "keyword": CategoryKeyword.__table__.c.keyword.type,
+        },
+        "staging": "category text, keyword text",
+        "upsert": UPSERT_KEYWORDS_SQL,
+    },
+}
+
+
+def import_records(db: Session, entity: str, file: BinaryIO, import_format: str) -> Dict[str, Any]:
+    """
+    Import employees, categories or keywords from a CSV/JSONL file and commit.
+
+    Employees are keyed by `employee_id`, categories by `name`, keywords by
+    (`category`, `keyword`); existing rows are updated, new ones inserted.
+
+    Args:
+        db: Database session
+        entity: "employees", "categories" or "keywords"
+        file: Binary file with a header row (CSV) or one JSON object per line (JSONL)
+        import_format: "csv" or "jsonl"
+
+    Returns:
+        Report with inserted/updated/unchanged/duplicates/rejected counts and
+        the first rejected rows
+    """
+    spec = _SPECS[entity]
+    columns = list(spec["columns"])
+    errors: List[Dict[str, Any]] = []
+    rejected = 0
+    staged = 0
+
+    with tempfile.SpooledTemporaryFile(max_size=COPY_SPOOL_SIZE, mode="w+", newline="") as buffer:
+        writer = csv.writer(buffer)
+        for line, record, error in _read_records(file, import_format):
+            if error is None:
+                try:
+                    values = _validate(spec, record)
+                except ValueError as e:
+                    error = _describe(e)
+            if error is not None:
+                rejected += 1
+                errors.append({"line": line, "error": error})
+                del errors[MAX_REPORTED_ERRORS:]
+                continue
+            writer.writerow([line, *values])
+            staged += 1
+
+        buffer.seek(0)
+        db.execute(text(f"CREATE TEMP TABLE import_rows (line integer, {spec['staging']}) ON COMMIT DROP"))
+        cursor = db.connection().connection.cursor()
+        cursor.copy_expert(f"COPY import_rows (line, {', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    unknown = 0
+    if entity == "keywords":
+        for line, category in db.execute(text(UNKNOWN_CATEGORY_SQL)):
+            unknown += 1
+            if unknown <= MAX_REPORTED_ERRORS:
+                errors.append({"line": line, "error": f"Unknown category: {category}"})
+        rejected += unknown
+        errors = sorted(errors, key=lambda e: e["line"])[:MAX_REPORTED_ERRORS]
+
+    inserted, updated, distinct = db.execute(text(spec["upsert"]), {"now": datetime.utcnow()}).one()
+    db.commit()
+
+    return {
+        "entity": entity,
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": distinct - inserted - updated,
+        "duplicates": staged - unknown - distinct,
+        "rejected": rejected,
+        "errors": errors,
+    }
+
+
+def _read_records(file: BinaryIO, import_format: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, record, parse error) for each row of the file."""
+    text_file = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if import_format == "csv":
+            reader = csv.DictReader(text_file)
+            for record in reader:
+                # DictReader collects fields beyond the header under the None key
+                if None in record:
+                    yield reader.line_num, None, f"Expected {len(reader.fieldnames)} fields, got {len(reader.fieldnames) + len(record[None])}"
+                    continue
+                yield reader.line_num, record, None
+            return
+
+        for line, raw in enumerate(text_file, start=1):
+            if not raw.strip():
+                continue
+            try:
+                record = json.loads(raw)
+            except json.JSONDecodeError as e:
+                yield line, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line, None, "Expected a JSON object"
+                continue
+            yield line, record, None
+    except UnicodeDecodeError:
+        raise ValueError("File is not valid UTF-8")
+    finally:
+        # Leave the caller's file open
+        text_file.detach()
+
+
+def _validate(spec: Dict[str, Any], record: dict) -> List[Any]:
+    """Validate a record with the entity schema and the column limits; returns staged values."""
+    model: BaseModel = spec["schema"].model_validate(record)
+    values = []
+    for name, column_type in spec["columns"].items():
+        value = getattr(model, name)
+        if isinstance(value, str):
+            value = value.strip()
+            if not value and model.model_fields[name].is_required():
+                raise ValueError(f"{name}: must not be blank")
+            if not value:
+                value = None
+            elif isinstance(column_type, String) and column_type.length and len(value) > column_type.length:
+                raise ValueError(f"{name}: longer than {column_type.length} characters")
+        elif isinstance(column_type, Numeric):
+            if value < 0:
+                raise ValueError(f"{name}: must not be negative")
+            # Rounded first, as the column would: 99999999.999 does not fit NUMERIC(10, 2)
+            value = round(value, column_type.scale)
+            if value >= 10 ** (column_type.precision - column_type.scale):
+                raise ValueError(f"{name}: too large")
+        values.append(value)
+    return values
+
+
+def _describe(error: ValueError) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
@@ -3,68 +3,88 @@ Category matching service using OpenAI GPT-4.
 """
 import json
 from typing import Dict, Any, Optional, List
-from sqlalchemy.orm import Session
-from openai import OpenAI
+from sqlalchemy.orm import Session, selectinload
 from fastapi import HTTPException
 
-from app.config import settings
 from app.models.benefit_category import BenefitCategory
-from app.models.category_keyword import CategoryKeyword
-
-
-def get_openai_client():
-    """Get OpenAI client instance."""
-    if not settings.OPENAI_API_KEY:
-        raise ValueError("OPENAI_API_KEY is not set")
-    return OpenAI(api_key=settings.OPENAI_API_KEY)
+from app.services.openai_scheduler import INTERACTIVE, chat_completion
 
 
 async def match_category(
-    db: Session,
-    invoice_text: str,
-    items: Optional[List[Dict[str, Any]]] = None
+    db: Optional[Session] = None,
+    invoice_text: str = "",
+    items: Optional[List[Dict[str, Any]]] = None,
+    category_context: Optional[List[Dict[str, Any]]] = None
 ) -> Dict[str, Any]:
     """
     Match invoice to a benefit category using GPT-4 and keywords.
     
     Args:
-        db: Database session
+        db: Database session (categories are loaded from it unless given)
         invoice_text: Full text extracted from invoice
         items: List of invoice items (optional)
+        category_context: Categories as returned by load_category_context, if already loaded
         
     Returns:
         Dictionary with category_id, confidence, matched_keywords, reasoning
     """
     try:
-        # Fetch all categories with their keywords
-        categories = db.query(BenefitCategory).all()
-        
-        if not categories:
-            return {
-                "category_id": None,
-                "confidence": 0.0,
-                "matched_keywords": [],
-                "reasoning": "No categories available in the system"
-            }
-        
-        # Build category context with keywords
-        category_context = []
-        for category in categories:
-            keywords = [kw.keyword for kw in category.keywords]
-            category_context.append({
-                "id": str(category.id),
-                "name": category.name,
-                "keywords": keywords
-            })
-        
-        # Prepare items text if available
-        items_text = ""
-        if items:
-            items_descriptions = [item.get("description", "") for item in items]
-            items_text = "\nItems: " + ", ".join(items_descriptions)
-        
-        # Create prompt for GPT-4
-        prompt = f"""Analyze the following invoice text and match it to one of the provided benefit categories based on keywords and context.
+        if category_context is None:
+            category_context = load_category_context(db)
+        return await classify_invoice(category_context, invoice_text, items)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Category matching failed: {str(e)}"
+        )
+
+
+def load_category_context(db: Session) -> List[Dict[str, Any]]:
+    """Load all categories with their keywords, as sent to the model."""
+    categories = db.query(BenefitCategory).options(selectinload(BenefitCategory.keywords)).all()
+    return [
+        {
+            "id": str(category.id),
+            "name": category.name,
+            "keywords": [kw.keyword for kw in category.keywords]
+        }
+        for category in categories
+    ]
+
+
+async def classify_invoice(
+    category_context: List[Dict[str, Any]],
+    invoice_text: str,
+    items: Optional[List[Dict[str, Any]]] = None,
+    priority: int = INTERACTIVE
+) -> Dict[str, Any]:
+    """
+    Ask the model to match an invoice to one of the given categories.
+    
+    Free of database access, so callers can run many at once (e.g. the bulk
+    re-match job, at BACKGROUND priority) with a context loaded once.
+    
+    Raises:
+        Exception: If the API call fails or the answer is not valid JSON
+    """
+    if not category_context:
+        return {
+            "category_id": None,
+            "confidence": 0.0,
+            "matched_keywords": [],
+            "reasoning": "No categories available in the system"
+        }
+    
+    # Prepare items text if available
+    items_text = ""
+    if items:
+        items_descriptions = [item.get("description", "") for item in items]
+        items_text = "\nItems: " + ", ".join(items_descriptions)
+    
+    # Create prompt for GPT-4
+    prompt = f"""Analyze the following invoice text and match it to one of the provided benefit categories based on keywords and context.
 
 Invoice text:
 {invoice_text}
@@ -97,39 +117,33 @@ Return JSON only:
 }}
 
 If confidence is below 0.7 OR no keywords match clearly, set category_id to null."""
-        
-        client = get_openai_client()
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a benefit category classifier. Analyze invoices and match them to appropriate benefit categories based on keywords and context."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.3,
-            max_tokens=500,
-        )
-        
-        content = response.choices[0].message.content
-        
-        # Parse JSON response
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-        
-        result = json.loads(content)
-        
-        return result
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Category matching failed: {str(e)}"
-        )
-
+    
+    response = await chat_completion(
+        stage="category_match",
+        priority=priority,
+        model="gpt-4",
+        messages=[
+            {
+                "role": "system",
+                "content": "You are a benefit category classifier. Analyze invoices and match them to appropriate benefit categories based on keywords and context."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        temperature=0.3,
+        max_tokens=500,
+    )
+    
+    content = response.choices[0].message.content
+    
+    # Parse JSON response
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+    
+    result = json.loads(content)
+    
+    return result
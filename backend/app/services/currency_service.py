@@ -2,7 +2,7 @@
 Currency conversion service.
 Converts amounts from any currency to USD for comparison with limits.
 """
-import httpx
+import time
 from decimal import Decimal, ROUND_DOWN
 from typing import Optional
 from fastapi import HTTPException
@@ -10,9 +10,13 @@ from fastapi import HTTPException
 from app.config import settings
 
 
-# Cache for exchange rates (simple in-memory cache)
-_exchange_rate_cache = {}
-_cache_timestamp = None
+# Cache for exchange rates (simple in-memory cache): currency -> (rate, fetched_at)
+#
+# This is per-process state. With several uvicorn workers (see start.py) every
+# worker keeps its own copy and fetches a rate the first time it needs it, i.e.
+# at most one API call per currency per worker per CACHE_DURATION_SECONDS.
+# Nothing is fetched at startup, so workers have no warm-up cost to repeat.
+_exchange_rate_cache: dict[str, tuple[Decimal, float]] = {}
 CACHE_DURATION_SECONDS = 3600  # Cache for 1 hour
 
 
@@ -36,10 +40,14 @@ async def get_exchange_rate_to_usd(currency: str) -> Decimal:
         return Decimal("1.0")
     
     # Check cache
-    if currency in _exchange_rate_cache:
-        return _exchange_rate_cache[currency]
+    cached = _exchange_rate_cache.get(currency)
+    if cached and time.monotonic() - cached[1] < CACHE_DURATION_SECONDS:
+        return cached[0]
     
     try:
+        # Imported on first use to keep application startup fast
+        import httpx
+        
         # Use exchangerate-api.com v6 API (supports API key for higher limits)
         async with httpx.AsyncClient(timeout=10.0) as client:
             if settings.EXCHANGE_RATE_API_KEY:
@@ -57,7 +65,7 @@ async def get_exchange_rate_to_usd(currency: str) -> Decimal:
                 usd_rate = Decimal(str(data["rates"]["USD"]))
                 
                 # Cache the rate
-                _exchange_rate_cache[currency] = usd_rate
+                _exchange_rate_cache[currency] = (usd_rate, time.monotonic())
                 
                 return usd_rate
             else:
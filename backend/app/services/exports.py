@@ -0,0 +1,248 @@
+"""
+Streaming payroll exports.
+
+Reimbursements (joined with employee, category and invoice) and monthly
+balances are read through a server-side cursor in EXPORT_BATCH_SIZE batches
+and written out batch by batch as CSV or Parquet (one row group per batch),
+so memory use stays flat however many rows are exported. Used by the
+/exports endpoints and `manage.py export`. Reimbursement exports whose range
+reaches back past ARCHIVE_RETENTION_MONTHS include the archive tables, so
+archived months are exported like live ones.
+"""
+import csv
+import enum
+import io
+import uuid
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import and_, literal_column, types
+from sqlalchemy.orm import Query, Session
+
+from app.config import settings
+from app.models.archive import ArchivedInvoice, ArchivedReimbursementRequest
+from app.models.benefit_category import BenefitCategory
+from app.models.employee import Employee
+from app.models.employee_benefit_balance import EmployeeBenefitBalance
+from app.models.invoice import Invoice
+from app.models.reimbursement_request import ReimbursementRequest, RequestStatus
+from app.services.partitions import archive_cutoff
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",  # Starlette appends charset=utf-8
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def reimbursements_query(
+    db: Session,
+    submitted_from: Optional[datetime] = None,
+    submitted_to: Optional[datetime] = None,
+    status: Optional[RequestStatus] = None,
+    employee_id: Optional[uuid.UUID] = None
+) -> Query:
+    """
+    Reimbursement requests with employee, category and invoice columns, oldest first.
+
+    Months moved to the archive tables are included (UNION ALL) when the range
+    starts before the retention cutoff; ranges within retention only read the
+    live partitions.
+    """
+    query = _reimbursements_select(
+        db, ReimbursementRequest, Invoice, and_(
+            Invoice.request_id == ReimbursementRequest.id,
+            Invoice.submitted_at == ReimbursementRequest.submission_timestamp
+        ), submitted_from, submitted_to, status, employee_id
+    )
+    cutoff = archive_cutoff(settings.ARCHIVE_RETENTION_MONTHS)
+    if submitted_from is None or submitted_from.date() < cutoff:
+        # Archived months all precede the cutoff, so later ranges cannot match them
+        query = query.union_all(_reimbursements_select(
+            db, ArchivedReimbursementRequest, ArchivedInvoice,
+            ArchivedInvoice.request_id == ArchivedReimbursementRequest.id,
+            submitted_from, submitted_to, status, employee_id
+        ))
+    return query.order_by(literal_column("submitted_at"), literal_column("request_id"))
+
+
+def _reimbursements_select(
+    db: Session,
+    request_model,
+    invoice_model,
+    invoice_join,
+    submitted_from: Optional[datetime],
+    submitted_to: Optional[datetime],
+    status: Optional[RequestStatus],
+    employee_id: Optional[uuid.UUID]
+) -> Query:
+    """Export columns and filters over the live or the archive tables."""
+    query = db.query(
+        request_model.id.label("request_id"),
+        request_model.submission_timestamp.label("submitted_at"),
+        request_model.status,
+        request_model.amount,
+        request_model.currency,
+        Employee.employee_id.label("employee_code"),
+        Employee.name.label("employee_name"),
+        Employee.department,
+        BenefitCategory.name.label("category_name"),
+        invoice_model.vendor_name,
+        invoice_model.invoice_number,
+        invoice_model.purchase_date,
+        invoice_model.total_amount.label("invoice_total"),
+        invoice_model.currency.label("invoice_currency"),
+        request_model.rejection_reason
+    ).join(
+        Employee, Employee.id == request_model.employee_id
+    ).outerjoin(
+        BenefitCategory, BenefitCategory.id == request_model.category_id
+    ).outerjoin(
+        # On the live tables, matching on the partition key joins partition to partition
+        invoice_model, invoice_join
+    )
+    # Bounds on the partition key keep the scan to the exported months
+    if submitted_from:
+        query = query.filter(request_model.submission_timestamp >= submitted_from)
+    if submitted_to:
+        query = query.filter(request_model.submission_timestamp < submitted_to)
+    if status:
+        query = query.filter(request_model.status == status)
+    if employee_id:
+        query = query.filter(request_model.employee_id == employee_id)
+    return query
+
+
+def balances_query(db: Session, year: Optional[int] = None, month: Optional[int] = None) -> Query:
+    """Monthly balance usage per employee and category, with the category limits."""
+    query = db.query(
+        EmployeeBenefitBalance.year,
+        EmployeeBenefitBalance.month,
+        Employee.employee_id.label("employee_code"),
+        Employee.name.label("employee_name"),
+        Employee.department,
+        BenefitCategory.name.label("category_name"),
+        EmployeeBenefitBalance.monthly_used,
+        BenefitCategory.monthly_limit,
+        BenefitCategory.annual_limit
+    ).join(
+        Employee, Employee.id == EmployeeBenefitBalance.employee_id
+    ).join(
+        BenefitCategory, BenefitCategory.id == EmployeeBenefitBalance.category_id
+    )
+    if year:
+        query = query.filter(EmployeeBenefitBalance.year == year)
+    if month:
+        query = query.filter(EmployeeBenefitBalance.month == month)
+    return query.order_by(
+        EmployeeBenefitBalance.year,
+        EmployeeBenefitBalance.month,
+        Employee.employee_id,
+        BenefitCategory.name
+    )
+
+
+def stream_export(
+    session_factory: Callable[[], Session],
+    build_query: Callable[[Session], Query],
+    export_format: str
+) -> Iterator[bytes]:
+    """
+    Run an export query and yield the encoded file in chunks.
+
+    The generator owns its session, so it can be handed to a StreamingResponse
+    and keeps working after the request's dependencies have been closed.
+
+    Args:
+        session_factory: Session factory (primary or replica)
+        build_query: Builds the export query on the given session
+        export_format: "csv" or "parquet"
+    """
+    with session_factory() as db:
+        query = build_query(db)
+        columns = query.column_descriptions
+        # yield_per streams rows through a server-side cursor instead of fetching them all
+        result = db.execute(query.statement, execution_options={"yield_per": settings.EXPORT_BATCH_SIZE})
+        batches = ([[_plain(value) for value in row] for row in rows] for rows in result.partitions())
+        if export_format == "parquet":
+            yield from _parquet_chunks(columns, batches)
+        else:
+            yield from _csv_chunks(columns, batches)
+
+
+def _csv_chunks(columns: Sequence[dict], batches: Iterable[List[list]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column["name"] for column in columns])
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only (no rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting output until it is drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_chunks(columns: Sequence[dict], batches: Iterable[List[list]]) -> Iterator[bytes]:
+    # Imported on first use: pyarrow is large and only needed for Parquet exports
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column["name"], _arrow_type(pa, column["type"])) for column in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+    try:
+        for rows in batches:
+            table = pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+                schema=schema
+            )
+            writer.write_table(table)
+            yield sink.drain()
+    finally:
+        # Footer; also written when no rows matched, so the file is always valid
+        writer.close()
+    yield sink.drain()
+
+
+def _arrow_type(pa, column_type):
+    if isinstance(column_type, types.Numeric) and not isinstance(column_type, types.Float):
+        return pa.decimal128(column_type.precision or 38, column_type.scale or 0)
+    if isinstance(column_type, types.Integer):
+        return pa.int64()
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, types.Date):
+        return pa.date32()
+    # Strings, enums and UUIDs
+    return pa.string()
+
+
+def _plain(value):
+    """Convert a database value to what CSV and Arrow expect."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
@@ -0,0 +1,86 @@
+"""
+Sparse fieldsets for reimbursement responses.
+
+Clients pass `fields=id,status,amount,invoice.vendor_name` to receive only
+those fields. A nested object is selected whole by its name (`invoice`) or
+field by field (`invoice.total_amount`). Selections use Pydantic's `include`
+format, so they apply directly to `model_dump()`, and the read path consults
+them to skip columns and joins nobody asked for.
+"""
+from typing import Any, Dict, Optional, Set, Type, Union
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+# Field name -> True (whole field) or the selected subfields of a nested object
+FieldSelection = Dict[str, Union[bool, Set[str]]]
+
+
+def parse_fields(
+    fields: Optional[str],
+    model: Type[BaseModel],
+    nested: Optional[Dict[str, Type[BaseModel]]] = None
+) -> Optional[FieldSelection]:
+    """
+    Parse a comma-separated `fields` parameter against a response schema.
+
+    Args:
+        fields: Raw query parameter value
+        model: Response schema the names refer to
+        nested: Nested object fields that accept `name.subfield`, with their schemas
+
+    Returns:
+        Selection in Pydantic `include` format, or None when all fields are wanted
+
+    Raises:
+        HTTPException: If a field name is unknown
+    """
+    if fields is None or not fields.strip():
+        return None
+    nested = nested or {}
+
+    selection: FieldSelection = {}
+    unknown = []
+    for name in (part.strip() for part in fields.split(",")):
+        if not name:
+            continue
+        parent, _, child = name.partition(".")
+        if parent not in model.model_fields:
+            unknown.append(name)
+        elif not child:
+            selection[parent] = True
+        elif parent in nested and child in nested[parent].model_fields:
+            current = selection.get(parent)
+            if current is not True:
+                selection[parent] = (current or set()) | {child}
+        else:
+            unknown.append(name)
+
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selection or None
+
+
+def wants(selection: Optional[FieldSelection], field: str, subfield: Optional[str] = None) -> bool:
+    """Return whether a field (or a subfield of a nested object) is selected."""
+    if selection is None:
+        return True
+    selected = selection.get(field)
+    if selected is None or selected is True or subfield is None:
+        return selected is not None
+    return subfield in selected
+
+
+def apply_fields(data: Dict[str, Any], selection: Optional[FieldSelection]) -> Dict[str, Any]:
+    """Reduce an already serialized response to the selected fields."""
+    if selection is None:
+        return data
+    result = {}
+    for field, selected in selection.items():
+        if field not in data:
+            continue
+        value = data[field]
+        if selected is not True and isinstance(value, dict):
+            value = {key: value[key] for key in selected if key in value}
+        result[field] = value
+    return result
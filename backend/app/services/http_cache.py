@@ -0,0 +1,91 @@
+"""
+HTTP caching helpers: strong ETags and conditional GET.
+
+ETags are derived from cheap version markers (row counts and latest
+timestamps) rather than from the serialized body, so a matching
+If-None-Match can be answered with 304 before the full query runs.
+"""
+import hashlib
+from typing import Any
+from uuid import UUID
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.middleware.compression import strip_encoding_suffix
+from app.models.benefit_category import BenefitCategory
+from app.models.category_keyword import CategoryKeyword
+from app.models.employee_benefit_balance import EmployeeBenefitBalance
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from version marker parts."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the request's If-None-Match header matches `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore any W/ prefix; tags of
+    # compressed responses carry the coding, e.g. "v1-br" (see CompressionMiddleware)
+    candidates = [strip_encoding_suffix(tag.strip().removeprefix("W/")) for tag in header.split(",")]
+    return etag in candidates
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    """Attach ETag and Cache-Control headers to a response."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Build an empty 304 Not Modified response."""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def category_set_version(db: Session) -> tuple:
+    """
+    Version marker for the whole category set, including keywords.
+    
+    Any create, update or delete of a category or keyword changes either a
+    row count or a latest timestamp. Runs as a single query.
+    """
+    return tuple(db.execute(select(
+        select(func.count(BenefitCategory.id)).scalar_subquery(),
+        select(func.max(BenefitCategory.updated_at)).scalar_subquery(),
+        select(func.count(CategoryKeyword.id)).scalar_subquery(),
+        select(func.max(CategoryKeyword.created_at)).scalar_subquery(),
+    )).one())
+
+
+def employee_balance_version(db: Session, employee_id: UUID, year: int) -> tuple:
+    """
+    Version marker for an employee's balances in a year.
+    
+    Combines the employee's balance usage totals with the category set
+    version, since limits and category names are part of the balance response.
+    Every debit adds to `monthly_used`, so the totals change with each one;
+    `updated_at` alone does not, because it is set from a time taken before
+    commit and a later commit can carry an older timestamp. Runs as a single
+    query.
+    """
+    balances = select(
+        func.count(EmployeeBenefitBalance.id),
+        func.max(EmployeeBenefitBalance.updated_at),
+        func.sum(EmployeeBenefitBalance.monthly_used),
+        func.sum(EmployeeBenefitBalance.annual_used)
+    ).where(
+        EmployeeBenefitBalance.employee_id == employee_id,
+        EmployeeBenefitBalance.year == year
+    ).subquery()
+    return tuple(db.execute(select(
+        balances,
+        select(func.count(BenefitCategory.id)).scalar_subquery(),
+        select(func.max(BenefitCategory.updated_at)).scalar_subquery(),
+    )).one())
@@ -0,0 +1,239 @@
+"""
+Idempotency keys for reimbursement submission.
+
+A client retrying `POST /reimbursement/submit` with the same `Idempotency-Key`
+gets the original response instead of a second request, OCR run and balance
+debit. The key row is claimed before any work starts; the submission marks it
+completed in the same transaction that commits the request, so a committed
+request is never processed twice. Retries that arrive while the original is
+still running wait for its result. While it runs, the submitting task
+refreshes the key's updated_at every IDEMPOTENCY_HEARTBEAT_SECONDS, so only
+a key whose worker died goes stale and is taken over, however long the
+submission takes.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey, IdempotencyStatus
+from app.services.reimbursement_reader import load_reimbursement_response
+
+logger = logging.getLogger(__name__)
+
+# Keys being processed by this worker, so local retries wake up immediately
+# instead of waiting for the next database poll. Each event is stored with the
+# loop it belongs to, since asyncio events cannot be awaited from another loop.
+_local_events: Dict[Tuple[UUID, str], Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = {}
+
+
+async def claim_idempotency_key(
+    employee_id: UUID,
+    key: str,
+    fingerprint: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Claim an idempotency key or obtain the response it already produced.
+
+    Args:
+        employee_id: UUID of the submitting employee
+        key: Client-supplied Idempotency-Key header value
+        fingerprint: Hash of the request payload, to detect key reuse
+
+    Returns:
+        None if the caller now owns the key and must process the request,
+        otherwise the stored response body to replay
+
+    Raises:
+        HTTPException: 422 if the key was used for a different payload,
+            409 if the original request is still running after the wait timeout
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+
+    while True:
+        with SessionLocal() as session:
+            if _try_insert(session, employee_id, key, fingerprint):
+                _local_events[(employee_id, key)] = (asyncio.get_running_loop(), asyncio.Event())
+                return None
+
+            existing = session.get(IdempotencyKey, (employee_id, key))
+            now = datetime.utcnow()
+            if existing is None:
+                # Released or purged between our insert attempt and the read
+                continue
+            if existing.request_fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used for a different request"
+                )
+            if existing.expires_at < now:
+                session.delete(existing)
+                session.commit()
+                continue
+
+            if existing.status == IdempotencyStatus.COMPLETED:
+                if existing.response_body is not None:
+                    return existing.response_body
+                # Request committed but its response was not stored yet: rebuild it
+                response = load_reimbursement_response(session, existing.request_id)
+                if response is not None:
+                    return response.model_dump(mode="json")
+            elif existing.updated_at < now - timedelta(seconds=settings.IDEMPOTENCY_STALE_SECONDS):
+                # No heartbeat: the worker that claimed the key died mid-request; take it over
+                if _try_take_over(session, existing):
+                    _local_events[(employee_id, key)] = (asyncio.get_running_loop(), asyncio.Event())
+                    return None
+
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still being processed"
+            )
+        await _wait_for_result(employee_id, key)
+
+
+@asynccontextmanager
+async def idempotency_key_heartbeat(employee_id: UUID, key: str) -> AsyncIterator[None]:
+    """Keep a claimed key fresh while the block runs, so retries do not take it over."""
+    task = asyncio.create_task(_heartbeat(employee_id, key))
+    try:
+        yield
+    finally:
+        task.cancel()
+
+
+def mark_idempotency_key_completed(db: Session, employee_id: UUID, key: str, request_id: UUID) -> None:
+    """Mark a key completed inside the transaction that commits the request."""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.employee_id == employee_id,
+        IdempotencyKey.key == key
+    ).update({
+        "status": IdempotencyStatus.COMPLETED,
+        "request_id": request_id,
+        "updated_at": datetime.utcnow()
+    }, synchronize_session=False)
+
+
+def store_idempotency_response(db: Session, employee_id: UUID, key: str, body: Dict[str, Any]) -> None:
+    """Store the final response for replay and wake up local waiters."""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.employee_id == employee_id,
+        IdempotencyKey.key == key
+    ).update({"response_body": body}, synchronize_session=False)
+    db.commit()
+    _notify(employee_id, key)
+
+
+def release_idempotency_key(employee_id: UUID, key: str) -> None:
+    """Drop an in-progress key after a failure so a retry can run the request again."""
+    with SessionLocal() as session:
+        session.query(IdempotencyKey).filter(
+            IdempotencyKey.employee_id == employee_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS
+        ).delete(synchronize_session=False)
+        session.commit()
+    _notify(employee_id, key)
+
+
+def purge_expired_idempotency_keys(db: Session, batch_size: int = 10000) -> int:
+    """
+    Delete expired keys in bulk.
+
+    Deletes in batches so a large backlog does not hold one long transaction.
+
+    Returns:
+        Number of keys deleted
+    """
+    total = 0
+    while True:
+        result = db.execute(
+            text(
+                "DELETE FROM idempotency_keys WHERE ctid IN ("
+                "SELECT ctid FROM idempotency_keys WHERE expires_at < :now LIMIT :limit)"
+            ),
+            {"now": datetime.utcnow(), "limit": batch_size}
+        )
+        db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+def _try_insert(session: Session, employee_id: UUID, key: str, fingerprint: str) -> bool:
+    now = datetime.utcnow()
+    inserted = session.execute(
+        pg_insert(IdempotencyKey).values(
+            employee_id=employee_id,
+            key=key,
+            status=IdempotencyStatus.IN_PROGRESS,
+            request_fingerprint=fingerprint,
+            created_at=now,
+            updated_at=now,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        ).on_conflict_do_nothing().returning(IdempotencyKey.key)
+    ).first()
+    session.commit()
+    return inserted is not None
+
+
+def _try_take_over(session: Session, existing: IdempotencyKey) -> bool:
+    # Compare-and-set on updated_at so only one retry wins the takeover
+    updated = session.query(IdempotencyKey).filter(
+        IdempotencyKey.employee_id == existing.employee_id,
+        IdempotencyKey.key == existing.key,
+        IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS,
+        IdempotencyKey.updated_at == existing.updated_at
+    ).update({"updated_at": datetime.utcnow()}, synchronize_session=False)
+    session.commit()
+    return updated == 1
+
+
+async def _heartbeat(employee_id: UUID, key: str) -> None:
+    while True:
+        await asyncio.sleep(settings.IDEMPOTENCY_HEARTBEAT_SECONDS)
+        try:
+            await asyncio.to_thread(_touch, employee_id, key)
+        except Exception as e:
+            # Retried on the next beat; only missing beats for IDEMPOTENCY_STALE_SECONDS matters
+            logger.warning("Failed to refresh idempotency key %s: %s", key, e)
+
+
+def _touch(employee_id: UUID, key: str) -> None:
+    with SessionLocal() as session:
+        session.query(IdempotencyKey).filter(
+            IdempotencyKey.employee_id == employee_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS
+        ).update({"updated_at": datetime.utcnow()}, synchronize_session=False)
+        session.commit()
+
+
+async def _wait_for_result(employee_id: UUID, key: str) -> None:
+    local = _local_events.get((employee_id, key))
+    if local is None or local[0] is not asyncio.get_running_loop():
+        # Processed by another worker: poll the database
+        await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+        return
+    event = local[1]
+    try:
+        await asyncio.wait_for(event.wait(), timeout=settings.IDEMPOTENCY_POLL_INTERVAL)
+    except asyncio.TimeoutError:
+        pass
+
+
+def _notify(employee_id: UUID, key: str) -> None:
+    local = _local_events.pop((employee_id, key), None)
+    if local is not None:
+        loop, event = local
+        loop.call_soon_threadsafe(event.set)
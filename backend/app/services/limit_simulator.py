@@ -0,0 +1,301 @@
+"""
+What-if simulation of category limit changes.
+
+A year of a category's validated requests (approved or rejected, in
+submission order) is loaded into NumPy arrays and replayed against the rules
+of `validate_reimbursement` under the current and the proposed limits:
+transaction limit, then monthly usage, then annual usage, where usage only
+counts previously approved requests. All amounts are integer USD cents.
+
+A request's outcome depends on which earlier requests were approved, so
+cumulative sums alone are not enough. Running monthly and annual sums per
+employee (assuming every request was approved) are exact up to an employee's
+first limit violation, which settles most requests at once; from there the
+affected employees are replayed request by request, all in lockstep, so the
+number of steps is the longest such tail, not the number of requests.
+
+Only the live partitions are read: a year reaching back past
+ARCHIVE_RETENTION_MONTHS is replayed without its archived months, which
+understates earlier usage towards the annual limit.
+
+Loading, parsing and replaying block for up to seconds on large categories,
+so they run in worker threads; only the exchange rate lookups stay on the
+event loop.
+"""
+import asyncio
+import io
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.benefit_category import BenefitCategory
+from app.models.reimbursement_request import RequestStatus
+from app.services.currency_service import get_exchange_rate_to_usd
+
+# Loaded histories are reused for this long, so trying several proposals
+# for a category does not reload its requests (per process)
+HISTORY_CACHE_SECONDS = 300
+# At most this many histories are kept; the oldest is evicted first
+HISTORY_CACHE_SIZE = 16
+_history_cache: Dict[Tuple[UUID, int], Tuple[Dict[str, np.ndarray], float]] = {}
+
+# Requests that went through validation; pending reviews never did. Rows are
+# grouped and ordered in NumPy, which is much cheaper than sorting in the query.
+HISTORY_SQL = """
+COPY (
+    SELECT employee_id, submission_timestamp, (amount * 100)::bigint, upper(currency)
+    FROM reimbursement_requests
+    WHERE category_id = %(category_id)s
+      AND status IN %(statuses)s
+      AND submission_timestamp >= %(start)s AND submission_timestamp < %(end)s
+) TO STDOUT WITH (FORMAT csv)
+"""
+
+# Outcome codes of the replay
+APPROVED, OVER_TRANSACTION, OVER_MONTHLY, OVER_ANNUAL = 0, 1, 2, 3
+
+
+async def simulate_limits(
+    db: Session,
+    category: BenefitCategory,
+    year: int,
+    max_transaction_amount: Optional[Decimal] = None,
+    monthly_limit: Optional[Decimal] = None,
+    annual_limit: Optional[Decimal] = None
+) -> Dict[str, Any]:
+    """
+    Replay a year of a category's requests under its current and proposed limits.
+
+    Args:
+        db: Database session
+        category: Category whose limits would change
+        year: Calendar year to replay (annual limits reset each year)
+        max_transaction_amount: Proposed transaction limit (default: unchanged)
+        monthly_limit: Proposed monthly limit (default: unchanged)
+        annual_limit: Proposed annual limit (default: unchanged)
+
+    Returns:
+        Outcome counts under both sets of limits and the approval delta
+    """
+    started = time.perf_counter()
+    history = await _load_history(db, category.id, year)
+
+    current = (category.max_transaction_amount, category.monthly_limit, category.annual_limit)
+    proposed = (
+        category.max_transaction_amount if max_transaction_amount is None else max_transaction_amount,
+        category.monthly_limit if monthly_limit is None else monthly_limit,
+        category.annual_limit if annual_limit is None else annual_limit,
+    )
+    comparison = await asyncio.to_thread(
+        _compare,
+        history,
+        tuple(_cents(limit) for limit in current),
+        tuple(_cents(limit) for limit in proposed)
+    )
+    return {
+        "category_id": category.id,
+        "year": year,
+        **comparison,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def replay(history: Dict[str, np.ndarray], max_transaction: int, monthly_limit: int, annual_limit: int) -> np.ndarray:
+    """
+    Replay the validation rules over a history and return each request's outcome code.
+
+    `history` holds equally long arrays sorted by employee, then submission
+    time: `employee` (group number), `month` and `amount` (USD cents).
+    """
+    employee, month, amount = history["employee"], history["month"], history["amount"]
+    outcome = np.where(amount > max_transaction, OVER_TRANSACTION, APPROVED).astype(np.int8)
+    if not amount.size:
+        return outcome
+
+    new_group = np.empty(amount.size, dtype=bool)
+    new_group[0] = True
+    np.not_equal(employee[1:], employee[:-1], out=new_group[1:])
+    new_period = new_group.copy()
+    new_period[1:] |= month[1:] != month[:-1]
+
+    # Running sums as if every request within the transaction limit was approved;
+    # they are exact up to each employee's first limit violation
+    used = np.where(outcome == APPROVED, amount, 0)
+    monthly_used = _segment_cumsum(used, new_period)
+    annual_used = _segment_cumsum(used, new_group)
+    violation = (outcome == APPROVED) & ((monthly_used > monthly_limit) | (annual_used > annual_limit))
+    if not violation.any():
+        return outcome
+
+    # From its first violation on, each affected employee is replayed request by
+    # request, all employees in lockstep (longest remaining history first)
+    group_number = np.cumsum(new_group) - 1
+    group_end = np.append(np.flatnonzero(new_group)[1:], amount.size)
+    violating = np.flatnonzero(violation)
+    position = violating[np.unique(group_number[violating], return_index=True)[1]]
+    end = group_end[group_number[position]]
+    order = np.argsort(position - end, kind="stable")
+    position, end = position[order], end[order]
+    month_total = (monthly_used - used)[position]
+    year_total = (annual_used - used)[position]
+    current_month = month[position]
+
+    active = position.size
+    while active:
+        rows = position[:active]
+        requested, period = amount[rows], month[rows]
+        month_total[:active][period != current_month[:active]] = 0
+        current_month[:active] = period
+
+        candidate = outcome[rows] == APPROVED
+        over_monthly = candidate & (requested > monthly_limit - month_total[:active])
+        over_annual = candidate & ~over_monthly & (requested > annual_limit - year_total[:active])
+        outcome[rows[over_monthly]] = OVER_MONTHLY
+        outcome[rows[over_annual]] = OVER_ANNUAL
+
+        approved = np.where(candidate & ~over_monthly & ~over_annual, requested, 0)
+        month_total[:active] += approved
+        year_total[:active] += approved
+        position[:active] += 1
+        # Sorted by remaining length, so finished employees are at the end
+        active = int(np.count_nonzero(position[:active] < end[:active]))
+    return outcome
+
+
+def _compare(
+    history: Dict[str, np.ndarray],
+    current: Tuple[int, int, int],
+    proposed: Tuple[int, int, int]
+) -> Dict[str, Any]:
+    """Replay a history under both sets of limits (in cents) and compare the outcomes."""
+    current_outcome = replay(history, *current)
+    proposed_outcome = replay(history, *proposed)
+
+    was_approved = current_outcome == APPROVED
+    is_approved = proposed_outcome == APPROVED
+    current_summary = _summarize(history, current_outcome)
+    proposed_summary = _summarize(history, proposed_outcome)
+    return {
+        "requests": int(history["amount"].size),
+        "current": current_summary,
+        "proposed": proposed_summary,
+        "approval_delta": proposed_summary["approved"] - current_summary["approved"],
+        "approved_amount_delta": proposed_summary["approved_amount"] - current_summary["approved_amount"],
+        "newly_approved": int(np.count_nonzero(is_approved & ~was_approved)),
+        "newly_rejected": int(np.count_nonzero(was_approved & ~is_approved)),
+    }
+
+
+def _segment_cumsum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Running sums of `values` restarting wherever `starts` is True."""
+    totals = np.cumsum(values)
+    before = (totals - values)[starts]
+    return totals - before[np.cumsum(starts) - 1]
+
+
+def _summarize(history: Dict[str, np.ndarray], outcome: np.ndarray) -> Dict[str, Any]:
+    approved = outcome == APPROVED
+    return {
+        "approved": int(np.count_nonzero(approved)),
+        "approved_amount": Decimal(int(history["amount"][approved].sum())).scaleb(-2),
+        "rejected_transaction_limit": int(np.count_nonzero(outcome == OVER_TRANSACTION)),
+        "rejected_monthly_limit": int(np.count_nonzero(outcome == OVER_MONTHLY)),
+        "rejected_annual_limit": int(np.count_nonzero(outcome == OVER_ANNUAL)),
+    }
+
+
+def _cents(value: Decimal) -> int:
+    return int(Decimal(value) * 100)
+
+
+async def _load_history(db: Session, category_id: UUID, year: int) -> Dict[str, np.ndarray]:
+    """Load (or reuse) a category's validated requests of a year as arrays."""
+    cached = _history_cache.get((category_id, year))
+    if cached and time.monotonic() - cached[1] < HISTORY_CACHE_SECONDS:
+        return cached[0]
+
+    # The session is only used by this request and is not touched while the thread runs
+    table = await asyncio.to_thread(_read_history, db, category_id, year)
+    if table is not None:
+        # Rates may be fetched over the network, so they are looked up on the event loop
+        currencies = table["currency"].unique().to_pylist()
+        rates = [float(await get_exchange_rate_to_usd(currency)) for currency in currencies]
+        history = await asyncio.to_thread(_history_arrays, table, currencies, rates)
+    else:
+        history = {
+            "employee": np.empty(0, np.int32),
+            "month": np.empty(0, np.int8),
+            "amount": np.empty(0, np.int64),
+        }
+    _cache_history((category_id, year), history)
+    return history
+
+
+def _cache_history(key: Tuple[UUID, int], history: Dict[str, np.ndarray]) -> None:
+    """Cache a history, dropping expired entries and the oldest beyond HISTORY_CACHE_SIZE."""
+    now = time.monotonic()
+    for stale in [k for k, (_, loaded) in _history_cache.items() if now - loaded >= HISTORY_CACHE_SECONDS]:
+        del _history_cache[stale]
+    _history_cache.pop(key, None)
+    while len(_history_cache) >= HISTORY_CACHE_SIZE:
+        # Dicts keep insertion order, so the first entry is the oldest
+        del _history_cache[next(iter(_history_cache))]
+    _history_cache[key] = (history, now)
+
+
+def _read_history(db: Session, category_id: UUID, year: int):
+    """COPY a category's validated requests of a year into an Arrow table (None if there are none)."""
+    # Imported on first use: pyarrow is large and only needed here and in exports
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    # COPY + the Arrow CSV reader is far cheaper than building a million Python row objects
+    cursor = db.connection().connection.cursor()
+    buffer = io.BytesIO()
+    cursor.copy_expert(cursor.mogrify(HISTORY_SQL, {
+        "category_id": str(category_id),
+        "statuses": (RequestStatus.APPROVED.name, RequestStatus.REJECTED.name),
+        "start": datetime(year, 1, 1),
+        "end": datetime(year + 1, 1, 1),
+    }).decode(), buffer)
+    if not buffer.tell():
+        return None
+    buffer.seek(0)
+    return pa_csv.read_csv(
+        buffer,
+        read_options=pa_csv.ReadOptions(column_names=["employee_id", "submitted_at", "amount_cents", "currency"]),
+        convert_options=pa_csv.ConvertOptions(column_types={
+            "employee_id": pa.string(),
+            "submitted_at": pa.timestamp("us"),
+            "amount_cents": pa.int64(),
+            "currency": pa.string(),
+        })
+    )
+
+
+def _history_arrays(table, currencies: List[str], rates: List[float]) -> Dict[str, np.ndarray]:
+    """Convert the loaded rows into arrays in USD cents, sorted by employee and submission time."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    # Convert to USD per distinct currency, rounding down to cents like convert_to_usd
+    codes = pc.index_in(table["currency"], value_set=pa.array(currencies, pa.string())).to_numpy()
+    # The epsilon keeps float error from rounding exact cents down
+    amount = np.floor(table["amount_cents"].to_numpy() * np.array(rates)[codes] + 1e-6).astype(np.int64)
+
+    # Number the employees and order each one's requests by submission time
+    employee = pc.dictionary_encode(table["employee_id"]).combine_chunks().indices.to_numpy()
+    submitted_at = table["submitted_at"].to_numpy()
+    order = np.lexsort((submitted_at, employee))
+    months = submitted_at[order].astype("datetime64[M]").astype(np.int64) % 12 + 1
+
+    return {
+        "employee": employee[order],
+        "month": months.astype(np.int8),
+        "amount": amount[order],
+    }
@@ -0,0 +1,178 @@
+"""
+Token and latency accounting of LLM calls.
+
+`chat_completion` records every call (model, prompt and completion tokens,
+API latency, time queued for rate limit budget, retries, error) in
+`llm_calls`, tagged with the reimbursement request being processed. Callers
+set the request with `llm_request(request_id)`; the tag travels in a context
+variable, so the OCR and matching services need not pass it along.
+
+Records are written on their own autocommit connection, in a worker thread,
+so calls of a submission that is rolled back are still accounted for and the
+event loop never waits on the database. Like progress events, accounting is
+best-effort and never fails the call it describes.
+"""
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Date, cast, column, func, select, table, text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.models.llm_call import LLMCall
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("ocr", "category_match")
+
+_current_request: ContextVar[Optional[UUID]] = ContextVar("llm_request_id", default=None)
+
+RECORD_CALL_SQL = """
+INSERT INTO llm_calls
+    (id, request_id, stage, model, priority, prompt_tokens, completion_tokens, total_tokens,
+     latency_ms, queue_ms, retries, error, created_at)
+VALUES (gen_random_uuid(), :request_id, :stage, :model, :priority, :prompt_tokens, :completion_tokens,
+        :total_tokens, :latency_ms, :queue_ms, :retries, :error, now() AT TIME ZONE 'utc')
+"""
+
+usage_daily = table(
+    "llm_usage_daily",
+    column("day"),
+    column("model"),
+    column("stage"),
+    column("calls"),
+    column("failed_calls"),
+    column("prompt_tokens"),
+    column("completion_tokens"),
+    column("total_tokens"),
+    column("avg_latency_ms"),
+    column("p50_latency_ms"),
+    column("p95_latency_ms"),
+    column("avg_queue_ms"),
+    column("retries"),
+)
+
+
+@contextmanager
+def llm_request(request_id: UUID) -> Iterator[None]:
+    """Attribute the LLM calls made inside the block to a reimbursement request."""
+    token = _current_request.set(request_id)
+    try:
+        yield
+    finally:
+        _current_request.reset(token)
+
+
+def record_llm_call(
+    stage: str,
+    model: str,
+    priority: str,
+    usage: Any = None,
+    latency_ms: Optional[float] = None,
+    queue_ms: float = 0,
+    retries: int = 0,
+    error: Optional[str] = None
+) -> asyncio.Future:
+    """
+    Persist one call for the current request (best-effort).
+    
+    The INSERT runs in a worker thread, so a busy connection pool never blocks
+    the event loop. Returns the write's future: await it, or leave it to finish
+    in the background (e.g. when the caller was cancelled).
+    """
+    params = {
+        "request_id": _current_request.get(),
+        "stage": stage,
+        "model": model,
+        "priority": priority,
+        "prompt_tokens": usage.prompt_tokens if usage else None,
+        "completion_tokens": usage.completion_tokens if usage else None,
+        "total_tokens": usage.total_tokens if usage else None,
+        "latency_ms": round(latency_ms) if latency_ms is not None else None,
+        "queue_ms": round(queue_ms),
+        "retries": retries,
+        "error": error,
+    }
+    return asyncio.get_running_loop().run_in_executor(None, _insert_call, params)
+
+
+def _insert_call(params: Dict[str, Any]) -> None:
+    try:
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.execute(text(RECORD_CALL_SQL), params)
+    except Exception as e:
+        logger.warning("Failed to record %s call to %s: %s", params["stage"], params["model"], e)
+
+
+def usage_by_day(
+    db: Session,
+    start: date,
+    end: date,
+    model: Optional[str] = None,
+    stage: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Daily calls, tokens and latencies per model and stage.
+
+    Args:
+        db: Database session
+        start: First day (inclusive)
+        end: Last day (inclusive)
+        model: Restrict to one model
+        stage: Restrict to one stage
+
+    Returns:
+        One item per day, model and stage, newest day first
+    """
+    view = usage_daily
+    query = select(view).where(view.c.day >= start, view.c.day <= end)
+    if model:
+        query = query.where(view.c.model == model)
+    if stage:
+        query = query.where(view.c.stage == stage)
+    query = query.order_by(view.c.day.desc(), view.c.model, view.c.stage)
+    return [dict(row._mapping) for row in db.execute(query)]
+
+
+def costliest_requests(
+    db: Session,
+    start: date,
+    end: date,
+    order_by: str = "tokens",
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Requests with the most tokens (or the longest LLM time) over a range of days.
+
+    Returns:
+        Per request: calls, tokens, total latency and retries
+    """
+    # Same expression as ix_llm_calls_day
+    day = cast(LLMCall.created_at, Date)
+    total_tokens = func.coalesce(func.sum(LLMCall.total_tokens), 0).label("total_tokens")
+    latency = func.coalesce(func.sum(LLMCall.latency_ms), 0).label("latency_ms")
+    query = select(
+        LLMCall.request_id,
+        func.count().label("calls"),
+        func.coalesce(func.sum(LLMCall.prompt_tokens), 0).label("prompt_tokens"),
+        func.coalesce(func.sum(LLMCall.completion_tokens), 0).label("completion_tokens"),
+        total_tokens,
+        latency,
+        func.sum(LLMCall.retries).label("retries"),
+    ).where(
+        LLMCall.request_id.is_not(None), day >= start, day <= end
+    ).group_by(LLMCall.request_id).order_by(
+        (total_tokens if order_by == "tokens" else latency).desc()
+    ).limit(limit)
+    return [dict(row._mapping) for row in db.execute(query)]
+
+
+def request_llm_calls(db: Session, request_id: UUID) -> List[LLMCall]:
+    """All calls made for a request, oldest first."""
+    return db.query(LLMCall).filter(LLMCall.request_id == request_id).order_by(LLMCall.created_at).all()
@@ -1,27 +1,38 @@
 """
 OCR service using OpenAI Vision API.
 """
+import base64
 import json
 from typing import Dict, Any, Optional
-from openai import OpenAI
 from fastapi import HTTPException
 
 from app.config import settings
+from app.services.openai_scheduler import INTERACTIVE, chat_completion
 
 
-def get_openai_client():
-    """Get OpenAI client instance."""
-    if not settings.OPENAI_API_KEY:
-        raise ValueError("OPENAI_API_KEY is not set")
-    return OpenAI(api_key=settings.OPENAI_API_KEY)
+def invoice_content_part(image_url: Optional[str], content: Optional[bytes] = None, content_type: Optional[str] = None) -> Dict[str, Any]:
+    """Message part carrying the invoice: its URL, or its bytes as a data URL in inline mode."""
+    if content is None or settings.OCR_IMAGE_MODE != "inline":
+        return {"type": "image_url", "image_url": {"url": image_url}}
+    data_url = f"data:{content_type};base64,{base64.b64encode(content).decode()}"
+    if content_type == "application/pdf":
+        # Image parts only take images; PDFs are sent as a file part
+        return {"type": "file", "file": {"filename": "invoice.pdf", "file_data": data_url}}
+    return {"type": "image_url", "image_url": {"url": data_url}}
 
 
-async def extract_invoice_data(image_url: str) -> Dict[str, Any]:
+async def extract_invoice_data(
+    image_url: Optional[str],
+    content: Optional[bytes] = None,
+    content_type: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Extract invoice data from image using OpenAI Vision API.
     
     Args:
-        image_url: URL of the invoice image
+        image_url: URL of the invoice image (may be None when `content` is sent inline)
+        content: The file's bytes, sent instead of the URL when OCR_IMAGE_MODE is inline
+        content_type: Content type of `content`
         
     Returns:
         Dictionary with extracted invoice data
@@ -29,13 +40,14 @@ async def extract_invoice_data(image_url: str) -> Dict[str, Any]:
     Raises:
         HTTPException: If OCR fails
     """
+    invoice_part = invoice_content_part(image_url, content, content_type)
     try:
-        client = get_openai_client()
-        
         # Use gpt-4o for vision (supports both text and images)
         # Alternative: "gpt-4-turbo" or "gpt-4-vision-preview" if gpt-4o doesn't work
         try:
-            response = client.chat.completions.create(
+            response = await chat_completion(
+                stage="ocr",
+                priority=INTERACTIVE,
                 model="gpt-4o",
                 messages=[
                     {
@@ -61,21 +73,21 @@ async def extract_invoice_data(image_url: str) -> Dict[str, Any]:
 
 Be as accurate as possible. If a field is not found, use null."""
                         },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": image_url
-                            }
-                        }
+                        invoice_part
                     ]
                 }
             ],
                 max_tokens=2000,
             )
+        except HTTPException:
+            # Not scheduled in time; the fallback model would not be either
+            raise
         except Exception as model_error:
             # Fallback to gpt-4-turbo if gpt-4o fails
             print(f"Error with gpt-4o, trying gpt-4-turbo: {str(model_error)}")
-            response = client.chat.completions.create(
+            response = await chat_completion(
+                stage="ocr",
+                priority=INTERACTIVE,
                 model="gpt-4-turbo",
                 messages=[
                     {
@@ -101,12 +113,7 @@ Be as accurate as possible. If a field is not found, use null."""
 
 Be as accurate as possible. If a field is not found, use null."""
                             },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": image_url
-                                }
-                            }
+                            invoice_part
                         ]
                     }
                 ],
@@ -126,6 +133,8 @@ Be as accurate as possible. If a field is not found, use null."""
         
         return invoice_data
         
+    except HTTPException:
+        raise
     except ValueError as e:
         # API key not set
         raise HTTPException(
@@ -0,0 +1,369 @@
+"""
+Rate-limited scheduling of OpenAI calls.
+
+Every chat completion goes through `chat_completion`, which waits for room
+in the model's requests-per-minute and tokens-per-minute budgets before the
+call is made. Budgets are token buckets refilled continuously. A call
+reserves its estimated tokens up front (prompt estimate plus `max_tokens`,
+which is how the provider counts them) and is settled with the actual usage
+afterwards.
+
+Waiting calls are served by priority: interactive submissions before
+background re-processing, first come first served within a priority. A 429
+pauses the model's queue for the advertised Retry-After (or an exponential
+backoff) and the call is retried ahead of later arrivals.
+
+Budgets are per process. With several workers each takes an equal share
+(OPENAI_LIMIT_WORKERS), so the workers together stay within the account
+limits without coordinating.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.services.llm_usage import record_llm_call
+
+logger = logging.getLogger(__name__)
+
+# Priorities (lower is served first)
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Pre-call estimate: ~4 characters per token of English text, a few tokens of
+# framing per message, and a tall receipt image at high detail (6 tiles on gpt-4o;
+# a one-page PDF costs about the same)
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+IMAGE_TOKENS = 1105
+
+# Recent waits kept per priority for the metrics
+WAIT_SAMPLES = 1000
+
+_sequence = itertools.count()
+_schedulers: Dict[str, "ModelScheduler"] = {}
+_client = None
+
+
+class _TokenBucket:
+    """Budget per minute, refilled continuously; may go negative after under-estimates."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (calls above the capacity wait for a full bucket)."""
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "future", "enqueued")
+
+    def __init__(self, priority: int, seq: int, tokens: int, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.future = future
+        self.enqueued = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class ModelScheduler:
+    """Priority queue of calls to one model, released within its RPM/TPM budgets."""
+
+    def __init__(self, model: str, requests_per_minute: float, tokens_per_minute: float):
+        self.model = model
+        self._requests = _TokenBucket(requests_per_minute)
+        self._tokens = _TokenBucket(tokens_per_minute)
+        self._queue: List[_Waiter] = []
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waits: Dict[int, Deque[float]] = {p: deque(maxlen=WAIT_SAMPLES) for p in PRIORITY_NAMES}
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.queue_timeouts = 0
+        self.tokens_reserved = 0
+        self.tokens_used = 0
+
+    async def acquire(self, tokens: int, priority: int, timeout: Optional[float] = None, seq: Optional[int] = None) -> float:
+        """
+        Wait until the call may be made and reserve its budget.
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            asyncio.TimeoutError: If no slot was granted within `timeout`
+        """
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, next(_sequence) if seq is None else seq, tokens, loop.create_future())
+        heapq.heappush(self._queue, waiter)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except asyncio.TimeoutError:
+            self.queue_timeouts += 1
+            raise
+        except asyncio.CancelledError:
+            # Granted just before the caller went away: give the budget back
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(tokens, 0)
+            raise
+        return time.monotonic() - waiter.enqueued
+
+    def release(self, reserved: int, used: int) -> None:
+        """Settle a call: refund (or charge) the difference between estimate and usage."""
+        self.in_flight -= 1
+        self.tokens_used += used
+        now = time.monotonic()
+        self._tokens.refill(now)
+        self._tokens.level = min(self._tokens.capacity, self._tokens.level + reserved - used)
+        self._dispatch()
+
+    def pause(self, seconds: float) -> None:
+        """Hold the whole queue after a 429."""
+        self.rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _dispatch(self) -> None:
+        """Grant waiting calls in priority order while the budgets allow."""
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        while self._queue:
+            head = self._queue[0]
+            # Timed out, cancelled, or left behind by a closed event loop
+            if head.future.done() or head.future.get_loop().is_closed():
+                heapq.heappop(self._queue)
+                continue
+            delay = max(
+                self._paused_until - now,
+                self._requests.wait_time(1),
+                self._tokens.wait_time(head.tokens)
+            )
+            if delay > 0:
+                self._wake_in(delay)
+                return
+            heapq.heappop(self._queue)
+            self._requests.level -= 1
+            self._tokens.level -= head.tokens
+            self.in_flight += 1
+            self.tokens_reserved += head.tokens
+            self._waits[head.priority].append(now - head.enqueued)
+            head.future.set_result(None)
+
+    def _wake_in(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        due = loop.time() + delay
+        if self._timer is not None and self._timer_loop is loop and not self._timer.cancelled() and self._timer.when() <= due:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_at(due, self._on_timer)
+        self._timer_loop = loop
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, wait times and budget usage of this process."""
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for waiter in self._queue:
+            if not waiter.future.done():
+                depth[PRIORITY_NAMES[waiter.priority]] += 1
+        waits = {}
+        for priority, samples in self._waits.items():
+            ordered = sorted(samples)
+            waits[PRIORITY_NAMES[priority]] = {
+                "samples": len(ordered),
+                "avg_ms": round(sum(ordered) / len(ordered) * 1000, 1) if ordered else None,
+                "p95_ms": round(ordered[math.ceil(len(ordered) * 0.95) - 1] * 1000, 1) if ordered else None,
+                "max_ms": round(ordered[-1] * 1000, 1) if ordered else None,
+            }
+        return {
+            "model": self.model,
+            "requests_per_minute": self._requests.capacity,
+            "tokens_per_minute": self._tokens.capacity,
+            "queue_depth": depth,
+            "wait": waits,
+            "in_flight": self.in_flight,
+            "rate_limited": self.rate_limited,
+            "queue_timeouts": self.queue_timeouts,
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 1),
+            "tokens_reserved": self.tokens_reserved,
+            "tokens_used": self.tokens_used,
+        }
+
+
+def get_scheduler(model: str) -> ModelScheduler:
+    """Scheduler of a model, with this process's share of its budgets."""
+    scheduler = _schedulers.get(model)
+    if scheduler is None:
+        requests_per_minute, tokens_per_minute = _model_limits().get(
+            model, (settings.OPENAI_RPM_LIMIT, settings.OPENAI_TPM_LIMIT)
+        )
+        workers = max(1, settings.OPENAI_LIMIT_WORKERS)
+        scheduler = ModelScheduler(model, requests_per_minute / workers, tokens_per_minute / workers)
+        _schedulers[model] = scheduler
+    return scheduler
+
+
+def scheduler_metrics() -> List[Dict[str, Any]]:
+    """Metrics of every model called so far in this process."""
+    return [scheduler.metrics() for scheduler in _schedulers.values()]
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: int) -> int:
+    """Tokens a call will be charged up front: prompt estimate plus completion allowance."""
+    chars = 0
+    images = 0
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, str):
+            chars += len(content)
+            continue
+        for part in content:
+            if part.get("type") in ("image_url", "file"):
+                images += 1
+            else:
+                chars += len(part.get("text", ""))
+    prompt = math.ceil(chars / CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS * len(messages) + IMAGE_TOKENS * images
+    return prompt + max_tokens
+
+
+async def chat_completion(stage: str, priority: int = INTERACTIVE, **request: Any) -> Any:
+    """
+    Create a chat completion once the model's budgets allow it.
+
+    The call is recorded in `llm_calls` for the current request (see llm_usage),
+    whether it succeeds or not.
+
+    Args:
+        stage: Pipeline stage making the call ("ocr", "category_match")
+        priority: INTERACTIVE (waits at most OPENAI_QUEUE_TIMEOUT) or BACKGROUND
+        **request: Arguments of `client.chat.completions.create`; `max_tokens` is required
+
+    Returns:
+        The completion
+
+    Raises:
+        ValueError: If OPENAI_API_KEY is not set
+        HTTPException: 503 if an interactive call could not be scheduled in time
+    """
+    client = get_openai_client()
+    timings = {"queue_ms": 0.0, "latency_ms": None, "retries": 0}
+    try:
+        response = await _scheduled_call(client, priority, request, timings)
+    except BaseException as e:
+        detail = e.detail if isinstance(e, HTTPException) else f"{type(e).__name__}: {e}"
+        recording = record_llm_call(stage, request["model"], PRIORITY_NAMES[priority], error=detail, **timings)
+        # A cancelled caller is not held up; the record is written in the background
+        if not isinstance(e, asyncio.CancelledError):
+            await recording
+        raise
+    await record_llm_call(stage, request["model"], PRIORITY_NAMES[priority], usage=response.usage, **timings)
+    return response
+
+
+async def _scheduled_call(client, priority: int, request: Dict[str, Any], timings: Dict[str, Any]) -> Any:
+    """Wait for budget and make the call, retrying 429s and transient errors; fills `timings`."""
+    # Imported on first use: the SDK is slow to import and not needed at startup
+    from openai import APIConnectionError, InternalServerError, RateLimitError
+
+    scheduler = get_scheduler(request["model"])
+    estimate = estimate_tokens(request["messages"], request["max_tokens"])
+    timeout = settings.OPENAI_QUEUE_TIMEOUT if priority == INTERACTIVE else None
+    # Retries keep the call's place in the queue
+    seq = next(_sequence)
+
+    for attempt in range(settings.OPENAI_MAX_RETRIES + 1):
+        timings["retries"] = attempt
+        queued = time.monotonic()
+        try:
+            await scheduler.acquire(estimate, priority, timeout=timeout, seq=seq)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=503,
+                detail="Invoice processing is busy, please retry shortly",
+                headers={"Retry-After": str(math.ceil(settings.OPENAI_QUEUE_TIMEOUT))}
+            )
+        finally:
+            timings["queue_ms"] += (time.monotonic() - queued) * 1000
+        started = time.monotonic()
+        try:
+            response = await asyncio.to_thread(client.chat.completions.create, **request)
+        except RateLimitError as e:
+            # An exhausted quota does not recover by waiting
+            if e.code == "insufficient_quota" or attempt == settings.OPENAI_MAX_RETRIES:
+                scheduler.release(estimate, estimate)
+                raise
+            delay = _retry_after(e) or 2 ** attempt
+            logger.warning("OpenAI rate limit on %s, pausing %.1fs", request["model"], delay)
+            # Paused before releasing: release() dispatches, and nothing may be
+            # granted into the window that just answered 429
+            scheduler.pause(delay)
+            scheduler.release(estimate, estimate)
+            continue
+        except (APIConnectionError, InternalServerError):
+            scheduler.release(estimate, 0)
+            if attempt == settings.OPENAI_MAX_RETRIES:
+                raise
+            await asyncio.sleep(2 ** attempt)
+            continue
+        except BaseException:
+            scheduler.release(estimate, 0)
+            raise
+        finally:
+            timings["latency_ms"] = (time.monotonic() - started) * 1000
+        scheduler.release(estimate, response.usage.total_tokens if response.usage else estimate)
+        return response
+
+
+def get_openai_client():
+    """Get the shared OpenAI client (retries are left to the scheduler)."""
+    global _client
+    if not settings.OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY is not set")
+    if _client is None:
+        # Imported on first use: the SDK is slow to import and not needed at startup
+        from openai import OpenAI
+        _client = OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+    return _client
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _model_limits() -> Dict[str, tuple]:
+    """Parse OPENAI_MODEL_LIMITS, e.g. "gpt-4:500:10000,gpt-4o:500:30000"."""
+    limits = {}
+    for entry in settings.OPENAI_MODEL_LIMITS.split(","):
+        if entry.strip():
+            model, requests_per_minute, tokens_per_minute = entry.strip().rsplit(":", 2)
+            limits[model] = (float(requests_per_minute), float(tokens_per_minute))
+    return limits
@@ -0,0 +1,102 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are fetched with `WHERE (col1, col2) > (:last1, :last2) ORDER BY col1, col2
+LIMIT n`, so the cost of a page does not depend on how deep into the table it is.
+The cursor handed to clients is an opaque, URL-safe encoding of the last row's
+ordering values.
+"""
+import base64
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import literal, tuple_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 500
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode ordering values of the last row into an opaque cursor string."""
+    raw = json.dumps([_to_json(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor back into typed values.
+    
+    Raises:
+        HTTPException: If the cursor is malformed or does not match the ordering
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match ordering")
+        return [_from_json(v, column) for v, column in zip(values, columns)]
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def keyset_paginate(
+    query: Query,
+    columns: Sequence[Any],
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False
+) -> Tuple[list, Optional[str]]:
+    """
+    Apply keyset pagination to a query.
+    
+    Args:
+        query: Query to paginate (filters already applied)
+        columns: Ordering columns; together they must be unique (end with a primary key)
+        cursor: Cursor from the previous page, or None for the first page
+        limit: Maximum number of rows to return
+        descending: Order newest/highest first
+        
+    Returns:
+        Tuple of (rows, next_cursor); next_cursor is None on the last page
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        last = tuple_(*[literal(v, c.type) for v, c in zip(values, columns)])
+        query = query.filter(key < last if descending else key > last)
+    
+    order_by = [c.desc() for c in columns] if descending else list(columns)
+    rows = query.order_by(*order_by).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return rows, next_cursor
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _from_json(value: Any, column: Any) -> Any:
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    return python_type(value)
@@ -0,0 +1,219 @@
+"""
+Monthly partition maintenance for reimbursement requests and invoices.
+
+Both tables are range-partitioned by month on the submission time, with
+partitions named `<table>_y<YYYY>m<MM>`. There is deliberately no DEFAULT
+partition: without one Postgres can scan partitions in order, so newest-first
+listings stop after the latest months. Partitions are therefore created ahead
+of time (at startup, hourly while the app runs, and by `manage.py
+ensure-partitions`), so a long-running worker never reaches a month without
+a partition even when no external job is scheduled. Partitions
+older than the retention window are moved to the archive tables by
+`manage.py archive-partitions`, which keeps the live tables, their indexes
+and vacuum work bounded to recent months.
+"""
+import asyncio
+import logging
+import re
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection
+
+from app.database import engine
+from app.models.archive import ArchivedInvoice, compress_text
+
+logger = logging.getLogger(__name__)
+
+# Parent table -> partition key column. Creation follows this order;
+# archival walks it in reverse because invoices reference requests.
+PARTITIONED_TABLES = {
+    "reimbursement_requests": "submission_timestamp",
+    "invoices": "submitted_at",
+}
+
+REQUEST_COLUMNS = (
+    "id, employee_id, category_id, status, amount, currency, cloudinary_url, "
+    "cloudinary_public_id, submission_timestamp, rejection_reason, created_at, updated_at"
+)
+INVOICE_COLUMNS = (
+    "id, request_id, submitted_at, vendor_name, purchase_date, items, total_amount, "
+    "currency, invoice_number, extracted_text, created_at"
+)
+
+# Invoices are compressed in the application, so they are copied in batches
+ARCHIVE_BATCH_SIZE = 1000
+
+# Serializes partition DDL across workers starting at the same time
+PARTITION_LOCK_ID = 7_263_510_039
+
+_PARTITION_NAME_RE = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    """Return the first day of the month `months` after `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archive_cutoff(retention_months: int) -> date:
+    """First month kept live; earlier months are (or are due to be) in the archive tables."""
+    return add_months(datetime.utcnow().date().replace(day=1), -(retention_months - 1))
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def ensure_partitions(conn: Connection, months_ahead: int = 2, start: Optional[date] = None) -> List[str]:
+    """
+    Create missing monthly partitions from `start` (default: current month)
+    through `months_ahead` months later.
+
+    Args:
+        conn: Connection inside a transaction
+        months_ahead: Number of future months to prepare
+        start: First month to create
+
+    Returns:
+        Names of the partitions that were created
+    """
+    first = (start or datetime.utcnow().date()).replace(day=1)
+    wanted = [add_months(first, n) for n in range(months_ahead + 1)]
+
+    # Cheap existence check first: creating a partition locks the parent table
+    missing = [
+        (table, month)
+        for table in PARTITIONED_TABLES
+        for month in wanted
+        if not _exists(conn, partition_name(table, month))
+    ]
+    if not missing:
+        return []
+
+    conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID})
+    created = []
+    for table, month in missing:
+        name = partition_name(table, month)
+        if _exists(conn, name):
+            continue
+        conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        created.append(name)
+    return created
+
+
+async def maintain_partitions(months_ahead: int, interval_seconds: float) -> None:
+    """
+    Run ensure_partitions every `interval_seconds` for the lifetime of the app.
+
+    Started from the app's lifespan after the startup check; failures are
+    logged and retried at the next interval.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            # DDL and catalog lookups block; keep them off the event loop
+            created = await asyncio.to_thread(_ensure_partitions, months_ahead)
+        except Exception as e:
+            logger.warning("Could not ensure partitions: %s", e)
+            continue
+        if created:
+            logger.info("Created partitions %s", ", ".join(created))
+
+
+def _ensure_partitions(months_ahead: int) -> List[str]:
+    with engine.begin() as conn:
+        return ensure_partitions(conn, months_ahead=months_ahead)
+
+
+def list_month_partitions(conn: Connection, table: str) -> List[Tuple[str, date]]:
+    """Return (partition name, month) for the monthly partitions of `table`, oldest first."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:table AS regclass)"
+    ), {"table": table}).scalars()
+    partitions = []
+    for name in rows:
+        match = _PARTITION_NAME_RE.search(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def archive_partitions(conn: Connection, retention_months: int, dry_run: bool = False) -> List[Dict]:
+    """
+    Move monthly partitions older than the retention window to the archive tables.
+
+    Each month is copied into `reimbursement_requests_archive` / `invoices_archive`
+    and its partitions are dropped, so the live tables shrink by whole
+    partitions instead of by row-wise DELETEs (no bloat, no vacuum debt).
+
+    Args:
+        conn: Connection inside a transaction
+        retention_months: Months kept live, counting the current month
+        dry_run: Only report what would be archived
+
+    Returns:
+        One entry per archived month with its row counts
+    """
+    cutoff = archive_cutoff(retention_months)
+    months = [month for _, month in list_month_partitions(conn, "reimbursement_requests") if month < cutoff]
+
+    archived = []
+    for month in months:
+        requests_partition = partition_name("reimbursement_requests", month)
+        invoices_partition = partition_name("invoices", month)
+        has_invoices = _exists(conn, invoices_partition)
+
+        if dry_run:
+            requests_count = conn.execute(text(f"SELECT count(*) FROM {requests_partition}")).scalar()
+            invoices_count = conn.execute(text(f"SELECT count(*) FROM {invoices_partition}")).scalar() if has_invoices else 0
+        else:
+            requests_count = conn.execute(text(
+                f"INSERT INTO reimbursement_requests_archive ({REQUEST_COLUMNS}, archived_at) "
+                f"SELECT {REQUEST_COLUMNS}, now() AT TIME ZONE 'utc' FROM {requests_partition} "
+                "ON CONFLICT (id) DO NOTHING"
+            )).rowcount
+            invoices_count = _archive_invoices(conn, invoices_partition) if has_invoices else 0
+            # Referencing side first; a partition must be detached before it can be dropped
+            for table in reversed(list(PARTITIONED_TABLES)):
+                name = partition_name(table, month)
+                if _exists(conn, name):
+                    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                    conn.execute(text(f"DROP TABLE {name}"))
+
+        archived.append({
+            "month": month.isoformat()[:7],
+            "requests": requests_count,
+            "invoices": invoices_count,
+        })
+    return archived
+
+
+def _archive_invoices(conn: Connection, partition: str) -> int:
+    """Copy an invoices partition into invoices_archive, compressing extracted_text."""
+    statement = pg_insert(ArchivedInvoice.__table__).on_conflict_do_nothing(index_elements=["id"])
+    result = conn.execute(
+        text(f"SELECT {INVOICE_COLUMNS} FROM {partition}"),
+        execution_options={"stream_results": True, "yield_per": ARCHIVE_BATCH_SIZE}
+    )
+    count = 0
+    for rows in result.mappings().partitions():
+        batch = []
+        for row in rows:
+            values = dict(row)
+            values["extracted_text_compressed"] = compress_text(values.pop("extracted_text"))
+            batch.append(values)
+        conn.execute(statement, batch)
+        count += len(batch)
+    return count
+
+
+def _exists(conn: Connection, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
@@ -0,0 +1,103 @@
+"""
+Monthly period close for employee benefit balances.
+
+Closing a month freezes each employee/category's year-to-date usage into
+that month's balance row (`annual_used`, `closed_at`), and opening a month
+creates its zero-usage balance rows for every employee and category. Both
+are single INSERT ... SELECT statements over employees x categories, so the
+cost is set-based SQL rather than per-row ORM work, and the reimbursement
+path only ever reads or updates existing rows. January starts from zero
+usage, which makes the year rollover explicit.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.partitions import add_months
+
+# Serializes concurrent runs of the close job
+PERIOD_CLOSE_LOCK_ID = 7_263_510_043
+
+OPEN_PERIOD_SQL = """
+INSERT INTO employee_benefit_balances
+    (id, employee_id, category_id, year, month, annual_used, monthly_used, created_at, updated_at)
+SELECT gen_random_uuid(), e.id, c.id, :year, :month, 0, 0, :now, :now
+FROM employees e CROSS JOIN benefit_categories c
+ON CONFLICT (employee_id, category_id, year, month) DO NOTHING
+"""
+
+# Re-running a close refreshes the frozen totals (e.g. after a correction)
+CLOSE_PERIOD_SQL = """
+INSERT INTO employee_benefit_balances
+    (id, employee_id, category_id, year, month, annual_used, monthly_used, created_at, updated_at, closed_at)
+SELECT gen_random_uuid(), e.id, c.id, :year, :month, COALESCE(ytd.used, 0), 0, :now, :now, :now
+FROM employees e CROSS JOIN benefit_categories c
+LEFT JOIN (
+    SELECT employee_id, category_id, sum(monthly_used) AS used
+    FROM employee_benefit_balances
+    WHERE year = :year AND month <= :month
+    GROUP BY employee_id, category_id
+) ytd ON ytd.employee_id = e.id AND ytd.category_id = c.id
+ON CONFLICT (employee_id, category_id, year, month) DO UPDATE
+    SET annual_used = EXCLUDED.annual_used, closed_at = EXCLUDED.closed_at, updated_at = EXCLUDED.updated_at
+"""
+
+
+def open_period(db: Session, year: int, month: int) -> int:
+    """Create missing balance rows of a period; returns the number created."""
+    now = datetime.utcnow()
+    return db.execute(text(OPEN_PERIOD_SQL), {"year": year, "month": month, "now": now}).rowcount
+
+
+def close_period(db: Session, year: int, month: int, months_ahead: int = 1) -> Dict[str, int]:
+    """
+    Freeze a finished month's totals and open the following months, then commit.
+
+    Args:
+        db: Database session
+        year: Year of the month to close
+        month: Month to close (must have ended)
+        months_ahead: Following months whose balance rows are created
+
+    Returns:
+        Counts of frozen rows and of rows opened per following month
+
+    Raises:
+        ValueError: If the month has not ended yet
+    """
+    closed = date(year, month, 1)
+    if add_months(closed, 1) > datetime.utcnow().date():
+        raise ValueError(f"{closed:%Y-%m} has not ended yet")
+
+    db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PERIOD_CLOSE_LOCK_ID})
+    result = {"frozen": db.execute(text(CLOSE_PERIOD_SQL), {
+        "year": year, "month": month, "now": datetime.utcnow()
+    }).rowcount}
+    for offset in range(1, months_ahead + 1):
+        period = add_months(closed, offset)
+        result[f"{period:%Y-%m}"] = open_period(db, period.year, period.month)
+    db.commit()
+    return result
+
+
+def period_usage(rows: Iterable, month: int) -> Tuple[Decimal, Decimal]:
+    """
+    Compute (monthly used, year-to-date used) for `month` from a year's balance rows.
+
+    `rows` are the employee/category's rows of the year up to `month` (with
+    month, monthly_used, annual_used and closed_at). When the previous month is
+    closed its frozen total is used; otherwise the months are summed.
+    """
+    by_month = {row.month: row for row in rows}
+    current = by_month.get(month)
+    monthly_used = current.monthly_used if current is not None else Decimal("0.00")
+
+    previous = by_month.get(month - 1)
+    if previous is not None and previous.closed_at is not None:
+        earlier = previous.annual_used
+    else:
+        earlier = sum((row.monthly_used for m, row in by_month.items() if m < month), Decimal("0.00"))
+    return monthly_used, earlier + monthly_used
@@ -0,0 +1,201 @@
+"""
+Submission progress events.
+
+The submit pipeline publishes its stage transitions (uploaded, OCR done,
+category matched, validated, completed/failed) with Postgres NOTIFY on an
+autocommit connection, so they are delivered while the submission
+transaction is still open and to every worker process. Each worker holds a
+single LISTEN connection and fans notifications out to the Server-Sent
+Events streams subscribed to a request.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Optional, Set
+from uuid import UUID
+
+import orjson
+from fastapi import Request
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models.reimbursement_request import ReimbursementRequest, RequestStatus
+from app.services.request_ids import request_id_filter
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "reimbursement_progress"
+
+# Stages after which the stream ends
+FINAL_STAGES = ("completed", "failed")
+
+# NOTIFY runs on this thread, not the event loop. A single thread sends the
+# events in the order they were published, so a stream never sees a request's
+# final event before its earlier stages.
+_publisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="progress-publisher")
+
+
+def publish_progress(request_id: UUID, stage: str, **data: Any) -> None:
+    """
+    Broadcast a stage transition of a reimbursement request to all workers.
+
+    Progress is best-effort: the event is sent in the background (no pool
+    checkout or round trip on the caller's thread), and a failure to publish is
+    logged and never fails the submission itself. Payloads must stay small
+    (NOTIFY allows 8000 bytes), so send totals and identifiers, not extracted text.
+    """
+    payload = orjson.dumps({"request_id": str(request_id), "stage": stage, "data": data}).decode()
+    _publisher.submit(_notify, request_id, stage, payload)
+
+
+def _notify(request_id: UUID, stage: str, payload: str) -> None:
+    try:
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+    except Exception as e:
+        logger.warning("Failed to publish progress event %s for %s: %s", stage, request_id, e)
+
+
+class ProgressListener:
+    """Per-process LISTEN connection dispatching notifications to subscriber queues."""
+
+    def __init__(self):
+        self._connection = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, request_id: UUID) -> asyncio.Queue:
+        """Start receiving events for `request_id`; pair with unsubscribe()."""
+        self._ensure_listening()
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[str(request_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, request_id: UUID, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(str(request_id))
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[str(request_id)]
+
+    def close(self) -> None:
+        """Stop listening and release the connection (on shutdown)."""
+        if self._connection is None:
+            return
+        try:
+            self._loop.remove_reader(self._connection.fileno())
+        except Exception:
+            pass
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+        self._loop = None
+
+    def _ensure_listening(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._connection is not None and self._loop is loop and not self._connection.closed:
+            return
+        self.close()
+
+        # Take a connection out of the pool for good; it stays in LISTEN mode
+        pooled = engine.raw_connection()
+        connection = pooled.driver_connection
+        pooled.detach()
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+        loop.add_reader(connection.fileno(), self._on_readable)
+        self._connection = connection
+        self._loop = loop
+
+    def _on_readable(self) -> None:
+        try:
+            self._connection.poll()
+        except Exception as e:
+            # Connection lost: streams fall back to polling the request status
+            # until the next subscribe() re-establishes the listener
+            logger.warning("Progress listener connection lost: %s", e)
+            self.close()
+            return
+
+        while self._connection.notifies:
+            notification = self._connection.notifies.pop(0)
+            try:
+                event = orjson.loads(notification.payload)
+            except orjson.JSONDecodeError:
+                continue
+            for queue in self._subscribers.get(event.get("request_id"), ()):
+                queue.put_nowait(event)
+
+
+progress_listener = ProgressListener()
+
+
+async def stream_progress(request_id: UUID, request: Request) -> AsyncIterator[str]:
+    """
+    Yield Server-Sent Events for a reimbursement request until it finishes.
+
+    Sends a comment every PROGRESS_KEEPALIVE_SECONDS so proxies never see an
+    idle connection, and ends after a final event, on client disconnect or
+    after PROGRESS_STREAM_TIMEOUT.
+    """
+    # Subscribe before checking the stored status so a completion in between is not lost
+    queue = progress_listener.subscribe(request_id)
+    try:
+        yield f"retry: {settings.PROGRESS_RETRY_MS}\n\n"
+
+        final = await asyncio.to_thread(_final_event, request_id)
+        if final is not None:
+            yield _format_event(final)
+            return
+
+        deadline = time.monotonic() + settings.PROGRESS_STREAM_TIMEOUT
+        while time.monotonic() < deadline:
+            if await request.is_disconnected():
+                return
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.PROGRESS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Safety net for missed notifications (e.g. listener reconnects)
+                final = await asyncio.to_thread(_final_event, request_id)
+                if final is not None:
+                    yield _format_event(final)
+                    return
+                yield ": keepalive\n\n"
+                continue
+
+            yield _format_event(event)
+            if event["stage"] in FINAL_STAGES:
+                return
+    finally:
+        progress_listener.unsubscribe(request_id, queue)
+
+
+def _final_event(request_id: UUID) -> Optional[Dict[str, Any]]:
+    """Build the final event from the stored request, if it has been committed."""
+    with SessionLocal() as db:
+        row = db.query(
+            ReimbursementRequest.status,
+            ReimbursementRequest.rejection_reason
+        ).filter(
+            *request_id_filter(ReimbursementRequest.id, ReimbursementRequest.submission_timestamp, request_id)
+        ).first()
+    if row is None or row.status == RequestStatus.PROCESSING:
+        return None
+    return {
+        "request_id": str(request_id),
+        "stage": "completed",
+        "data": {"status": row.status.value, "rejection_reason": row.rejection_reason}
+    }
+
+
+def _format_event(event: Dict[str, Any]) -> str:
+    return f"event: {event['stage']}\ndata: {orjson.dumps(event['data']).decode()}\n\n"
@@ -0,0 +1,208 @@
+"""
+Read path for reimbursement request details.
+
+Loads a request together with its invoice, employee, category and the
+employee's current-period balance usage in a single joined query, and
+builds the API response from that one row. Shared by the submit and get
+endpoints. Requests moved to the archive tables are still found, with one
+extra query on a live-table miss. With a field selection, the large invoice
+columns and the balance subqueries are only read when selected.
+"""
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session, undefer
+
+from app.models.benefit_category import BenefitCategory
+from app.models.employee import Employee
+from app.models.employee_benefit_balance import EmployeeBenefitBalance
+from app.models.invoice import Invoice
+from app.models.reimbursement_request import ReimbursementRequest, RequestStatus
+from app.models.archive import ArchivedReimbursementRequest, ArchivedInvoice
+from app.schemas.request import ReimbursementResponse
+from app.services.field_selection import FieldSelection, wants
+from app.services.request_ids import request_id_filter
+
+
+def load_reimbursement_response(
+    db: Session,
+    request_id: UUID,
+    fields: Optional[FieldSelection] = None
+) -> Optional[ReimbursementResponse]:
+    """
+    Load a reimbursement request and build its response in one round trip.
+    
+    Args:
+        db: Database session
+        request_id: UUID of the reimbursement request
+        fields: Selected response fields (None for all); unselected optional
+            fields are left empty instead of being read
+        
+    Returns:
+        Validated ReimbursementResponse, or None if the request does not exist
+    """
+    if not wants(fields, "remaining_balance"):
+        return _load_response(db, request_id, fields)
+    
+    now = datetime.utcnow()
+    
+    # Current-month usage and year-to-date usage for the request's employee/category
+    monthly_used = select(EmployeeBenefitBalance.monthly_used).where(
+        EmployeeBenefitBalance.employee_id == ReimbursementRequest.employee_id,
+        EmployeeBenefitBalance.category_id == ReimbursementRequest.category_id,
+        EmployeeBenefitBalance.year == now.year,
+        EmployeeBenefitBalance.month == now.month
+    ).correlate(ReimbursementRequest).scalar_subquery()
+    annual_used = select(func.sum(EmployeeBenefitBalance.monthly_used)).where(
+        EmployeeBenefitBalance.employee_id == ReimbursementRequest.employee_id,
+        EmployeeBenefitBalance.category_id == ReimbursementRequest.category_id,
+        EmployeeBenefitBalance.year == now.year
+    ).correlate(ReimbursementRequest).scalar_subquery()
+    
+    row = _query_request(
+        db,
+        request_id,
+        fields,
+        BenefitCategory.monthly_limit,
+        BenefitCategory.annual_limit,
+        monthly_used.label("monthly_used"),
+        annual_used.label("annual_used")
+    )
+    if row is None:
+        return _load_archived_response(db, request_id, fields)
+    
+    request = row.ReimbursementRequest
+    
+    # Remaining balance is reported for approved requests with a current-month balance row
+    remaining_balance = None
+    if (
+        request.status == RequestStatus.APPROVED
+        and row.category_name is not None
+        and row.monthly_used is not None
+    ):
+        remaining_balance = min(
+            row.monthly_limit - row.monthly_used,
+            row.annual_limit - row.annual_used
+        )
+    
+    invoice = row.Invoice if wants(fields, "invoice") else None
+    return _build_response(row, request, invoice, fields, remaining_balance)
+
+
+def _load_response(db: Session, request_id: UUID, fields: Optional[FieldSelection]) -> Optional[ReimbursementResponse]:
+    """Load a request without its remaining balance."""
+    row = _query_request(db, request_id, fields)
+    if row is None:
+        return _load_archived_response(db, request_id, fields)
+    invoice = row.Invoice if wants(fields, "invoice") else None
+    return _build_response(row, row.ReimbursementRequest, invoice, fields)
+
+
+def _query_request(db: Session, request_id: UUID, fields: Optional[FieldSelection], *extra_columns):
+    """Fetch the live request row with employee, category and (if selected) invoice."""
+    columns = [
+        ReimbursementRequest,
+        Employee.name.label("employee_name"),
+        Employee.employee_id.label("employee_employee_id"),
+        BenefitCategory.name.label("category_name"),
+        *extra_columns
+    ]
+    if wants(fields, "invoice"):
+        columns.insert(1, Invoice)
+    
+    query = db.query(*columns).join(
+        Employee, Employee.id == ReimbursementRequest.employee_id
+    ).outerjoin(
+        BenefitCategory, BenefitCategory.id == ReimbursementRequest.category_id
+    )
+    if wants(fields, "invoice"):
+        query = query.outerjoin(
+            # Matching on the partition key lets Postgres join partition to partition
+            Invoice, and_(
+                Invoice.request_id == ReimbursementRequest.id,
+                Invoice.submitted_at == ReimbursementRequest.submission_timestamp
+            )
+        ).options(*_invoice_undefer(Invoice, Invoice.extracted_text, fields))
+    return query.filter(
+        *request_id_filter(ReimbursementRequest.id, ReimbursementRequest.submission_timestamp, request_id)
+    ).first()
+
+
+def _load_archived_response(
+    db: Session,
+    request_id: UUID,
+    fields: Optional[FieldSelection] = None
+) -> Optional[ReimbursementResponse]:
+    """Load a request from the archive tables; archived periods report no remaining balance."""
+    columns = [
+        ArchivedReimbursementRequest,
+        Employee.name.label("employee_name"),
+        Employee.employee_id.label("employee_employee_id"),
+        BenefitCategory.name.label("category_name")
+    ]
+    if wants(fields, "invoice"):
+        columns.insert(1, ArchivedInvoice)
+    
+    query = db.query(*columns).join(
+        Employee, Employee.id == ArchivedReimbursementRequest.employee_id
+    ).outerjoin(
+        BenefitCategory, BenefitCategory.id == ArchivedReimbursementRequest.category_id
+    )
+    if wants(fields, "invoice"):
+        query = query.outerjoin(
+            ArchivedInvoice, ArchivedInvoice.request_id == ArchivedReimbursementRequest.id
+        ).options(*_invoice_undefer(ArchivedInvoice, ArchivedInvoice.extracted_text_compressed, fields))
+    row = query.filter(ArchivedReimbursementRequest.id == request_id).first()
+    
+    if row is None:
+        return None
+    invoice = row.ArchivedInvoice if wants(fields, "invoice") else None
+    return _build_response(row, row.ArchivedReimbursementRequest, invoice, fields)
+
+
+def _invoice_undefer(model, text_column, fields: Optional[FieldSelection]) -> list:
+    """Loader options reading the deferred invoice columns that are selected."""
+    options = []
+    if wants(fields, "invoice", "items"):
+        options.append(undefer(model.items))
+    if wants(fields, "invoice", "extracted_text"):
+        options.append(undefer(text_column))
+    return options
+
+
+def _build_response(
+    row,
+    request,
+    invoice,
+    fields: Optional[FieldSelection],
+    remaining_balance=None
+) -> ReimbursementResponse:
+    """Build the response from a request row (live or archived) and its invoice."""
+    return ReimbursementResponse.model_validate({
+        "id": request.id,
+        "employee_id": request.employee_id,
+        "employee_name": row.employee_name,
+        "employee_employee_id": row.employee_employee_id,
+        "category_id": request.category_id,
+        "category_name": row.category_name,
+        "status": request.status,
+        "amount": request.amount,
+        "currency": request.currency,
+        "cloudinary_url": request.cloudinary_url,
+        "submission_timestamp": request.submission_timestamp,
+        "rejection_reason": request.rejection_reason,
+        "invoice": {
+            "vendor_name": invoice.vendor_name,
+            "purchase_date": invoice.purchase_date,
+            # Deferred columns are only touched when loaded, so no extra query is issued
+            "items": invoice.items if wants(fields, "invoice", "items") else None,
+            "total_amount": invoice.total_amount,
+            "currency": invoice.currency,
+            "invoice_number": invoice.invoice_number,
+            "extracted_text": invoice.extracted_text if wants(fields, "invoice", "extracted_text") else None
+        } if invoice else None,
+        "remaining_balance": remaining_balance,  # Always in USD
+        "remaining_balance_currency": "USD"  # Explicitly indicate USD
+    })
@@ -0,0 +1,328 @@
+"""
+Bulk re-match of pending-review requests.
+
+Requests parked in PENDING_REVIEW (category confidence below the threshold)
+are never looked at again by the submit path. After keywords change, a
+re-match job walks them oldest first in keyset batches, with their stored
+invoice text and items, matches them again with bounded concurrency and
+applies the outcomes batch by batch:
+
+- confidence now passes: re-validated and approved (balance debited) or
+  rejected, like a submission
+- otherwise: left pending, with the suggested category updated
+
+Each batch is one transaction that also advances the job's cursor and
+counters, so a job that stops (crash, deploy) resumes after its last
+committed batch. Requests whose matching failed are recorded on the job,
+which then ends FAILED; resuming it retries them before moving on. A session-level advisory lock keeps a single job running;
+Postgres releases it with the connection if the worker dies.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, text, tuple_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models.invoice import Invoice
+from app.models.reimbursement_request import ReimbursementRequest, RequestStatus
+from app.models.rematch_job import RematchJob, RematchJobStatus
+from app.services.category_matcher import classify_invoice, load_category_context
+from app.services.currency_service import convert_to_usd
+from app.services.llm_usage import llm_request
+from app.services.openai_scheduler import BACKGROUND
+from app.services.validator import validate_and_debit
+
+logger = logging.getLogger(__name__)
+
+REMATCH_LOCK_ID = 7_263_510_046
+
+# Same threshold as the submit path
+MIN_CONFIDENCE = 0.7
+
+UPDATE_REQUEST_SQL = """
+UPDATE reimbursement_requests
+SET status = :status, category_id = :category_id, rejection_reason = :rejection_reason, updated_at = :now
+WHERE id = :id AND submission_timestamp = :submitted_at
+"""
+
+
+def create_rematch_job(db: Session) -> RematchJob:
+    """Create a job covering the requests pending review right now."""
+    now = datetime.utcnow()
+    total = db.query(func.count(ReimbursementRequest.id)).filter(
+        ReimbursementRequest.status == RequestStatus.PENDING_REVIEW,
+        ReimbursementRequest.submission_timestamp <= now
+    ).scalar()
+    job = RematchJob(cutoff=now, total=total)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def rematch_running() -> bool:
+    """Return whether a re-match job currently holds the lock."""
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": REMATCH_LOCK_ID}).scalar()
+        if acquired:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": REMATCH_LOCK_ID})
+    return not acquired
+
+
+async def run_rematch_job(
+    job_id: UUID,
+    on_batch: Optional[Callable[[RematchJob], None]] = None
+) -> RematchJob:
+    """
+    Run (or resume) a re-match job until all its requests are processed.
+
+    Args:
+        job_id: Job to run; a failed or interrupted job continues from its cursor
+        on_batch: Called with the job after each committed batch
+
+    Returns:
+        The job, COMPLETED or FAILED (with `error`)
+
+    Raises:
+        ValueError: If a job is already running, or the job is unknown or completed
+    """
+    with engine.connect() as lock_conn:
+        # Autocommit: the lock is held by the session, not by an open transaction
+        lock_conn = lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": REMATCH_LOCK_ID}).scalar():
+            raise ValueError("A re-match job is already running")
+        try:
+            with SessionLocal() as db:
+                return await _run(db, job_id, on_batch)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": REMATCH_LOCK_ID})
+
+
+async def _run(db: Session, job_id: UUID, on_batch: Optional[Callable[[RematchJob], None]]) -> RematchJob:
+    job = db.get(RematchJob, job_id)
+    if job is None:
+        raise ValueError("Re-match job not found")
+    if job.status == RematchJobStatus.COMPLETED:
+        raise ValueError("Re-match job already completed")
+    job.status = RematchJobStatus.RUNNING
+    job.error = None
+    job.finished_at = None
+    db.commit()
+
+    try:
+        # Failures recorded by earlier runs first; the cursor is already past them
+        retry_ids = list(job.failed_request_ids)
+        for start in range(0, len(retry_ids), settings.REMATCH_BATCH_SIZE):
+            batch_ids = retry_ids[start:start + settings.REMATCH_BATCH_SIZE]
+            category_context = load_category_context(db)
+            rows = _failed_batch(db, job, batch_ids)
+            db.commit()
+            results = await _match_batch(rows, category_context)
+            await _apply_batch(
+                db, job, rows, results, {category["id"] for category in category_context}, retried_ids=batch_ids
+            )
+            if on_batch:
+                on_batch(job)
+
+        while True:
+            # Reloaded per batch, so keywords added while the job runs are used
+            category_context = load_category_context(db)
+            rows = _next_batch(db, job)
+            # Nothing stays open while the model is called
+            db.commit()
+            if not rows:
+                break
+            results = await _match_batch(rows, category_context)
+            await _apply_batch(db, job, rows, results, {category["id"] for category in category_context})
+            if on_batch:
+                on_batch(job)
+        if job.failed_request_ids:
+            job.status = RematchJobStatus.FAILED
+            job.error = (
+                f"Matching failed for {len(job.failed_request_ids)} requests; resume the job to retry them"
+            )
+        else:
+            job.status = RematchJobStatus.COMPLETED
+    except Exception as e:
+        db.rollback()
+        logger.exception("Re-match job %s failed", job_id)
+        job.status = RematchJobStatus.FAILED
+        job.error = str(e)
+    job.finished_at = datetime.utcnow()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _pending_requests(db: Session, job: RematchJob):
+    """Query for the job's pending requests with their invoice text and items."""
+    return db.query(
+        ReimbursementRequest.id,
+        ReimbursementRequest.submission_timestamp,
+        ReimbursementRequest.employee_id,
+        ReimbursementRequest.category_id,
+        ReimbursementRequest.amount,
+        ReimbursementRequest.currency,
+        Invoice.extracted_text,
+        Invoice.items
+    ).join(
+        Invoice, and_(
+            Invoice.request_id == ReimbursementRequest.id,
+            Invoice.submitted_at == ReimbursementRequest.submission_timestamp
+        )
+    ).filter(
+        ReimbursementRequest.status == RequestStatus.PENDING_REVIEW,
+        ReimbursementRequest.submission_timestamp <= job.cutoff
+    )
+
+
+def _next_batch(db: Session, job: RematchJob) -> list:
+    """Next pending requests after the job's cursor."""
+    query = _pending_requests(db, job)
+    if job.cursor_submitted_at is not None:
+        query = query.filter(
+            tuple_(ReimbursementRequest.submission_timestamp, ReimbursementRequest.id)
+            > tuple_(job.cursor_submitted_at, job.cursor_id)
+        )
+    return query.order_by(
+        ReimbursementRequest.submission_timestamp,
+        ReimbursementRequest.id
+    ).limit(settings.REMATCH_BATCH_SIZE).all()
+
+
+def _failed_batch(db: Session, job: RematchJob, request_ids: List[UUID]) -> list:
+    """Those of the given failed requests that are still pending."""
+    # Failed requests are behind the cursor, which bounds the partitions scanned
+    return _pending_requests(db, job).filter(
+        ReimbursementRequest.id.in_(request_ids),
+        ReimbursementRequest.submission_timestamp <= job.cursor_submitted_at
+    ).all()
+
+
+async def _match_batch(rows: list, category_context: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """Match a batch with at most REMATCH_CONCURRENCY model calls queued; None on failure."""
+    semaphore = asyncio.Semaphore(settings.REMATCH_CONCURRENCY)
+
+    async def match(row) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            try:
+                with llm_request(row.id):
+                    return await classify_invoice(category_context, row.extracted_text or "", row.items, priority=BACKGROUND)
+            except Exception as e:
+                logger.warning("Re-matching request %s failed: %s", row.id, e)
+                return None
+
+    return await asyncio.gather(*(match(row) for row in rows))
+
+
+async def _apply_batch(
+    db: Session,
+    job: RematchJob,
+    rows: list,
+    results: List[Optional[Dict[str, Any]]],
+    category_ids: set,
+    retried_ids: Optional[List[UUID]] = None
+) -> None:
+    """
+    Apply a batch's outcomes and advance the job in one transaction.
+
+    Args:
+        retried_ids: For a retry of failed requests (`rows` being those still
+            pending): they are taken off the failed list and the cursor stays
+    """
+    # Amounts to validate are converted before any lock is taken: a rate may be
+    # fetched over the network, and submissions debiting the same balances
+    # would wait on the locks meanwhile
+    amounts_usd = {}
+    conversion_errors = {}
+    for row, result in zip(rows, results):
+        if result is not None and _confident_category(result, category_ids) is not None:
+            try:
+                amounts_usd[row.id] = await convert_to_usd(row.amount, row.currency)
+            except Exception as e:
+                # Unsupported currency; rejected below as validation would
+                conversion_errors[row.id] = f"Validation error: {str(e)}"
+
+    # Requests resolved by someone else since they were read are left alone
+    still_pending = {
+        request_id for (request_id,) in db.query(ReimbursementRequest.id).filter(
+            tuple_(ReimbursementRequest.id, ReimbursementRequest.submission_timestamp).in_(
+                [(row.id, row.submission_timestamp) for row in rows]
+            ),
+            ReimbursementRequest.status == RequestStatus.PENDING_REVIEW
+        ).with_for_update()
+    }
+
+    now = datetime.utcnow()
+    updates = []
+    failed = []
+    for row, result in zip(rows, results):
+        if row.id not in still_pending:
+            job.skipped += 1
+            continue
+        if result is None:
+            failed.append(row.id)
+            continue
+
+        category_id = _suggested_category(result, category_ids)
+        update = {
+            "id": row.id,
+            "submitted_at": row.submission_timestamp,
+            "category_id": category_id,
+            "rejection_reason": None,
+            "now": now,
+        }
+        if _confident_category(result, category_ids) is None:
+            job.still_pending += 1
+            if category_id is not None and category_id != row.category_id:
+                updates.append({**update, "status": RequestStatus.PENDING_REVIEW.name})
+            continue
+
+        if row.id in conversion_errors:
+            validation = {"valid": False, "reason": conversion_errors[row.id]}
+        else:
+            validation = await validate_and_debit(
+                db, row.employee_id, category_id, row.amount, row.currency, now, amounts_usd[row.id]
+            )
+        if validation["valid"]:
+            job.approved += 1
+            updates.append({**update, "status": RequestStatus.APPROVED.name})
+        else:
+            job.rejected += 1
+            updates.append({**update, "status": RequestStatus.REJECTED.name, "rejection_reason": validation["reason"]})
+
+    if updates:
+        db.execute(text(UPDATE_REQUEST_SQL), updates)
+    if retried_ids is None:
+        job.processed += len(rows)
+        job.cursor_submitted_at = rows[-1].submission_timestamp
+        job.cursor_id = rows[-1].id
+        retried_ids = []
+    else:
+        # Resolved by someone else since the failure (no longer pending)
+        job.skipped += len(set(retried_ids) - {row.id for row in rows})
+    # Assigned, not appended: the ARRAY column does not track in-place changes
+    job.failed_request_ids = [
+        request_id for request_id in job.failed_request_ids if request_id not in set(retried_ids)
+    ] + failed
+    job.errors = len(job.failed_request_ids)
+    db.commit()
+
+
+def _suggested_category(result: Dict[str, Any], category_ids: set) -> Optional[UUID]:
+    # Only ids of existing categories are trusted from the model
+    category_id = result.get("category_id")
+    return UUID(category_id) if category_id in category_ids else None
+
+
+def _confident_category(result: Dict[str, Any], category_ids: set) -> Optional[UUID]:
+    """The suggested category if its confidence passes the threshold."""
+    if result.get("confidence", 0) < MIN_CONFIDENCE:
+        return None
+    return _suggested_category(result, category_ids)
@@ -0,0 +1,74 @@
+"""
+Time-ordered reimbursement request ids (UUIDv7).
+
+reimbursement_requests and invoices are partitioned by month on the
+submission time, which is part of their primary key, so a lookup by id alone
+probes every partition. A UUIDv7 carries its creation time (Unix
+milliseconds) in its first 48 bits. The server generates v7 ids, and lookups
+by id bound submission_timestamp to a window around that time, which prunes
+them to the one or two partitions it spans.
+
+Trade-offs:
+- Clients may send their own id (to open the progress stream before
+  submitting). A v7 id is only accepted if its time is within
+  REQUEST_ID_WINDOW of now, so the bound holds for every stored v7 id. Ids
+  of other versions are still accepted, but their lookups probe all
+  partitions.
+- The id reveals when the request was submitted, which the API returns
+  anyway.
+"""
+import secrets
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from uuid import UUID
+
+# Covers the processing time between generating an id and inserting its row
+# (storage, OCR, matching) and client clock skew; partitions are monthly, so
+# the width barely matters for pruning
+REQUEST_ID_WINDOW = timedelta(days=1)
+
+
+def new_request_id() -> UUID:
+    """Generate a UUIDv7 (RFC 9562) from the current time."""
+    millis = time.time_ns() // 1_000_000
+    value = (millis & (2**48 - 1)) << 80       # unix_ts_ms
+    value |= 0x7 << 76                          # version
+    value |= secrets.randbits(12) << 64         # rand_a
+    value |= 0b10 << 62                         # variant
+    value |= secrets.randbits(62)               # rand_b
+    return UUID(int=value)
+
+
+def request_id_time(request_id: UUID) -> Optional[datetime]:
+    """Creation time (naive UTC, like the stored timestamps) of a v7 id; None for other versions."""
+    if request_id.version != 7:
+        return None
+    return datetime.utcfromtimestamp((request_id.int >> 80) / 1000)
+
+
+def submitted_at_window(request_id: UUID) -> Optional[Tuple[datetime, datetime]]:
+    """Range the request's submission_timestamp falls in, or None if the id does not tell."""
+    created_at = request_id_time(request_id)
+    if created_at is None:
+        return None
+    return created_at - REQUEST_ID_WINDOW, created_at + REQUEST_ID_WINDOW
+
+
+def request_id_filter(id_column, submitted_at_column, request_id: UUID) -> list:
+    """
+    Filter criteria for one request by id, bounded by partition key where the id allows.
+
+    Args:
+        id_column: The table's id column
+        submitted_at_column: Its partition key column (e.g. submission_timestamp)
+        request_id: Id to look up
+
+    Returns:
+        Criteria for Query.filter()
+    """
+    criteria = [id_column == request_id]
+    window = submitted_at_window(request_id)
+    if window is not None:
+        criteria.append(submitted_at_column.between(*window))
+    return criteria
@@ -0,0 +1,207 @@
+"""
+Invoice file storage.
+
+Uploaded invoices are stored through one of three backends, chosen by
+STORAGE_BACKEND:
+
+- `cloudinary` (default): Cloudinary, as before
+- `local`: a directory on this host, served at /api/v1/files/...
+- `s3`: any S3-compatible object store (AWS S3, MinIO, ...)
+
+Files are content-addressed: the key is the SHA-256 of the bytes, fanned out
+into two directory levels (`ab/cd/abcd....jpg`). Storing the same invoice
+twice (retries, duplicate submissions) writes it once, and a key never
+points at different bytes.
+
+The request's `cloudinary_url` / `cloudinary_public_id` columns keep their
+names and hold the stored file's URL and key whatever the backend.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.services.cloudinary_service import get_cloudinary_uploader
+
+# Extensions by content type (sniffed from the bytes, not the client's header)
+EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "application/pdf": "pdf"}
+
+KEY_PATTERN = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.(jpg|png|pdf|bin)$")
+
+
+@dataclass
+class StoredFile:
+    """A stored invoice file."""
+    url: str
+    key: str
+    content_type: str
+
+
+def sniff_content_type(content: bytes) -> str:
+    """Content type from the file's magic bytes."""
+    if content.startswith(b"%PDF"):
+        return "application/pdf"
+    if content.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if content.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    return "application/octet-stream"
+
+
+def content_key(content: bytes, content_type: str) -> str:
+    """Content-addressed key of a file, e.g. "ab/cd/abcd...ef.jpg"."""
+    digest = hashlib.sha256(content).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{EXTENSIONS.get(content_type, 'bin')}"
+
+
+class StorageBackend(ABC):
+    """Interface of the storage backends."""
+
+    name = ""
+
+    async def save(self, content: bytes) -> StoredFile:
+        """
+        Store a file under its content key (no-op if already stored).
+
+        Raises:
+            HTTPException: If the file could not be stored
+        """
+        content_type = sniff_content_type(content)
+        key = content_key(content, content_type)
+        try:
+            # SDK and file system calls block; keep them off the event loop
+            url = await asyncio.to_thread(self._put, key, content, content_type)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to store file ({self.name}): {str(e)}"
+            )
+        return StoredFile(url=url, key=key, content_type=content_type)
+
+    @abstractmethod
+    def _put(self, key: str, content: bytes, content_type: str) -> str:
+        """Write the file if missing and return its URL."""
+
+
+class CloudinaryStorage(StorageBackend):
+    """Cloudinary, with the content key as public id."""
+
+    name = "cloudinary"
+    folder = "benefit-reimbursements"
+
+    def _put(self, key: str, content: bytes, content_type: str) -> str:
+        # Cloudinary derives the format from the file; the public id carries no extension
+        upload_result = get_cloudinary_uploader().upload(
+            content,
+            resource_type="auto",  # Auto-detect image/pdf
+            folder=self.folder,
+            public_id=key.rsplit(".", 1)[0],
+            overwrite=False,
+            unique_filename=False,
+        )
+        url = upload_result.get("secure_url") or upload_result.get("url")
+        if not url:
+            raise HTTPException(status_code=500, detail="Failed to get upload result from Cloudinary")
+        return url
+
+
+class LocalStorage(StorageBackend):
+    """Directory on this host; files are served by GET /files/{key}."""
+
+    name = "local"
+
+    def __init__(self, root: str, public_url: str):
+        self.root = Path(root)
+        self.public_url = public_url.rstrip("/")
+
+    def path(self, key: str) -> Optional[Path]:
+        """Path of a stored file, or None if the key is malformed or missing."""
+        if not KEY_PATTERN.match(key):
+            return None
+        path = self.root / key
+        return path if path.is_file() else None
+
+    def _put(self, key: str, content: bytes, content_type: str) -> str:
+        path = self.root / key
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written under a unique temporary name and renamed, so readers never
+            # see a partial file and concurrent writers never share one
+            partial = tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False)
+            try:
+                with partial:
+                    partial.write(content)
+                os.replace(partial.name, path)
+            except OSError:
+                os.unlink(partial.name)
+                # Same key, same bytes: another writer storing it first is success
+                if not path.is_file():
+                    raise
+        return f"{self.public_url}/{key}"
+
+
+class S3Storage(StorageBackend):
+    """S3-compatible bucket (AWS S3, MinIO, ...)."""
+
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint_url: str, public_url: str):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url or None
+        self.public_url = (public_url or f"{endpoint_url or 'https://s3.amazonaws.com'}/{bucket}").rstrip("/")
+
+    @property
+    def client(self):
+        return _s3_client(self.endpoint_url)
+
+    def _put(self, key: str, content: bytes, content_type: str) -> str:
+        # Imported on first use: boto3 is only needed with this backend
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                raise
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=content, ContentType=content_type)
+        return f"{self.public_url}/{key}"
+
+
+@lru_cache(maxsize=None)
+def _s3_client(endpoint_url: Optional[str]):
+    # Imported on first use: boto3 is only needed with this backend
+    import boto3
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint_url,
+        region_name=settings.S3_REGION or None,
+        aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+        aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_storage() -> StorageBackend:
+    """The configured storage backend (STORAGE_BACKEND)."""
+    if settings.STORAGE_BACKEND == "cloudinary":
+        return CloudinaryStorage()
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(
+            settings.STORAGE_LOCAL_DIR,
+            settings.STORAGE_PUBLIC_URL or f"{settings.API_V1_PREFIX}/files"
+        )
+    if settings.STORAGE_BACKEND == "s3":
+        if not settings.S3_BUCKET:
+            raise ValueError("S3_BUCKET is not set")
+        return S3Storage(settings.S3_BUCKET, settings.S3_ENDPOINT_URL, settings.STORAGE_PUBLIC_URL)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
@@ -3,14 +3,37 @@ Validation service for reimbursement requests.
 """
 from decimal import Decimal
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, text
 
 from app.models.employee_benefit_balance import EmployeeBenefitBalance
 from app.models.benefit_category import BenefitCategory
 from app.services.currency_service import convert_to_usd
+from app.services.period_close import period_usage
+
+# Held until the caller commits, so validation and debit see the same balance
+LOCK_BALANCE_SQL = """
+SELECT 1 FROM employee_benefit_balances
+WHERE employee_id = :employee_id AND category_id = :category_id AND year = :year AND month = :month
+FOR UPDATE
+"""
+
+# Months not yet opened by the period close have no row to lock; their first
+# approvals serialize on an advisory lock on the balance key instead
+LOCK_MISSING_BALANCE_SQL = "SELECT pg_advisory_xact_lock(hashtext(:key))"
+
+# Only run for approved requests; creates the row on the first approval of a
+# month the period close has not opened
+DEBIT_BALANCE_SQL = """
+INSERT INTO employee_benefit_balances
+    (id, employee_id, category_id, year, month, annual_used, monthly_used, created_at, updated_at)
+VALUES (gen_random_uuid(), :employee_id, :category_id, :year, :month, 0, :amount, :now, :now)
+ON CONFLICT (employee_id, category_id, year, month) DO UPDATE
+    SET monthly_used = employee_benefit_balances.monthly_used + EXCLUDED.monthly_used,
+        updated_at = EXCLUDED.updated_at
+"""
 
 
 async def validate_reimbursement(
@@ -18,7 +41,9 @@ async def validate_reimbursement(
     employee_id: UUID,
     category_id: UUID,
     amount: Decimal,
-    currency: str
+    currency: str,
+    now: Optional[datetime] = None,
+    amount_usd: Optional[Decimal] = None
 ) -> Dict[str, Any]:
     """
     Validate reimbursement request against employee balances and category limits.
@@ -29,9 +54,14 @@ async def validate_reimbursement(
         category_id: UUID of benefit category
         amount: Requested reimbursement amount
         currency: Currency code
+        now: Time whose month and year are checked (default: now); pass the
+            same time as the debit so both use one period
+        amount_usd: The amount already converted with convert_to_usd, so no
+            exchange rate is fetched here (e.g. while balance locks are held)
         
     Returns:
         Dictionary with validation result, reasons, and remaining balance
+        (and the amount in USD when valid)
     """
     try:
         # Get category
@@ -44,7 +74,8 @@ async def validate_reimbursement(
             }
         
         # Convert amount to USD for comparison with limits (all limits are in USD)
-        amount_usd = await convert_to_usd(amount, currency)
+        if amount_usd is None:
+            amount_usd = await convert_to_usd(amount, currency)
         
         # Check transaction limit (compare in USD)
         if amount_usd > category.max_transaction_amount:
@@ -54,37 +85,31 @@ async def validate_reimbursement(
                 "remaining_balance": None
             }
         
-        # Get current year and month
-        now = datetime.utcnow()
+        # Period to check
+        now = now or datetime.utcnow()
         current_year = now.year
         current_month = now.month
         
-        # Get or create employee balance record
-        balance = db.query(EmployeeBenefitBalance).filter(
+        # Read-only: balance rows are created by the period close job (or on the
+        # first approval of the month); a missing row simply means nothing used yet
+        period_rows = db.query(
+            EmployeeBenefitBalance.month,
+            EmployeeBenefitBalance.monthly_used,
+            EmployeeBenefitBalance.annual_used,
+            EmployeeBenefitBalance.closed_at
+        ).filter(
             and_(
                 EmployeeBenefitBalance.employee_id == employee_id,
                 EmployeeBenefitBalance.category_id == category_id,
                 EmployeeBenefitBalance.year == current_year,
-                EmployeeBenefitBalance.month == current_month
-            )
-        ).first()
-        
-        if not balance:
-            # Create new balance record
-            balance = EmployeeBenefitBalance(
-                employee_id=employee_id,
-                category_id=category_id,
-                year=current_year,
-                month=current_month,
-                annual_used=Decimal("0.00"),
-                monthly_used=Decimal("0.00")
+                EmployeeBenefitBalance.month <= current_month
             )
-            db.add(balance)
-            db.flush()
+        ).all()
+        monthly_used, total_annual_used = period_usage(period_rows, current_month)
         
         # Check monthly limit (compare in USD)
-        # Note: balance.monthly_used is stored in USD (converted when approved)
-        monthly_remaining = category.monthly_limit - balance.monthly_used
+        # Note: monthly_used is stored in USD (converted when approved)
+        monthly_remaining = category.monthly_limit - monthly_used
         if amount_usd > monthly_remaining:
             return {
                 "valid": False,
@@ -92,16 +117,7 @@ async def validate_reimbursement(
                 "remaining_balance": monthly_remaining
             }
         
-        # Check annual limit - sum monthly_used from all months in the year
-        annual_balances = db.query(EmployeeBenefitBalance).filter(
-            and_(
-                EmployeeBenefitBalance.employee_id == employee_id,
-                EmployeeBenefitBalance.category_id == category_id,
-                EmployeeBenefitBalance.year == current_year
-            )
-        ).all()
-        
-        total_annual_used = sum(b.monthly_used for b in annual_balances)
+        # Check annual limit - year-to-date usage, from the last closed month's frozen total
         annual_remaining = category.annual_limit - total_annual_used
         if amount_usd > annual_remaining:
             return {
@@ -110,11 +126,12 @@ async def validate_reimbursement(
                 "remaining_balance": annual_remaining
             }
         
-        # All checks passed
+        # All checks passed; the converted amount is what gets debited
         return {
             "valid": True,
             "reason": None,
-            "remaining_balance": min(monthly_remaining, annual_remaining)
+            "remaining_balance": min(monthly_remaining, annual_remaining),
+            "amount_usd": amount_usd
         }
         
     except Exception as e:
@@ -124,3 +141,42 @@ async def validate_reimbursement(
             "remaining_balance": None
         }
 
+
+
+async def validate_and_debit(
+    db: Session,
+    employee_id: UUID,
+    category_id: UUID,
+    amount: Decimal,
+    currency: str,
+    now: Optional[datetime] = None,
+    amount_usd: Optional[Decimal] = None
+) -> Dict[str, Any]:
+    """
+    Validate a request against the current month's balance and debit it if valid.
+    
+    The balance row is locked before validation (or, if the month has no row
+    yet, an advisory lock on its key is taken), so concurrent approvals
+    (submissions, the re-match job) against the same balance serialize instead
+    of overwriting each other. Nothing is written unless the request is valid;
+    the debit is then a single atomic upsert. Locks are held until the caller
+    commits. Pass `amount_usd` when converting may fetch a rate over the
+    network, so that does not happen under the locks.
+    
+    Returns:
+        The validation result, as from validate_reimbursement
+    """
+    now = now or datetime.utcnow()
+    balance_key = {"employee_id": employee_id, "category_id": category_id, "year": now.year, "month": now.month}
+    if db.execute(text(LOCK_BALANCE_SQL), balance_key).first() is None:
+        db.execute(text(LOCK_MISSING_BALANCE_SQL), {
+            "key": f"balance:{employee_id}:{category_id}:{now.year}-{now.month}"
+        })
+        # Another approval may have created the row while this one waited
+        db.execute(text(LOCK_BALANCE_SQL), balance_key)
+    
+    validation = await validate_reimbursement(db, employee_id, category_id, amount, currency, now, amount_usd)
+    if validation["valid"]:
+        # Only monthly_used is debited (annual usage sums the months), in USD like the limits
+        db.execute(text(DEBIT_BALANCE_SQL), {**balance_key, "amount": validation["amount_usd"], "now": now})
+    return validation
@@ -0,0 +1,91 @@
+"""
+In-memory index of the built frontend.
+
+Built once at startup: every file under `static/assets` is read into memory
+with its MIME type, ETag and precompressed gzip/brotli variants, so serving
+an asset is a dictionary lookup instead of filesystem checks, MIME guessing
+and on-the-fly compression. `index.html` is cached the same way.
+"""
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Dict, Optional
+
+import brotli
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.middleware.compression import choose_encoding, is_compressible
+from app.services.http_cache import etag_matches
+
+# Fallbacks for platforms whose mimetypes registry lacks these extensions
+FALLBACK_MIME_TYPES = {
+    ".css": "text/css",
+    ".js": "application/javascript",
+    ".mjs": "application/javascript",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+    ".woff2": "font/woff2",
+}
+
+# Below this size compression overhead outweighs the savings
+MIN_COMPRESS_SIZE = 512
+
+
+class StaticAsset:
+    """A static file held in memory with its precomputed representations."""
+
+    def __init__(self, path: Path, cache_control: str):
+        self.body = path.read_bytes()
+        self.media_type = _guess_mime_type(path)
+        self.cache_control = cache_control
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.variants: Dict[str, bytes] = {}
+
+        if is_compressible(self.media_type) and len(self.body) >= MIN_COMPRESS_SIZE:
+            # Static files are compressed once, so use the highest levels
+            for encoding, data in (
+                ("br", brotli.compress(self.body, quality=11)),
+                ("gzip", gzip.compress(self.body, compresslevel=9)),
+            ):
+                if len(data) < len(self.body):
+                    self.variants[encoding] = data
+
+    def response(self, request: Request) -> Response:
+        """Build a response for `request`, honouring Accept-Encoding and If-None-Match."""
+        encoding = choose_encoding(request.headers.get("accept-encoding"), self.variants.keys())
+        # Each representation gets its own strong ETag
+        etag = f'"{self.etag}-{encoding}"' if encoding else f'"{self.etag}"'
+        headers = {"Cache-Control": self.cache_control, "ETag": etag}
+        if self.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        body = self.body
+        if encoding:
+            body = self.variants[encoding]
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+class StaticAssetIndex:
+    """Index of all files under an assets directory, keyed by relative path."""
+
+    def __init__(self, assets_dir: Path, cache_control: str = "public, max-age=31536000, immutable"):
+        self.assets: Dict[str, StaticAsset] = {}
+        for path in assets_dir.rglob("*"):
+            if path.is_file():
+                key = path.relative_to(assets_dir).as_posix()
+                self.assets[key] = StaticAsset(path, cache_control)
+
+    def get(self, file_path: str) -> Optional[StaticAsset]:
+        """Look up an asset; paths outside the index (including traversal attempts) miss."""
+        return self.assets.get(file_path)
+
+
+def _guess_mime_type(path: Path) -> str:
+    mime_type, _ = mimetypes.guess_type(str(path))
+    return mime_type or FALLBACK_MIME_TYPES.get(path.suffix.lower(), "application/octet-stream")
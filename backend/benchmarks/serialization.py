@@ -0,0 +1,111 @@
+"""
+Micro-benchmark of API response serialization cost.
+
+Compares the default FastAPI path (validate the returned dict against the
+response model, then encode with the stdlib json encoder) with
+FastJSONResponse, both for plain dicts and for pre-validated models.
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization
+"""
+import json
+import timeit
+import uuid
+from datetime import datetime, date
+from decimal import Decimal
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models.reimbursement_request import RequestStatus
+from app.responses import FastJSONResponse
+from app.schemas.category import CategoryResponse
+from app.schemas.request import ReimbursementResponse
+
+
+def build_invoice_payload() -> dict:
+    """A reimbursement with a long OCR text and many line items."""
+    return {
+        "id": uuid.uuid4(),
+        "employee_id": uuid.uuid4(),
+        "employee_name": "John Smith",
+        "employee_employee_id": "EMP001",
+        "category_id": uuid.uuid4(),
+        "category_name": "Home Office Equipment",
+        "status": RequestStatus.APPROVED,
+        "amount": Decimal("1234.56"),
+        "currency": "USD",
+        "cloudinary_url": "https://res.cloudinary.com/demo/image/upload/invoice.jpg",
+        "submission_timestamp": datetime.utcnow(),
+        "rejection_reason": None,
+        "invoice": {
+            "vendor_name": "Office Supplies Inc.",
+            "purchase_date": date.today(),
+            "items": [
+                {"description": f"Item {i} - ergonomic accessory", "amount": Decimal("12.34")}
+                for i in range(200)
+            ],
+            "total_amount": Decimal("1234.56"),
+            "currency": "USD",
+            "invoice_number": "INV-2026-000123",
+            "extracted_text": "Office Supplies Inc. Receipt line with product details. " * 1000,
+        },
+        "remaining_balance": Decimal("765.44"),
+        "remaining_balance_currency": "USD",
+    }
+
+
+def build_category_list(count: int = 1000) -> List[dict]:
+    """A list of categories with keywords."""
+    return [
+        {
+            "id": uuid.uuid4(),
+            "name": f"Category {i}",
+            "max_transaction_amount": Decimal("500.00"),
+            "annual_limit": Decimal("5000.00"),
+            "monthly_limit": Decimal("500.00"),
+            "keywords": [{"id": uuid.uuid4(), "keyword": f"keyword {i}-{k}"} for k in range(8)],
+        }
+        for i in range(count)
+    ]
+
+
+def stdlib_path(adapter: TypeAdapter, payload) -> bytes:
+    """Approximates FastAPI's default: validate, dump to JSON-able data, json.dumps."""
+    validated = adapter.validate_python(payload)
+    data = jsonable_encoder(adapter.dump_python(validated, mode="json"))
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_path(payload) -> bytes:
+    return FastJSONResponse(payload).body
+
+
+def report(name: str, func, number: int) -> None:
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"  {name:<44} {seconds * 1000:8.3f} ms")
+
+
+def main():
+    invoice = build_invoice_payload()
+    invoice_adapter = TypeAdapter(ReimbursementResponse)
+    invoice_model = ReimbursementResponse.model_validate(invoice)
+    
+    categories = build_category_list()
+    categories_adapter = TypeAdapter(List[CategoryResponse])
+    category_models = categories_adapter.validate_python(categories)
+    category_dicts = categories_adapter.dump_python(category_models)
+    
+    print("Large invoice payload (200 items, ~56 KB OCR text)")
+    report("validate + stdlib json", lambda: stdlib_path(invoice_adapter, invoice), 200)
+    report("FastJSONResponse (orjson, dict)", lambda: fast_path(invoice), 200)
+    report("FastJSONResponse (pre-validated model)", lambda: fast_path(invoice_model), 200)
+    
+    print("1,000 categories with 8 keywords each")
+    report("validate + stdlib json", lambda: stdlib_path(categories_adapter, categories), 20)
+    report("FastJSONResponse (orjson, dict)", lambda: fast_path(category_dicts), 20)
+
+
+if __name__ == "__main__":
+    main()
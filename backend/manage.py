@@ -0,0 +1,327 @@
+"""
+Management commands.
+
+Usage (from the backend directory):
+    python manage.py <command> [options]
+
+Run `python manage.py --help` for the list of commands.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Default startup budget. Measured cold starts range from 1.5 s to 2.1 s across
+# machines, so this leaves headroom for slower CI runners.
+STARTUP_BUDGET_MS = 3000
+
+
+def profile_startup(args: argparse.Namespace) -> int:
+    """
+    Profile application import time with `python -X importtime`.
+
+    Imports `app.main` in a fresh interpreter --runs times, prints the slowest
+    modules by cumulative import time and the fastest wall time, and exits
+    non-zero when that exceeds --budget-ms (so it can gate CI). The fastest
+    run is compared because one-off stalls of a busy machine only ever add time.
+    """
+    wall_times = []
+    for _ in range(max(args.runs, 1)):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+        )
+        wall_times.append((time.perf_counter() - started) * 1000)
+
+        if result.returncode != 0:
+            print(result.stderr, file=sys.stderr)
+            return result.returncode
+    wall_ms = min(wall_times)
+
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        timings.append((int(cumulative), module.rstrip()))
+
+    app_import_us = next((us for us, module in timings if module.strip() == "app.main"), 0)
+
+    print(f"{'cumulative ms':>14}  module")
+    for cumulative_us, module in sorted(timings, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f}  {module}")
+    print()
+    print(f"import app.main: {app_import_us / 1000:.1f} ms")
+    print(
+        f"interpreter + import wall time: {wall_ms:.1f} ms, fastest of {len(wall_times)} "
+        f"(budget {args.budget_ms} ms)"
+    )
+
+    if wall_ms > args.budget_ms:
+        print("Startup time budget exceeded", file=sys.stderr)
+        return 1
+    return 0
+
+
+def purge_idempotency_keys(args: argparse.Namespace) -> int:
+    """Delete expired idempotency keys. Meant to run periodically (e.g. cron)."""
+    from app.database import SessionLocal
+    from app.services.idempotency import purge_expired_idempotency_keys
+
+    with SessionLocal() as db:
+        deleted = purge_expired_idempotency_keys(db, batch_size=args.batch_size)
+    print(f"Deleted {deleted} expired idempotency keys")
+    return 0
+
+
+def ensure_partitions(args: argparse.Namespace) -> int:
+    """Create monthly partitions for the coming months. Run monthly (e.g. cron)."""
+    from app.database import engine
+    from app.services.partitions import ensure_partitions as create_partitions
+
+    with engine.begin() as conn:
+        created = create_partitions(conn, months_ahead=args.months_ahead)
+    for name in created:
+        print(f"Created partition {name}")
+    print(f"{len(created)} partitions created")
+    return 0
+
+
+def archive_partitions(args: argparse.Namespace) -> int:
+    """Move monthly partitions older than the retention window to the archive tables."""
+    from app.database import engine
+    from app.services.partitions import archive_partitions as move_partitions
+
+    # One transaction per run: either every listed month is archived or none is
+    with engine.begin() as conn:
+        archived = move_partitions(conn, retention_months=args.retention_months, dry_run=args.dry_run)
+    verb = "Would archive" if args.dry_run else "Archived"
+    for month in archived:
+        print(f"{verb} {month['month']}: {month['requests']} requests, {month['invoices']} invoices")
+    if not archived:
+        print("Nothing to archive")
+    return 0
+
+
+def export(args: argparse.Namespace) -> int:
+    """Stream a payroll export (reimbursements or balances) to a file or stdout."""
+    from functools import partial
+    from app.database import SessionLocal
+    from app.models.reimbursement_request import RequestStatus
+    from app.services.exports import stream_export, reimbursements_query, balances_query
+
+    if args.dataset == "reimbursements":
+        build_query = partial(
+            reimbursements_query,
+            submitted_from=args.submitted_from,
+            submitted_to=args.submitted_to,
+            status=RequestStatus(args.status) if args.status else None
+        )
+    else:
+        build_query = partial(balances_query, year=args.year, month=args.month)
+
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        written = 0
+        for chunk in stream_export(SessionLocal, build_query, args.format):
+            output.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            output.close()
+    if args.output:
+        print(f"Wrote {written} bytes to {args.output}", file=sys.stderr)
+    return 0
+
+
+def import_file(args: argparse.Namespace) -> int:
+    """Insert or update employees, categories or keywords from a CSV/JSONL file."""
+    from app.database import SessionLocal
+    from app.services.bulk_import import import_records
+
+    import_format = args.format or ("jsonl" if args.path.endswith((".jsonl", ".ndjson")) else "csv")
+    started = time.perf_counter()
+    with SessionLocal() as db, open(args.path, "rb") as file:
+        report = import_records(db, args.entity, file, import_format)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{args.entity}: {report['inserted']} inserted, {report['updated']} updated, "
+        f"{report['unchanged']} unchanged, {report['duplicates']} duplicates, "
+        f"{report['rejected']} rejected in {elapsed:.1f} s"
+    )
+    for error in report["errors"]:
+        print(f"  line {error['line']}: {error['error']}", file=sys.stderr)
+    return 1 if report["rejected"] else 0
+
+
+def close_period(args: argparse.Namespace) -> int:
+    """
+    Close a finished month's balances and open the following months.
+    Run early each month (e.g. cron on the 1st); defaults to the previous month.
+    """
+    from datetime import datetime
+    from app.database import SessionLocal
+    from app.services.partitions import add_months
+    from app.services.period_close import close_period as close
+
+    if args.year and args.month:
+        year, month = args.year, args.month
+    else:
+        previous = add_months(datetime.utcnow().date().replace(day=1), -1)
+        year, month = previous.year, previous.month
+
+    with SessionLocal() as db:
+        try:
+            result = close(db, year, month, months_ahead=args.months_ahead)
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+    print(f"Closed {year}-{month:02d}: froze {result.pop('frozen')} balance rows")
+    for period, created in result.items():
+        print(f"Opened {period}: {created} balance rows created")
+    return 0
+
+
+def refresh_analytics(args: argparse.Namespace) -> int:
+    """
+    Refresh the analytics materialized views without blocking dashboard reads.
+    Schedule it (e.g. every 15 minutes); dashboards are as fresh as the last run.
+    """
+    from app.database import SessionLocal
+    from app.services.analytics import refresh_analytics as refresh
+
+    with SessionLocal() as db:
+        timings = refresh(db)
+    for view, seconds in timings.items():
+        print(f"Refreshed {view} in {seconds:.2f} s")
+    return 0
+
+
+def rematch_pending(args: argparse.Namespace) -> int:
+    """
+    Re-match requests pending review, e.g. after keywords were added.
+    With --resume, continue a failed or interrupted job from its last batch.
+    """
+    import asyncio
+    from app.database import SessionLocal
+    from app.models.rematch_job import RematchJobStatus
+    from app.services.rematch import create_rematch_job, run_rematch_job
+
+    if args.resume:
+        job_id = args.resume
+    else:
+        with SessionLocal() as db:
+            job_id = create_rematch_job(db).id
+        print(f"Job {job_id}")
+
+    def report(job) -> None:
+        print(
+            f"{job.processed}/{job.total} processed: {job.approved} approved, {job.rejected} rejected, "
+            f"{job.still_pending} still pending, {job.skipped} skipped, {job.errors} errors"
+        )
+
+    try:
+        job = asyncio.run(run_rematch_job(job_id, on_batch=report))
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    if job.status != RematchJobStatus.COMPLETED:
+        print(f"Failed: {job.error} (resume with --resume {job.id})", file=sys.stderr)
+        return 1
+    print(f"Completed: {job.processed} requests processed")
+    return 0
+
+
+def main() -> int:
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Benefit reimbursement management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    startup = subparsers.add_parser("profile-startup", help="Profile application import time")
+    startup.add_argument("--top", type=int, default=25, help="Number of modules to show")
+    startup.add_argument("--budget-ms", type=int, default=STARTUP_BUDGET_MS, help="Fail if startup takes longer")
+    startup.add_argument("--runs", type=int, default=3, help="Startups to measure; the fastest is compared")
+    startup.set_defaults(func=profile_startup)
+
+    purge = subparsers.add_parser("purge-idempotency-keys", help="Delete expired idempotency keys")
+    purge.add_argument("--batch-size", type=int, default=10000, help="Rows deleted per transaction")
+    purge.set_defaults(func=purge_idempotency_keys)
+
+    partitions = subparsers.add_parser("ensure-partitions", help="Create upcoming monthly partitions")
+    partitions.add_argument(
+        "--months-ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD,
+        help="Future months to create"
+    )
+    partitions.set_defaults(func=ensure_partitions)
+
+    archive = subparsers.add_parser("archive-partitions", help="Archive partitions past the retention window")
+    archive.add_argument(
+        "--retention-months", type=int, default=settings.ARCHIVE_RETENTION_MONTHS,
+        help="Months kept live, including the current one"
+    )
+    archive.add_argument("--dry-run", action="store_true", help="Only report what would be archived")
+    archive.set_defaults(func=archive_partitions)
+
+    from datetime import datetime
+    from app.models.reimbursement_request import RequestStatus
+    from app.services.exports import EXPORT_FORMATS
+
+    exporter = subparsers.add_parser("export", help="Export reimbursements or monthly balances (CSV/Parquet)")
+    exporter.add_argument("dataset", choices=["reimbursements", "balances"])
+    exporter.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    exporter.add_argument("--output", "-o", help="Output file (default: stdout)")
+    exporter.add_argument(
+        "--from", dest="submitted_from", type=datetime.fromisoformat,
+        help="Reimbursements submitted at or after (ISO date/time, UTC)"
+    )
+    exporter.add_argument(
+        "--to", dest="submitted_to", type=datetime.fromisoformat,
+        help="Reimbursements submitted before (ISO date/time, UTC)"
+    )
+    exporter.add_argument(
+        "--status", choices=[status.value for status in RequestStatus], help="Reimbursement status"
+    )
+    exporter.add_argument("--year", type=int, help="Balances of this year")
+    exporter.add_argument("--month", type=int, help="Balances of this month")
+    exporter.set_defaults(func=export)
+
+    period = subparsers.add_parser("close-period", help="Freeze a finished month's balances and open the next months")
+    period.add_argument("--year", type=int, help="Year of the month to close (default: previous month)")
+    period.add_argument("--month", type=int, choices=range(1, 13), metavar="1-12", help="Month to close")
+    period.add_argument(
+        "--months-ahead", type=int, default=2,
+        help="Following months to open (2 also prepares next month ahead of time)"
+    )
+    period.set_defaults(func=close_period)
+
+    analytics = subparsers.add_parser("refresh-analytics", help="Refresh the spend analytics views")
+    analytics.set_defaults(func=refresh_analytics)
+
+    rematch = subparsers.add_parser("rematch-pending", help="Re-match requests pending review")
+    rematch.add_argument("--resume", type=uuid.UUID, metavar="JOB_ID", help="Continue an unfinished job")
+    rematch.set_defaults(func=rematch_pending)
+
+    from app.services.bulk_import import IMPORT_ENTITIES, IMPORT_FORMATS
+
+    importer = subparsers.add_parser("import", help="Bulk import employees, categories or keywords (CSV/JSONL)")
+    importer.add_argument("entity", choices=IMPORT_ENTITIES)
+    importer.add_argument("path", help="CSV file with a header row, or JSONL file")
+    importer.add_argument("--format", choices=IMPORT_FORMATS, help="Default: from the file extension")
+    importer.set_defaults(func=import_file)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+"""Add employees (name, id) index for keyset pagination
+
+Revision ID: 3b8d2f61c0a4
+Revises: f9e7c5a456d9
+Create Date: 2026-10-19 10:12:41.482113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8d2f61c0a4'
+down_revision: Union[str, None] = 'f9e7c5a456d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_employees_name_id', 'employees', ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_employees_name_id', table_name='employees')
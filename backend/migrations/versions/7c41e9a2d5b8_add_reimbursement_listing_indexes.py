@@ -0,0 +1,59 @@
+"""Add composite indexes for reimbursement listing
+
+Revision ID: 7c41e9a2d5b8
+Revises: 3b8d2f61c0a4
+Create Date: 2026-10-19 11:03:17.904551
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41e9a2d5b8'
+down_revision: Union[str, None] = '3b8d2f61c0a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_reimbursement_requests_status_submitted',
+        'reimbursement_requests',
+        ['status', 'submission_timestamp', 'id'],
+        postgresql_include=['employee_id', 'category_id', 'amount', 'currency']
+    )
+    op.create_index(
+        'ix_reimbursement_requests_employee_submitted',
+        'reimbursement_requests',
+        ['employee_id', 'submission_timestamp', 'id'],
+        postgresql_include=['category_id', 'status', 'amount', 'currency']
+    )
+    op.create_index(
+        'ix_reimbursement_requests_category_submitted',
+        'reimbursement_requests',
+        ['category_id', 'submission_timestamp', 'id'],
+        postgresql_include=['employee_id', 'status', 'amount', 'currency']
+    )
+    op.create_index(
+        'ix_reimbursement_requests_submitted',
+        'reimbursement_requests',
+        ['submission_timestamp', 'id'],
+        postgresql_include=['employee_id', 'category_id', 'status', 'amount', 'currency']
+    )
+    # The single-column indexes are prefixes of the composite ones above
+    op.drop_index('ix_reimbursement_requests_status', table_name='reimbursement_requests')
+    op.drop_index('ix_reimbursement_requests_employee_id', table_name='reimbursement_requests')
+    op.drop_index('ix_reimbursement_requests_category_id', table_name='reimbursement_requests')
+
+
+def downgrade() -> None:
+    op.create_index('ix_reimbursement_requests_category_id', 'reimbursement_requests', ['category_id'], unique=False)
+    op.create_index('ix_reimbursement_requests_employee_id', 'reimbursement_requests', ['employee_id'], unique=False)
+    op.create_index('ix_reimbursement_requests_status', 'reimbursement_requests', ['status'], unique=False)
+    op.drop_index('ix_reimbursement_requests_submitted', table_name='reimbursement_requests')
+    op.drop_index('ix_reimbursement_requests_category_submitted', table_name='reimbursement_requests')
+    op.drop_index('ix_reimbursement_requests_employee_submitted', table_name='reimbursement_requests')
+    op.drop_index('ix_reimbursement_requests_status_submitted', table_name='reimbursement_requests')
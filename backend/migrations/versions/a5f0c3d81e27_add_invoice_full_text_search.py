@@ -0,0 +1,42 @@
+"""Add generated tsvector column and GIN index for invoice search
+
+Revision ID: a5f0c3d81e27
+Revises: 7c41e9a2d5b8
+Create Date: 2026-10-19 12:26:05.117390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5f0c3d81e27'
+down_revision: Union[str, None] = '7c41e9a2d5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept in sync with INVOICE_SEARCH_VECTOR_SQL in app/models/invoice.py
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(vendor_name, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(invoice_number, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, "
+    "coalesce(jsonb_path_query_array(items, '$[*].description')::text, '')), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(extracted_text, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    # Adding a stored generated column rewrites the table once
+    op.add_column(
+        'invoices',
+        sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True)
+    )
+    op.create_index('ix_invoices_search_vector', 'invoices', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_invoices_search_vector', table_name='invoices', postgresql_using='gin')
+    op.drop_column('invoices', 'search_vector')
@@ -0,0 +1,120 @@
+"""Keep missing department/category as NULL in the analytics views
+
+Revision ID: a6d1f8c3e527
+Revises: e3b9f6c2d418
+Create Date: 2026-10-19 23:12:44.903817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d1f8c3e527'
+down_revision: Union[str, None] = 'e3b9f6c2d418'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The views grouped employees without a department under 'Unassigned' and requests
+# without a category under 'Uncategorized', which merged them with a real department
+# or category of that name and produced duplicate keys in the unique indexes (so
+# REFRESH ... CONCURRENTLY failed). They now keep NULL.
+SPEND_VIEW_SQL = """
+CREATE MATERIALIZED VIEW analytics_monthly_spend AS
+SELECT
+    b.year,
+    b.month,
+    b.category_id,
+    c.name AS category_name,
+    e.department,
+    sum(b.monthly_used) AS total_spent,
+    count(*) FILTER (WHERE b.monthly_used > 0) AS employees_with_spend
+FROM employee_benefit_balances b
+JOIN employees e ON e.id = b.employee_id
+JOIN benefit_categories c ON c.id = b.category_id
+GROUP BY b.year, b.month, b.category_id, c.name, e.department
+"""
+
+OUTCOMES_VIEW_SQL = """
+CREATE MATERIALIZED VIEW analytics_request_outcomes AS
+SELECT
+    date_part('year', r.submission_timestamp)::int AS year,
+    date_part('month', r.submission_timestamp)::int AS month,
+    c.name AS category_name,
+    e.department,
+    lower(r.status::text) AS status,  -- enum names, e.g. APPROVED -> approved
+    count(*) AS request_count
+FROM reimbursement_requests r
+JOIN employees e ON e.id = r.employee_id
+LEFT JOIN benefit_categories c ON c.id = r.category_id
+GROUP BY 1, 2, 3, 4, 5
+"""
+
+# REFRESH ... CONCURRENTLY needs a unique index over plain columns (no COALESCE);
+# NULLS NOT DISTINCT (PostgreSQL 15+) makes the NULL group unique as well
+SPEND_INDEX_SQL = (
+    "CREATE UNIQUE INDEX uq_analytics_monthly_spend "
+    "ON analytics_monthly_spend (year, month, category_id, department) NULLS NOT DISTINCT"
+)
+OUTCOMES_INDEX_SQL = (
+    "CREATE UNIQUE INDEX uq_analytics_request_outcomes "
+    "ON analytics_request_outcomes (year, month, category_name, department, status) NULLS NOT DISTINCT"
+)
+
+# Definitions of b7d2e9f4c316, for downgrade
+OLD_SPEND_VIEW_SQL = """
+CREATE MATERIALIZED VIEW analytics_monthly_spend AS
+SELECT
+    b.year,
+    b.month,
+    b.category_id,
+    c.name AS category_name,
+    COALESCE(e.department, 'Unassigned') AS department,
+    sum(b.monthly_used) AS total_spent,
+    count(*) FILTER (WHERE b.monthly_used > 0) AS employees_with_spend
+FROM employee_benefit_balances b
+JOIN employees e ON e.id = b.employee_id
+JOIN benefit_categories c ON c.id = b.category_id
+GROUP BY b.year, b.month, b.category_id, c.name, COALESCE(e.department, 'Unassigned')
+"""
+
+OLD_OUTCOMES_VIEW_SQL = """
+CREATE MATERIALIZED VIEW analytics_request_outcomes AS
+SELECT
+    date_part('year', r.submission_timestamp)::int AS year,
+    date_part('month', r.submission_timestamp)::int AS month,
+    COALESCE(c.name, 'Uncategorized') AS category_name,
+    COALESCE(e.department, 'Unassigned') AS department,
+    lower(r.status::text) AS status,
+    count(*) AS request_count
+FROM reimbursement_requests r
+JOIN employees e ON e.id = r.employee_id
+LEFT JOIN benefit_categories c ON c.id = r.category_id
+GROUP BY 1, 2, 3, 4, 5
+"""
+
+
+def upgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW analytics_request_outcomes")
+    op.execute("DROP MATERIALIZED VIEW analytics_monthly_spend")
+    op.execute(SPEND_VIEW_SQL)
+    op.execute(SPEND_INDEX_SQL)
+    op.execute(OUTCOMES_VIEW_SQL)
+    op.execute(OUTCOMES_INDEX_SQL)
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW analytics_request_outcomes")
+    op.execute("DROP MATERIALIZED VIEW analytics_monthly_spend")
+    op.execute(OLD_SPEND_VIEW_SQL)
+    op.execute(
+        "CREATE UNIQUE INDEX uq_analytics_monthly_spend "
+        "ON analytics_monthly_spend (year, month, category_id, department)"
+    )
+    op.execute(OLD_OUTCOMES_VIEW_SQL)
+    op.execute(
+        "CREATE UNIQUE INDEX uq_analytics_request_outcomes "
+        "ON analytics_request_outcomes (year, month, category_name, department, status)"
+    )
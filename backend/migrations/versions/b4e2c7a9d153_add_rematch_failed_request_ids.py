@@ -0,0 +1,31 @@
+"""Add failed_request_ids to rematch_jobs
+
+Revision ID: b4e2c7a9d153
+Revises: a6d1f8c3e527
+Create Date: 2026-10-19 23:41:07.215480
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e2c7a9d153'
+down_revision: Union[str, None] = 'a6d1f8c3e527'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Requests whose matching failed, retried when the job is resumed
+    op.add_column(
+        'rematch_jobs',
+        sa.Column('failed_request_ids', postgresql.ARRAY(sa.UUID()), server_default='{}', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('rematch_jobs', 'failed_request_ids')
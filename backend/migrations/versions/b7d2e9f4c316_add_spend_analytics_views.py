@@ -0,0 +1,75 @@
+"""Add employee department and spend analytics materialized views
+
+Revision ID: b7d2e9f4c316
+Revises: f1c6a8e2b937
+Create Date: 2026-10-19 20:41:07.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e9f4c316'
+down_revision: Union[str, None] = 'f1c6a8e2b937'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Approved spend in USD (balances are kept in USD) per month, category and department
+SPEND_VIEW_SQL = """
+CREATE MATERIALIZED VIEW analytics_monthly_spend AS
+SELECT
+    b.year,
+    b.month,
+    b.category_id,
+    c.name AS category_name,
+    COALESCE(e.department, 'Unassigned') AS department,
+    sum(b.monthly_used) AS total_spent,
+    count(*) FILTER (WHERE b.monthly_used > 0) AS employees_with_spend
+FROM employee_benefit_balances b
+JOIN employees e ON e.id = b.employee_id
+JOIN benefit_categories c ON c.id = b.category_id
+GROUP BY b.year, b.month, b.category_id, c.name, COALESCE(e.department, 'Unassigned')
+"""
+
+# Request counts per month, category, department and status. Requests without a
+# category (rejected before matching) are grouped under 'Uncategorized'.
+OUTCOMES_VIEW_SQL = """
+CREATE MATERIALIZED VIEW analytics_request_outcomes AS
+SELECT
+    date_part('year', r.submission_timestamp)::int AS year,
+    date_part('month', r.submission_timestamp)::int AS month,
+    COALESCE(c.name, 'Uncategorized') AS category_name,
+    COALESCE(e.department, 'Unassigned') AS department,
+    lower(r.status::text) AS status,  -- enum names, e.g. APPROVED -> approved
+    count(*) AS request_count
+FROM reimbursement_requests r
+JOIN employees e ON e.id = r.employee_id
+LEFT JOIN benefit_categories c ON c.id = r.category_id
+GROUP BY 1, 2, 3, 4, 5
+"""
+
+
+def upgrade() -> None:
+    op.add_column('employees', sa.Column('department', sa.String(length=100), nullable=True))
+
+    op.execute(SPEND_VIEW_SQL)
+    # REFRESH ... CONCURRENTLY requires a unique index over plain columns
+    op.execute(
+        "CREATE UNIQUE INDEX uq_analytics_monthly_spend "
+        "ON analytics_monthly_spend (year, month, category_id, department)"
+    )
+    op.execute(OUTCOMES_VIEW_SQL)
+    op.execute(
+        "CREATE UNIQUE INDEX uq_analytics_request_outcomes "
+        "ON analytics_request_outcomes (year, month, category_name, department, status)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS analytics_request_outcomes")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS analytics_monthly_spend")
+    op.drop_column('employees', 'department')
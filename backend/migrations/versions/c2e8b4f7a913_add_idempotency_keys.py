@@ -0,0 +1,42 @@
+"""Add idempotency_keys table
+
+Revision ID: c2e8b4f7a913
+Revises: a5f0c3d81e27
+Create Date: 2026-10-19 14:41:52.306218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e8b4f7a913'
+down_revision: Union[str, None] = 'a5f0c3d81e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('idempotency_keys',
+    sa.Column('employee_id', sa.UUID(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.Enum('IN_PROGRESS', 'COMPLETED', name='idempotencystatus'), nullable=False),
+    sa.Column('request_fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('request_id', sa.UUID(), nullable=True),
+    sa.Column('response_body', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('employee_id', 'key')
+    )
+    op.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_idempotency_keys_expires_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+    op.execute('DROP TYPE IF EXISTS idempotencystatus')
@@ -0,0 +1,45 @@
+"""Add rematch_jobs table
+
+Revision ID: c8f3a1d6e925
+Revises: b7d2e9f4c316
+Create Date: 2026-10-19 22:06:31.884107
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f3a1d6e925'
+down_revision: Union[str, None] = 'b7d2e9f4c316'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('rematch_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.Enum('RUNNING', 'COMPLETED', 'FAILED', name='rematchjobstatus'), nullable=False),
+    sa.Column('cutoff', sa.DateTime(), nullable=False),
+    sa.Column('cursor_submitted_at', sa.DateTime(), nullable=True),
+    sa.Column('cursor_id', sa.UUID(), nullable=True),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('approved', sa.Integer(), nullable=False),
+    sa.Column('rejected', sa.Integer(), nullable=False),
+    sa.Column('still_pending', sa.Integer(), nullable=False),
+    sa.Column('skipped', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rematch_jobs')
+    op.execute('DROP TYPE IF EXISTS rematchjobstatus')
@@ -0,0 +1,275 @@
+"""Partition reimbursement_requests and invoices by month, add archive tables
+
+Revision ID: d4a7e1c9b852
+Revises: c2e8b4f7a913
+Create Date: 2026-10-19 16:05:43.518207
+
+"""
+import zlib
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7e1c9b852'
+down_revision: Union[str, None] = 'c2e8b4f7a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept in sync with INVOICE_SEARCH_VECTOR_SQL in app/models/invoice.py
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(vendor_name, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(invoice_number, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, "
+    "coalesce(jsonb_path_query_array(items, '$[*].description')::text, '')), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(extracted_text, '')), 'C')"
+)
+
+# Months created ahead of the current one (the app keeps extending this at startup)
+MONTHS_AHEAD = 2
+
+REQUEST_COLUMNS = (
+    "id, employee_id, category_id, status, amount, currency, cloudinary_url, "
+    "cloudinary_public_id, submission_timestamp, rejection_reason, created_at, updated_at"
+)
+INVOICE_COLUMNS = (
+    "id, request_id, vendor_name, purchase_date, items, total_amount, "
+    "currency, invoice_number, extracted_text, created_at"
+)
+
+LISTING_INDEXES = {
+    'ix_reimbursement_requests_status_submitted': (
+        ['status', 'submission_timestamp', 'id'], ['employee_id', 'category_id', 'amount', 'currency']
+    ),
+    'ix_reimbursement_requests_employee_submitted': (
+        ['employee_id', 'submission_timestamp', 'id'], ['category_id', 'status', 'amount', 'currency']
+    ),
+    'ix_reimbursement_requests_category_submitted': (
+        ['category_id', 'submission_timestamp', 'id'], ['employee_id', 'status', 'amount', 'currency']
+    ),
+    'ix_reimbursement_requests_submitted': (
+        ['submission_timestamp', 'id'], ['employee_id', 'category_id', 'status', 'amount', 'currency']
+    ),
+}
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _request_columns(partitioned: bool) -> list:
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('employee_id', sa.UUID(), nullable=False),
+        sa.Column('category_id', sa.UUID(), nullable=True),
+        sa.Column('status', postgresql.ENUM(name='requeststatus', create_type=False), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('currency', sa.String(length=10), nullable=False),
+        sa.Column('cloudinary_url', sa.String(length=500), nullable=False),
+        sa.Column('cloudinary_public_id', sa.String(length=255), nullable=False),
+        sa.Column('submission_timestamp', sa.DateTime(), nullable=False),
+        sa.Column('rejection_reason', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['benefit_categories.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint(
+            *(['id', 'submission_timestamp'] if partitioned else ['id']),
+            name='reimbursement_requests_pkey'
+        ),
+    ]
+
+
+def _invoice_columns(partitioned: bool) -> list:
+    columns = [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('request_id', sa.UUID(), nullable=False),
+    ]
+    if partitioned:
+        columns.append(sa.Column('submitted_at', sa.DateTime(), nullable=False))
+    columns += [
+        sa.Column('vendor_name', sa.String(length=255), nullable=True),
+        sa.Column('purchase_date', sa.Date(), nullable=True),
+        sa.Column('items', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('currency', sa.String(length=10), nullable=False),
+        sa.Column('invoice_number', sa.String(length=100), nullable=True),
+        sa.Column('extracted_text', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True),
+    ]
+    if partitioned:
+        columns += [
+            sa.ForeignKeyConstraint(
+                ['request_id', 'submitted_at'],
+                ['reimbursement_requests.id', 'reimbursement_requests.submission_timestamp'],
+                ondelete='CASCADE',
+                name='invoices_request_id_fkey'
+            ),
+            sa.PrimaryKeyConstraint('id', 'submitted_at', name='invoices_pkey'),
+        ]
+    else:
+        columns += [
+            sa.ForeignKeyConstraint(
+                ['request_id'], ['reimbursement_requests.id'], ondelete='CASCADE', name='invoices_request_id_fkey'
+            ),
+            sa.PrimaryKeyConstraint('id', name='invoices_pkey'),
+        ]
+    return columns
+
+
+def _create_request_and_invoice_indexes(partitioned: bool) -> None:
+    for name, (columns, include) in LISTING_INDEXES.items():
+        op.create_index(name, 'reimbursement_requests', columns, unique=False, postgresql_include=include)
+    op.create_index(
+        'ix_invoices_request_id', 'invoices',
+        ['request_id', 'submitted_at'] if partitioned else ['request_id'], unique=True
+    )
+    op.create_index('ix_invoices_search_vector', 'invoices', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def _move_aside(table: str) -> None:
+    """Rename a table and its primary key so both names are free for the replacement."""
+    op.execute(f'ALTER TABLE {table} RENAME TO {table}_old')
+    op.execute(f'ALTER TABLE {table}_old RENAME CONSTRAINT {table}_pkey TO {table}_old_pkey')
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    op.drop_constraint('invoices_request_id_fkey', 'invoices', type_='foreignkey')
+    for name in LISTING_INDEXES:
+        op.drop_index(name, table_name='reimbursement_requests')
+    op.drop_index('ix_invoices_request_id', table_name='invoices')
+    op.drop_index('ix_invoices_search_vector', table_name='invoices')
+    _move_aside('reimbursement_requests')
+    _move_aside('invoices')
+
+    op.create_table(
+        'reimbursement_requests', *_request_columns(partitioned=True),
+        postgresql_partition_by='RANGE (submission_timestamp)'
+    )
+    op.create_table('invoices', *_invoice_columns(partitioned=True), postgresql_partition_by='RANGE (submitted_at)')
+    # Indexes on the parents are created on every partition automatically
+    _create_request_and_invoice_indexes(partitioned=True)
+
+    # One partition per month covering all existing requests and MONTHS_AHEAD future months.
+    # No DEFAULT partition: it would stop Postgres from scanning partitions in order,
+    # so newest-first listings would probe every month instead of only the latest ones.
+    oldest, newest = conn.execute(
+        sa.text('SELECT min(submission_timestamp), max(submission_timestamp) FROM reimbursement_requests_old')
+    ).one()
+    current = datetime.utcnow().date().replace(day=1)
+    month = min(oldest.date().replace(day=1), current) if oldest else current
+    last = max(newest.date().replace(day=1), _add_months(current, MONTHS_AHEAD)) if newest else _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        for table in ('reimbursement_requests', 'invoices'):
+            op.execute(
+                f"CREATE TABLE {table}_y{month.year}m{month.month:02d} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+        month = upper
+
+    op.execute(
+        f'INSERT INTO reimbursement_requests ({REQUEST_COLUMNS}) '
+        f'SELECT {REQUEST_COLUMNS} FROM reimbursement_requests_old'
+    )
+    op.execute(
+        f'INSERT INTO invoices ({INVOICE_COLUMNS}, submitted_at) '
+        f'SELECT {", ".join("i." + c.strip() for c in INVOICE_COLUMNS.split(","))}, r.submission_timestamp '
+        'FROM invoices_old i JOIN reimbursement_requests_old r ON r.id = i.request_id'
+    )
+    op.drop_table('invoices_old')
+    op.drop_table('reimbursement_requests_old')
+
+    op.create_table('reimbursement_requests_archive',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('employee_id', sa.UUID(), nullable=False),
+    sa.Column('category_id', sa.UUID(), nullable=True),
+    sa.Column('status', postgresql.ENUM(name='requeststatus', create_type=False), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('currency', sa.String(length=10), nullable=False),
+    sa.Column('cloudinary_url', sa.String(length=500), nullable=False),
+    sa.Column('cloudinary_public_id', sa.String(length=255), nullable=False),
+    sa.Column('submission_timestamp', sa.DateTime(), nullable=False),
+    sa.Column('rejection_reason', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['benefit_categories.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_reimbursement_requests_archive_employee_submitted', 'reimbursement_requests_archive',
+        ['employee_id', 'submission_timestamp'], unique=False
+    )
+    op.create_table('invoices_archive',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('request_id', sa.UUID(), nullable=False),
+    sa.Column('submitted_at', sa.DateTime(), nullable=False),
+    sa.Column('vendor_name', sa.String(length=255), nullable=True),
+    sa.Column('purchase_date', sa.Date(), nullable=True),
+    sa.Column('items', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('currency', sa.String(length=10), nullable=False),
+    sa.Column('invoice_number', sa.String(length=100), nullable=True),
+    sa.Column('extracted_text_compressed', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['request_id'], ['reimbursement_requests_archive.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('request_id')
+    )
+
+
+def downgrade() -> None:
+    # Archived rows are restored into the unpartitioned tables, so nothing is lost
+    for name in LISTING_INDEXES:
+        op.drop_index(name, table_name='reimbursement_requests')
+    op.drop_index('ix_invoices_request_id', table_name='invoices')
+    op.drop_index('ix_invoices_search_vector', table_name='invoices')
+    op.execute('ALTER TABLE invoices DROP CONSTRAINT invoices_request_id_fkey')
+    _move_aside('reimbursement_requests')
+    _move_aside('invoices')
+
+    op.create_table('reimbursement_requests', *_request_columns(partitioned=False))
+    op.create_table('invoices', *_invoice_columns(partitioned=False))
+
+    op.execute(
+        f'INSERT INTO reimbursement_requests ({REQUEST_COLUMNS}) '
+        f'SELECT {REQUEST_COLUMNS} FROM reimbursement_requests_old '
+        f'UNION ALL SELECT {REQUEST_COLUMNS} FROM reimbursement_requests_archive'
+    )
+    op.execute(
+        f'INSERT INTO invoices ({INVOICE_COLUMNS}) '
+        f'SELECT {INVOICE_COLUMNS} FROM invoices_old'
+    )
+    # Archived OCR text is zlib-compressed by the application
+    archived_columns = INVOICE_COLUMNS.replace('extracted_text', 'extracted_text_compressed')
+    rows = op.get_bind().execute(sa.text(f'SELECT {archived_columns} FROM invoices_archive')).mappings().all()
+    if rows:
+        invoices = sa.table('invoices', *[
+            sa.column(c.strip(), postgresql.JSONB() if c.strip() == 'items' else None)
+            for c in INVOICE_COLUMNS.split(',')
+        ])
+        restored = []
+        for row in rows:
+            values = dict(row)
+            compressed = values.pop('extracted_text_compressed')
+            values['extracted_text'] = zlib.decompress(compressed).decode('utf-8') if compressed is not None else None
+            restored.append(values)
+        op.bulk_insert(invoices, restored)
+    _create_request_and_invoice_indexes(partitioned=False)
+
+    op.drop_table('invoices_archive')
+    op.drop_index('ix_reimbursement_requests_archive_employee_submitted', table_name='reimbursement_requests_archive')
+    op.drop_table('reimbursement_requests_archive')
+    # Dropping the partitioned parents drops all their partitions
+    op.drop_table('invoices_old')
+    op.drop_table('reimbursement_requests_old')
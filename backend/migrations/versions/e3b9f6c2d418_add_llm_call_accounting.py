@@ -0,0 +1,70 @@
+"""Add llm_calls table and daily LLM usage view
+
+Revision ID: e3b9f6c2d418
+Revises: c8f3a1d6e925
+Create Date: 2026-10-19 23:12:45.306518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b9f6c2d418'
+down_revision: Union[str, None] = 'c8f3a1d6e925'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Plain view: a day filter is pushed below the aggregation and served by ix_llm_calls_day.
+# Latencies only count successful calls.
+USAGE_VIEW_SQL = """
+CREATE VIEW llm_usage_daily AS
+SELECT
+    created_at::date AS day,
+    model,
+    stage,
+    count(*) AS calls,
+    count(*) FILTER (WHERE error IS NOT NULL) AS failed_calls,
+    COALESCE(sum(prompt_tokens), 0) AS prompt_tokens,
+    COALESCE(sum(completion_tokens), 0) AS completion_tokens,
+    COALESCE(sum(total_tokens), 0) AS total_tokens,
+    round(avg(latency_ms) FILTER (WHERE error IS NULL)) AS avg_latency_ms,
+    percentile_disc(0.5) WITHIN GROUP (ORDER BY latency_ms) FILTER (WHERE error IS NULL) AS p50_latency_ms,
+    percentile_disc(0.95) WITHIN GROUP (ORDER BY latency_ms) FILTER (WHERE error IS NULL) AS p95_latency_ms,
+    round(avg(queue_ms)) AS avg_queue_ms,
+    sum(retries) AS retries
+FROM llm_calls
+GROUP BY 1, 2, 3
+"""
+
+
+def upgrade() -> None:
+    op.create_table('llm_calls',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('request_id', sa.UUID(), nullable=True),
+    sa.Column('stage', sa.String(length=30), nullable=False),
+    sa.Column('model', sa.String(length=50), nullable=False),
+    sa.Column('priority', sa.String(length=20), nullable=False),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+    sa.Column('completion_tokens', sa.Integer(), nullable=True),
+    sa.Column('total_tokens', sa.Integer(), nullable=True),
+    sa.Column('latency_ms', sa.Integer(), nullable=True),
+    sa.Column('queue_ms', sa.Integer(), nullable=False),
+    sa.Column('retries', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_llm_calls_request_id', 'llm_calls', ['request_id'], unique=False)
+    op.create_index('ix_llm_calls_day', 'llm_calls', [sa.text('(created_at::date)')], unique=False)
+    op.execute(USAGE_VIEW_SQL)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW IF EXISTS llm_usage_daily")
+    op.drop_index('ix_llm_calls_day', table_name='llm_calls')
+    op.drop_index('ix_llm_calls_request_id', table_name='llm_calls')
+    op.drop_table('llm_calls')
@@ -0,0 +1,35 @@
+"""Add unique (category_id, keyword) index for set-based keyword imports
+
+Revision ID: e5b9d3a7f214
+Revises: d4a7e1c9b852
+Create Date: 2026-10-19 17:32:08.914376
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9d3a7f214'
+down_revision: Union[str, None] = 'd4a7e1c9b852'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the oldest copy of any keyword added twice before the index existed
+    op.execute(
+        'DELETE FROM category_keywords k USING category_keywords older '
+        'WHERE k.category_id = older.category_id AND k.keyword = older.keyword '
+        'AND (k.created_at, k.id) > (older.created_at, older.id)'
+    )
+    op.create_index(
+        'uq_category_keywords_category_keyword', 'category_keywords',
+        ['category_id', 'keyword'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_category_keywords_category_keyword', table_name='category_keywords')
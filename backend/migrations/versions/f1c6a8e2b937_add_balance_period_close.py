@@ -0,0 +1,26 @@
+"""Add closed_at to employee_benefit_balances for period close
+
+Revision ID: f1c6a8e2b937
+Revises: e5b9d3a7f214
+Create Date: 2026-10-19 18:14:52.207631
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6a8e2b937'
+down_revision: Union[str, None] = 'e5b9d3a7f214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('employee_benefit_balances', sa.Column('closed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('employee_benefit_balances', 'closed_at')
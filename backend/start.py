@@ -1,16 +1,41 @@
 """
 Startup script for Railway deployment.
 Reads PORT from environment and starts uvicorn server.
+
+In production the server runs several worker processes on uvloop/httptools.
+On SIGTERM (e.g. during a deploy) each worker stops accepting connections and
+lets in-flight requests, such as OCR submissions, finish within
+GRACEFUL_SHUTDOWN_TIMEOUT seconds before exiting.
 """
 import os
 import uvicorn
 
+from app.config import settings
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=port,
-        log_level="info"
-    )
-
+    
+    if settings.ENVIRONMENT == "production":
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=port,
+            log_level="info",
+            workers=settings.WEB_CONCURRENCY,
+            loop="uvloop",
+            http="httptools",
+            # Keep idle connections longer than the proxy does, so it never
+            # reuses a connection the server has just closed
+            timeout_keep_alive=settings.KEEP_ALIVE_TIMEOUT,
+            backlog=settings.BACKLOG,
+            timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+            proxy_headers=True,
+            forwarded_allow_ips="*",
+        )
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=port,
+            log_level="info"
+        )
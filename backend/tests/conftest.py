@@ -0,0 +1,58 @@
+"""
+Shared fixtures.
+
+The tests run against the database in DATABASE_URL (migrated with
+`alembic upgrade head`) and are skipped when it cannot be reached. Rows they
+create belong to a throwaway employee and are removed with it.
+"""
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+
+# Read by app.config on import: count queries per request and fail routes over budget
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ["QUERY_PROFILER_ENABLED"] = "true"
+os.environ["QUERY_PROFILER_STRICT"] = "true"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import engine
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def database():
+    try:
+        with engine.connect():
+            pass
+    except OperationalError as e:
+        pytest.skip(f"Database not reachable: {e}")
+    return engine
+
+
+@pytest.fixture
+def client(database):
+    # Not entered as a context manager, so startup tasks (partitions, warm-up) do not run
+    return TestClient(app)
+
+
+@pytest.fixture
+def employee(database):
+    """A throwaway employee; their requests, invoices and balances are deleted with them."""
+    employee_id = uuid.uuid4()
+    with database.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO employees (id, name, employee_id, department, created_at, updated_at) "
+                "VALUES (:id, 'Test Employee', :code, 'QA', :now, :now)"
+            ),
+            {"id": employee_id, "code": f"TEST-{employee_id.hex[:12]}", "now": datetime.utcnow()}
+        )
+    yield employee_id
+    with database.begin() as conn:
+        conn.execute(text("DELETE FROM reimbursement_requests_archive WHERE employee_id = :id"), {"id": employee_id})
+        conn.execute(text("DELETE FROM employees WHERE id = :id"), {"id": employee_id})
@@ -0,0 +1,127 @@
+"""
+Query counts of the reimbursement read paths under the query profiler.
+
+The profiler runs in strict mode (see conftest), so a route issuing more
+queries than its query_budget fails the request outright; the tests also pin
+the exact counts so a regression within the budget is noticed.
+"""
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+import app.api.routes.reimbursement as reimbursement_routes
+from app.middleware.query_profiler import current_query_stats
+from app.models.archive import compress_text
+from app.services.storage import LocalStorage
+
+INSERT_REQUEST_SQL = """
+INSERT INTO {table} (id, employee_id, status, amount, currency, cloudinary_url, cloudinary_public_id,
+                     submission_timestamp, created_at, updated_at{extra_columns})
+VALUES (:id, :employee_id, 'APPROVED', 12.50, 'USD', 'https://files.example/x.jpg', 'x',
+        :submitted_at, :submitted_at, :submitted_at{extra_values})
+"""
+
+
+def _request_url(request_id):
+    return f"/api/v1/reimbursement/{request_id}"
+
+
+@pytest.fixture
+def live_request(database, employee):
+    request_id = uuid.uuid4()
+    submitted_at = datetime.utcnow()
+    with database.begin() as conn:
+        conn.execute(
+            text(INSERT_REQUEST_SQL.format(table="reimbursement_requests", extra_columns="", extra_values="")),
+            {"id": request_id, "employee_id": employee, "submitted_at": submitted_at}
+        )
+        conn.execute(
+            text(
+                "INSERT INTO invoices (id, request_id, submitted_at, total_amount, currency, extracted_text, items, created_at) "
+                "VALUES (gen_random_uuid(), :id, :submitted_at, 12.50, 'USD', 'Gym membership', '[]', :submitted_at)"
+            ),
+            {"id": request_id, "submitted_at": submitted_at}
+        )
+    return request_id
+
+
+@pytest.fixture
+def archived_request(database, employee):
+    request_id = uuid.uuid4()
+    submitted_at = datetime.utcnow() - timedelta(days=3 * 365)
+    with database.begin() as conn:
+        conn.execute(
+            text(INSERT_REQUEST_SQL.format(
+                table="reimbursement_requests_archive",
+                extra_columns=", archived_at",
+                extra_values=", :submitted_at"
+            )),
+            {"id": request_id, "employee_id": employee, "submitted_at": submitted_at}
+        )
+        conn.execute(
+            text(
+                "INSERT INTO invoices_archive (id, request_id, submitted_at, total_amount, currency, "
+                "extracted_text_compressed, items, created_at) "
+                "VALUES (gen_random_uuid(), :id, :submitted_at, 12.50, 'USD', :text, '[]', :submitted_at)"
+            ),
+            {"id": request_id, "submitted_at": submitted_at, "text": compress_text("Gym membership")}
+        )
+    return request_id
+
+
+def test_get_live_request_is_one_query(client, live_request):
+    response = client.get(_request_url(live_request))
+    assert response.status_code == 200
+    assert response.json()["invoice"]["extracted_text"] == "Gym membership"
+    assert response.headers["x-query-count"] == "1"
+
+
+def test_get_archived_request_adds_one_query(client, archived_request):
+    # Live-table miss, then the archive lookup: within the route's budget of 2
+    response = client.get(_request_url(archived_request))
+    assert response.status_code == 200
+    assert response.json()["invoice"]["extracted_text"] == "Gym membership"
+    assert response.headers["x-query-count"] == "2"
+
+
+def test_get_missing_request_stays_within_budget(client, database):
+    response = client.get(_request_url(uuid.uuid4()))
+    assert response.status_code == 404
+    assert response.headers["x-query-count"] == "2"
+
+
+def test_submit_response_is_one_query(client, employee, monkeypatch, tmp_path):
+    async def extract_invoice_data(image_url, content=None, content_type=None):
+        return {"vendor_name": "Gym", "total_amount": 12.5, "currency": "USD", "extracted_text": "Gym", "items": []}
+
+    async def match_category(**kwargs):
+        # Below the confidence threshold: the request goes to review without validation
+        return {"category_id": None, "confidence": 0.1, "matched_keywords": []}
+
+    response_queries = []
+    load_response = reimbursement_routes.load_reimbursement_response
+
+    def counted_load_response(db, request_id, fields=None):
+        stats = current_query_stats()
+        before = stats.count
+        response = load_response(db, request_id, fields)
+        response_queries.append(stats.count - before)
+        return response
+
+    monkeypatch.setattr(reimbursement_routes, "extract_invoice_data", extract_invoice_data)
+    monkeypatch.setattr(reimbursement_routes, "match_category", match_category)
+    monkeypatch.setattr(reimbursement_routes, "load_reimbursement_response", counted_load_response)
+    monkeypatch.setattr(reimbursement_routes, "get_storage", lambda: LocalStorage(str(tmp_path), "/files"))
+
+    response = client.post(
+        "/api/v1/reimbursement/submit",
+        data={"employee_id": str(employee)},
+        files={"file": ("invoice.jpg", b"\xff\xd8\xff" + uuid.uuid4().bytes, "image/jpeg")}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending_review"
+    assert Decimal(response.json()["amount"]) == Decimal("12.50")
+    assert response_queries == [1]
@@ -0,0 +1,13 @@
+"""
+Cold-start budget of the application (see `manage.py profile-startup`).
+"""
+import argparse
+
+import manage
+
+
+def test_startup_within_budget(capsys):
+    args = argparse.Namespace(top=10, budget_ms=manage.STARTUP_BUDGET_MS, runs=3)
+    status = manage.profile_startup(args)
+    report = capsys.readouterr()
+    assert status == 0, report.out + report.err
@@ -3,16 +3,19 @@ import { employeesAPI } from '../services/api';
 
 function EmployeeSelector({ value, onChange, error }) {
   const [employees, setEmployees] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     loadEmployees();
   }, []);
 
-  const loadEmployees = async () => {
+  const loadEmployees = async (cursor = null) => {
     try {
-      const response = await employeesAPI.list();
-      setEmployees(response.data);
+      const response = await employeesAPI.list(cursor);
+      const { items } = response.data;
+      setEmployees((loaded) => (cursor ? [...loaded, ...items] : items));
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Failed to load employees:', error);
     } finally {
@@ -40,6 +43,11 @@ function EmployeeSelector({ value, onChange, error }) {
           </option>
         ))}
       </select>
+      {nextCursor && (
+        <button type="button" className="btn btn-secondary" onClick={() => loadEmployees(nextCursor)}>
+          Load more employees
+        </button>
+      )}
       {error && <div className="error">{error}</div>}
     </div>
   );
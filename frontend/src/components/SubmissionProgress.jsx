@@ -0,0 +1,37 @@
+const formatStage = ({ stage, data }) => {
+  switch (stage) {
+    case 'uploaded':
+      return 'Invoice uploaded';
+    case 'ocr_completed':
+      return `Invoice read: ${data.vendor_name || 'Unknown vendor'}, ${data.total_amount} ${data.currency}`;
+    case 'category_matched':
+      return data.category_id
+        ? `Category matched (${Math.round((data.confidence || 0) * 100)}% confidence)`
+        : 'No matching category found';
+    case 'validated':
+      return data.valid ? 'Within benefit limits' : `Limit check failed: ${data.reason}`;
+    case 'completed':
+      return `Finished: ${data.status.replace('_', ' ')}`;
+    case 'failed':
+      return `Failed: ${data.detail}`;
+    default:
+      return stage;
+  }
+};
+
+function SubmissionProgress({ events }) {
+  if (!events.length) return null;
+
+  return (
+    <div className="result-card">
+      <h3>Progress</h3>
+      {events.map((event) => (
+        <div className="result-item" key={event.stage}>
+          <span>{formatStage(event)}</span>
+        </div>
+      ))}
+    </div>
+  );
+}
+
+export default SubmissionProgress;
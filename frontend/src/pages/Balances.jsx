@@ -3,6 +3,7 @@ import { employeesAPI, balancesAPI } from '../services/api';
 
 function Balances() {
   const [employees, setEmployees] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [selectedEmployeeId, setSelectedEmployeeId] = useState('');
   const [year, setYear] = useState(new Date().getFullYear());
   const [month, setMonth] = useState(new Date().getMonth() + 1);
@@ -19,10 +20,12 @@ function Balances() {
     }
   }, [selectedEmployeeId, year, month]);
 
-  const loadEmployees = async () => {
+  const loadEmployees = async (cursor = null) => {
     try {
-      const response = await employeesAPI.list();
-      setEmployees(response.data);
+      const response = await employeesAPI.list(cursor);
+      const { items } = response.data;
+      setEmployees((loaded) => (cursor ? [...loaded, ...items] : items));
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Failed to load employees:', error);
     }
@@ -76,6 +79,11 @@ function Balances() {
               </option>
             ))}
           </select>
+          {nextCursor && (
+            <button type="button" className="btn btn-secondary" onClick={() => loadEmployees(nextCursor)}>
+              Load more employees
+            </button>
+          )}
         </div>
 
         <div style={{ display: 'flex', gap: '16px' }}>
@@ -21,8 +21,15 @@ function CategoryManagement() {
 
   const loadCategories = async () => {
     try {
-      const response = await categoriesAPI.list();
-      setCategories(response.data);
+      // The category set is small, so follow cursors until every page is loaded
+      const allCategories = [];
+      let cursor = null;
+      do {
+        const response = await categoriesAPI.list(cursor);
+        allCategories.push(...response.data.items);
+        cursor = response.data.next_cursor;
+      } while (cursor);
+      setCategories(allCategories);
     } catch (error) {
       console.error('Failed to load categories:', error);
       alert('Failed to load categories');
@@ -1,15 +1,60 @@
-import { useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import EmployeeSelector from '../components/EmployeeSelector';
 import InvoiceUpload from '../components/InvoiceUpload';
 import ReimbursementResult from '../components/ReimbursementResult';
+import SubmissionProgress from '../components/SubmissionProgress';
 import { reimbursementAPI } from '../services/api';
 
+// Processing stages streamed by GET /reimbursement/{id}/events
+const STAGES = ['uploaded', 'ocr_completed', 'category_matched', 'validated', 'completed', 'failed'];
+
 function SubmitRequest() {
   const [employeeId, setEmployeeId] = useState('');
   const [file, setFile] = useState(null);
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState(null);
   const [error, setError] = useState(null);
+  const [progress, setProgress] = useState([]);
+  const eventSourceRef = useRef(null);
+
+  const closeEvents = () => {
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
+    }
+  };
+
+  useEffect(() => closeEvents, []);
+
+  const followProgress = (requestId) => {
+    closeEvents();
+    const events = reimbursementAPI.events(requestId);
+    eventSourceRef.current = events;
+
+    STAGES.forEach((stage) => {
+      events.addEventListener(stage, (e) => {
+        const data = JSON.parse(e.data);
+        setProgress((prev) => [...prev.filter((p) => p.stage !== stage), { stage, data }]);
+        if (stage === 'completed' || stage === 'failed') {
+          closeEvents();
+        }
+        if (stage === 'completed') {
+          // The POST may have been cut off by a proxy; the stream still tells us it finished
+          reimbursementAPI.get(requestId)
+            .then((response) => {
+              setResult(response.data);
+              setError(null);
+              setLoading(false);
+            })
+            .catch(() => {});
+        }
+        if (stage === 'failed') {
+          setError(data.detail);
+          setLoading(false);
+        }
+      });
+    });
+  };
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -27,14 +72,25 @@ function SubmitRequest() {
     setLoading(true);
     setError(null);
     setResult(null);
+    setProgress([]);
+
+    const requestId = crypto.randomUUID();
+    followProgress(requestId);
 
     try {
-      const response = await reimbursementAPI.submit(employeeId, file);
+      const response = await reimbursementAPI.submit(employeeId, file, requestId);
       setResult(response.data);
-    } catch (err) {
-      setError(err.response?.data?.detail || 'Failed to submit reimbursement request');
-    } finally {
       setLoading(false);
+    } catch (err) {
+      if (err.response && err.response.status < 500) {
+        closeEvents();
+        setError(err.response.data?.detail || 'Failed to submit reimbursement request');
+        setLoading(false);
+      } else if (!eventSourceRef.current) {
+        setError(err.response?.data?.detail || 'Failed to submit reimbursement request');
+        setLoading(false);
+      }
+      // Otherwise the request may still be processing: the progress stream delivers the outcome
     }
   };
 
@@ -67,6 +123,8 @@ function SubmitRequest() {
         </form>
       </div>
 
+      <SubmissionProgress events={progress} />
+
       {result && <ReimbursementResult result={result} />}
     </div>
   );
@@ -16,31 +16,58 @@ const api = axios.create({
  * Employees API
  */
 export const employeesAPI = {
-  list: () => api.get('/employees'),
+  // Keyset-paginated: response.data is { items, next_cursor }
+  list: (cursor, limit) => {
+    const params = {};
+    if (cursor) params.cursor = cursor;
+    if (limit) params.limit = limit;
+    return api.get('/employees', { params });
+  },
 };
 
+// Fields rendered by ReimbursementResult; the raw OCR text is never fetched
+const RESULT_FIELDS = [
+  'id', 'status', 'amount', 'currency', 'category_name', 'employee_name', 'employee_employee_id',
+  'cloudinary_url', 'submission_timestamp', 'rejection_reason', 'remaining_balance',
+  'remaining_balance_currency', 'invoice.vendor_name', 'invoice.purchase_date',
+  'invoice.invoice_number', 'invoice.items', 'invoice.currency',
+].join(',');
+
 /**
  * Reimbursement API
  */
 export const reimbursementAPI = {
-  submit: (employeeId, file) => {
+  // requestId is generated by the client so progress can be streamed while submitting;
+  // it doubles as the idempotency key, making retries safe
+  submit: (employeeId, file, requestId) => {
     const formData = new FormData();
     formData.append('employee_id', employeeId);
     formData.append('file', file);
+    formData.append('request_id', requestId);
     return api.post('/reimbursement/submit', formData, {
+      params: { fields: RESULT_FIELDS },
       headers: {
         'Content-Type': 'multipart/form-data',
+        'Idempotency-Key': requestId,
       },
     });
   },
-  get: (requestId) => api.get(`/reimbursement/${requestId}`),
+  get: (requestId) => api.get(`/reimbursement/${requestId}`, { params: { fields: RESULT_FIELDS } }),
+  // Server-Sent Events stream of processing stages
+  events: (requestId) => new EventSource(`${API_BASE_URL}/reimbursement/${requestId}/events`),
 };
 
 /**
  * Categories API
  */
 export const categoriesAPI = {
-  list: () => api.get('/categories'),
+  // Keyset-paginated: response.data is { items, next_cursor }
+  list: (cursor, limit) => {
+    const params = {};
+    if (cursor) params.cursor = cursor;
+    if (limit) params.limit = limit;
+    return api.get('/categories', { params });
+  },
   create: (data) => api.post('/categories', data),
   update: (categoryId, data) => api.put(`/categories/${categoryId}`, data),
   delete: (categoryId) => api.delete(`/categories/${categoryId}`),